@@ -0,0 +1,265 @@
+"""
+This module measures the performance of the calculator and compares it
+with a stored baseline, so that slowdowns are caught like failing tests.
+
+Every metric is a time in seconds, lower is better. The first run, or a run
+with --update, stores the results as the baseline; later runs fail when a
+metric is slower than its baseline by more than the threshold. Baselines
+depend on the machine, so every machine keeps its own file.
+
+Usage:
+    python3 benchmarks.py [--update] [--threshold 0.25] [--baseline FILE]
+"""
+import argparse
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import time
+import timeit
+
+import numpy as np
+# pylint: disable=import-error
+from model.calculator import Calculator
+from presenter.presenter import Presenter
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(SRC_DIR, 'benchmark_baseline.json')
+# Allowed slowdown relative to the baseline
+DEFAULT_THRESHOLD = 0.25
+
+EXPRESSIONS = {
+  'arithmetic': '(1.5+2.25)*3-4/5^2',
+  'nested_trig': 'sin(cos(tan(asin(0.5)+acos(0.2))))*atan(sqrt(ln(10)))',
+  'long_input': '+'.join(['sin(1)*2-3/4'] * 19),
+}
+CURVE = 'sin(x)*x^2/(1+x^2)'
+# Duration of the simulated drag, the time between two mouse moves in
+# seconds and the distance of a move in pixels
+PAN_SECONDS = 2.0
+PAN_MOVE_INTERVAL = 0.008
+PAN_STEP_PIXELS = 2
+# Modules imported by the startup benchmarks
+STARTUP_MODULES = {
+  'import_model': 'presenter.presenter',
+  'import_gui': 'view.main_window',
+}
+
+
+def best_time(function, number, repeat=7):
+  """
+  Returns the time of one call of a function, taking the best of several
+  repeats to filter out noise.
+
+  Args:
+      function (Callable[[], object]): The function to measure.
+      number (int): The number of calls per repeat.
+      repeat (int): The number of repeats.
+
+  Returns:
+      float: The time of one call in seconds.
+  """
+  return min(timeit.repeat(function, number=number, repeat=repeat)) / number
+
+
+def bench_latency(calculator):
+  """ Returns the time of Calculator.calculate for every expression class. """
+  return {f'latency_{name}': best_time(
+    lambda expression=expression: calculator.calculate(expression), 2000)
+    for name, expression in EXPRESSIONS.items()}
+
+
+def bench_sampling():
+  """ Returns the time per plotted point of sampling a curve from scratch,
+      and the time of panning a cached curve. """
+  presenter = Presenter(None)
+  function = presenter.compile_expression(CURVE)
+
+  def sample():
+    presenter.sample_cache.clear()
+    return presenter.sample_function(function, -10, 10)
+
+  points = sample()[0].size
+  per_point = best_time(sample, 20) / points
+
+  offset = [0.0]
+
+  def pan():
+    offset[0] += 0.5
+    presenter.sample_function(function, offset[0] - 10, offset[0] + 10)
+
+  return {'sample_per_point': per_point, 'graph_pan': best_time(pan, 20)}
+
+
+def bench_pan():
+  """ Returns the time per frame shown while the graph window is dragged
+      with the pan tool, i.e. the inverse of the frame rate. The window is
+      drawn offscreen; without PyQt6 nothing is measured. """
+  if importlib.util.find_spec('PyQt6') is None:
+    return {}
+  os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+  # pylint: disable=import-outside-toplevel, no-name-in-module
+  from PyQt6.QtCore import QEvent, QObject
+  from PyQt6.QtWidgets import QApplication
+  from matplotlib.backend_bases import MouseButton, MouseEvent
+  from view.graph_window import GraphWindow
+
+  class PaintCounter(QObject):
+    """ Counts the paint events of a widget. """
+
+    def __init__(self):
+      super().__init__()
+      self.paints = 0
+
+    def eventFilter(self, _, event):  # pylint: disable=invalid-name
+      """ Counts the event if it is a paint event. """
+      if event.type() == QEvent.Type.Paint:
+        self.paints += 1
+      return False
+
+  app = QApplication.instance() or QApplication([])
+  window = GraphWindow(CURVE)
+  window.show()
+  canvas = window.canvas
+  x_start, y_start = canvas.width() / 2, canvas.height() / 2
+  counter = PaintCounter()
+  canvas.installEventFilter(counter)
+
+  def mouse(name, step, **kwargs):
+    canvas.callbacks.process(name, MouseEvent(
+      name, canvas, x_start - step * PAN_STEP_PIXELS, y_start, **kwargs))
+
+  window.toolbar.pan()
+  mouse('button_press_event', 0, button=MouseButton.LEFT)
+  counter.paints = 0
+  start = time.perf_counter()
+  step = 0
+  while (elapsed := time.perf_counter() - start) < PAN_SECONDS:
+    # The moves that arrived while the window was busy are handled at once,
+    # like the queued events of a real drag
+    while step < elapsed / PAN_MOVE_INTERVAL:
+      step += 1
+      mouse('motion_notify_event', step, buttons={MouseButton.LEFT})
+    app.processEvents()
+    time.sleep(0.001)
+  frame = elapsed / max(counter.paints, 1)
+  mouse('button_release_event', step, button=MouseButton.LEFT)
+  window.toolbar.pan()
+  window.close()
+  return {'pan_frame': frame}
+
+
+def bench_throughput(calculator):
+  """ Returns the time per expression of batch evaluation and the time per
+      point of array evaluation. """
+  expressions = [f'{i}*2+sqrt({i})/(1+{i % 7})' for i in range(10000)]
+  compiled = calculator.compile(CURVE)
+  x_values = np.linspace(-10, 10, 100000)
+  return {
+    'batch_per_expression': best_time(
+      lambda: calculator.calculate_many(expressions), 3) / len(expressions),
+    'array_per_point': best_time(
+      lambda: compiled.evaluate_array(x_values), 10) / x_values.size,
+  }
+
+
+def bench_startup(repeat=5):
+  """ Returns the time of importing the application modules in a fresh
+      interpreter. Modules that cannot be imported here are skipped. """
+  env = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+  results = {}
+  for name, module in STARTUP_MODULES.items():
+    times = []
+    for _ in range(repeat):
+      start = time.perf_counter()
+      process = subprocess.run([sys.executable, '-c', f'import {module}'],
+                               cwd=SRC_DIR, env=env, capture_output=True,
+                               check=False)
+      times.append(time.perf_counter() - start)
+      if process.returncode != 0:
+        break
+    else:
+      results[name] = float(np.median(times))
+  return results
+
+
+def run_benchmarks():
+  """
+  Runs all benchmarks.
+
+  Returns:
+      dict[str, float]: The times in seconds by metric name.
+  """
+  calculator = Calculator()
+  results = {}
+  results.update(bench_latency(calculator))
+  results.update(bench_sampling())
+  results.update(bench_throughput(calculator))
+  results.update(bench_pan())
+  results.update(bench_startup())
+  return results
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+  """
+  Finds the metrics that are slower than the baseline by more than the
+  threshold. Metrics missing from either side are ignored.
+
+  Args:
+      results (dict[str, float]): The measured times.
+      baseline (dict[str, float]): The baseline times.
+      threshold (float): The allowed relative slowdown.
+
+  Returns:
+      list[tuple[str, float, float]]: The name, baseline and measured time
+          of every regressed metric.
+  """
+  return [(name, baseline[name], value) for name, value in results.items()
+          if name in baseline and value > baseline[name] * (1 + threshold)]
+
+
+def main(argv=None):
+  """
+  Runs the benchmarks and compares them with the baseline.
+
+  Args:
+      argv (list[str], optional): The command line arguments.
+
+  Returns:
+      int: The exit code, 1 if a metric regressed.
+  """
+  parser = argparse.ArgumentParser(
+    description=__doc__.split('\n\n', maxsplit=1)[0])
+  parser.add_argument('--baseline', default=BASELINE_PATH,
+                      help='JSON file with the baseline times')
+  parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                      help='allowed relative slowdown, e.g. 0.25 for 25%%')
+  parser.add_argument('--update', action='store_true',
+                      help='store the results as the new baseline')
+  args = parser.parse_args(argv)
+
+  results = run_benchmarks()
+  baseline = {}
+  if os.path.exists(args.baseline) and not args.update:
+    with open(args.baseline, encoding='utf-8') as file:
+      baseline = json.load(file)
+
+  for name, value in results.items():
+    change = f'{value / baseline[name] - 1:+7.1%}' if name in baseline else ''
+    print(f'{name:24} {value:12.3e} s {change}')
+
+  if not baseline:
+    with open(args.baseline, 'w', encoding='utf-8') as file:
+      json.dump(results, file, indent=2, sort_keys=True)
+    print(f'Baseline written to {args.baseline}')
+    return 0
+
+  regressions = compare(results, baseline, args.threshold)
+  for name, old, new in regressions:
+    print(f'REGRESSION {name}: {old:.3e} s -> {new:.3e} s')
+  return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -0,0 +1,157 @@
+"""
+This module evaluates expressions without the graphical interface, for use
+in pipelines and containers.
+
+Expressions are read one per line from a file or stdin and evaluated in
+chunks by the shared library; the results are written in input order as
+soon as a chunk is done, so memory does not grow with the input. Every
+input line gives one output row, an empty line gives an error. Only the
+model is imported, never PyQt6 or matplotlib.
+
+Usage:
+    python3 cli.py [INPUT] [-o OUTPUT] [-x VALUE] [--format text|csv|ndjson]
+                   [--workers N] [--chunk-size N]
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+from itertools import islice
+
+# pylint: disable=import-error
+from model.calculator import Calculator, format_result, status_message, \
+  STATUS_OK, CONCURRENT_CHUNK
+
+FORMATS = ('text', 'csv', 'ndjson')
+CSV_HEADER = ('expression', 'result', 'status')
+
+
+def read_chunks(lines, size):
+  """
+  Splits lines into lists of expressions without reading ahead of them.
+
+  Args:
+      lines (Iterable[str]): The input lines.
+      size (int): The number of expressions per chunk.
+
+  Yields:
+      list[str]: The next expressions, stripped of surrounding whitespace.
+  """
+  expressions = (line.strip() for line in lines)
+  while chunk := list(islice(expressions, size)):
+    yield chunk
+
+
+def write_rows(output, output_format, expressions, results, statuses):
+  """
+  Writes the results of a chunk of expressions.
+
+  Args:
+      output (TextIO): The stream to write to.
+      output_format (str): One of FORMATS.
+      expressions (list[str]): The evaluated expressions.
+      results (numpy.ndarray): Their values, NaN on error.
+      statuses (numpy.ndarray): Their STATUS_* codes.
+  """
+  rows = zip(expressions, results.tolist(), statuses.tolist())
+  if output_format == 'text':
+    output.writelines(f'{format_result(value)}\n' for _, value, _ in rows)
+  elif output_format == 'csv':
+    csv.writer(output, lineterminator='\n').writerows(
+      (expression, format_result(value), status_message(status))
+      for expression, value, status in rows)
+  else:
+    output.writelines(json.dumps({
+      'expression': expression,
+      'result': value if math.isfinite(value) else None,
+      'status': status_message(status)}) + '\n'
+      for expression, value, status in rows)
+
+
+def evaluate_stream(lines, output, output_format='text', *, x_value=None,
+                    workers=1, chunk_size=CONCURRENT_CHUNK):
+  """
+  Evaluates expressions line by line and writes the results in order.
+
+  At most workers * chunk_size expressions are held in memory at once.
+
+  Args:
+      lines (Iterable[str]): The input lines, one expression per line.
+      output (TextIO): The stream to write the results to.
+      output_format (str): One of FORMATS.
+      x_value (float, optional): The value of the variable x. Without it,
+          expressions containing x are errors.
+      workers (int): The number of threads evaluating a chunk, 0 for the
+          number of CPUs.
+      chunk_size (int): The number of expressions per library call.
+
+  Returns:
+      int: The number of expressions that could not be evaluated.
+  """
+  if output_format not in FORMATS:
+    raise ValueError(f'unknown output format {output_format!r}')
+  calculator = Calculator()
+  workers = workers or os.cpu_count() or 1
+  if output_format == 'csv':
+    csv.writer(output, lineterminator='\n').writerow(CSV_HEADER)
+  failed = 0
+  for expressions in read_chunks(lines, workers * chunk_size):
+    results, statuses = calculator.evaluate_concurrent(
+      expressions, workers, chunk_size, x_value)
+    write_rows(output, output_format, expressions, results, statuses)
+    failed += int((statuses != STATUS_OK).sum())
+  return failed
+
+
+def main(argv=None):
+  """
+  Evaluates the expressions given on the command line.
+
+  Args:
+      argv (list[str], optional): The command line arguments.
+
+  Returns:
+      int: The exit code, 0 on success.
+  """
+  parser = argparse.ArgumentParser(
+    description=__doc__.split('\n\n', maxsplit=1)[0])
+  parser.add_argument('input', nargs='?', default='-',
+                      help='file with one expression per line, - for stdin')
+  parser.add_argument('-o', '--output', default='-',
+                      help='file to write the results to, - for stdout')
+  parser.add_argument('-x', type=float, dest='x_value',
+                      help='value of the variable x')
+  parser.add_argument('--format', choices=FORMATS, default='text',
+                      dest='output_format', help='output format')
+  parser.add_argument('--workers', type=int, default=1,
+                      help='threads evaluating a chunk, 0 for all CPUs')
+  parser.add_argument('--chunk-size', type=int, default=CONCURRENT_CHUNK,
+                      help='expressions per call of the library')
+  args = parser.parse_args(argv)
+  if args.workers < 0 or args.chunk_size < 1:
+    parser.error('--workers must be >= 0 and --chunk-size >= 1')
+
+  # pylint: disable=consider-using-with
+  source = sys.stdin if args.input == '-' else open(
+    args.input, encoding='utf-8')
+  target = sys.stdout if args.output == '-' else open(
+    args.output, 'w', encoding='utf-8', newline='')
+  try:
+    evaluate_stream(source, target, args.output_format, x_value=args.x_value,
+                    workers=args.workers, chunk_size=args.chunk_size)
+  except BrokenPipeError:
+    # The reader, e.g. head, has seen enough; the output left in the buffer
+    # must not fail again when the interpreter flushes it at exit
+    os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    return 1
+  finally:
+    for stream in (source, target):
+      if stream not in (sys.stdin, sys.stdout):
+        stream.close()
+  return 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
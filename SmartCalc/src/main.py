@@ -1,13 +1,81 @@
 """
 This module contains the main entry point for the SmartCalc application.
+
+Usage:
+    python3 main.py [--profile-startup]
+
+With --profile-startup the application reports how long the imports, the
+creation of the window and its first paint took, and exits.
 """
+import sys
+import time
 
-from PyQt6 import QtWidgets
-# pylint: disable=import-error
-from view.main_window import MainWindow
+PROFILE_FLAG = '--profile-startup'
 
-if __name__ == '__main__':
+
+def profile_startup(start):
+  """
+  Starts the application, measuring every step until the main window is
+  painted for the first time.
+
+  Args:
+      start (float): The time.perf_counter() value the steps are measured
+          from.
+
+  Returns:
+      list[tuple[str, float]]: The steps and their cumulative times in
+          seconds.
+  """
+  # pylint: disable=import-outside-toplevel, no-name-in-module
+  timings = []
+
+  def mark(step):
+    timings.append((step, time.perf_counter() - start))
+
+  from PyQt6 import QtWidgets
+  from PyQt6.QtCore import QObject, QEvent, QTimer
+  mark('import PyQt6')
+  from view.main_window import MainWindow  # pylint: disable=import-error
+  mark('import view.main_window')
   app = QtWidgets.QApplication([])
+  mark('QApplication')
   window = MainWindow()
+  mark('MainWindow')
+
+  class FirstPaint(QObject):
+    """ Quits the application when the window is painted. """
+
+    def eventFilter(self, _, event):  # pylint: disable=invalid-name
+      """ Records the first paint event. """
+      if event.type() == QEvent.Type.Paint and len(timings) == 4:
+        mark('first paint')
+        QTimer.singleShot(0, app.quit)
+      return False
+
+  first_paint = FirstPaint()
+  window.installEventFilter(first_paint)
   window.show()
+  # Platforms without a display may never paint the window
+  QTimer.singleShot(10_000, app.quit)
   app.exec()
+  return timings
+
+
+def run():
+  """ Starts the application. """
+  # pylint: disable=import-outside-toplevel, no-name-in-module, import-error
+  from PyQt6 import QtWidgets
+  from view.main_window import MainWindow
+
+  app = QtWidgets.QApplication([])
+  window = MainWindow()
+  window.show()
+  app.exec()
+
+
+if __name__ == '__main__':
+  if PROFILE_FLAG in sys.argv:
+    for name, seconds in profile_startup(time.perf_counter()):
+      print(f'{name:24} {seconds * 1e3:8.1f} ms', file=sys.stderr)
+  else:
+    run()
@@ -0,0 +1,217 @@
+"""
+    This module provides caches used to avoid evaluating the same
+    expression repeatedly.
+"""
+from collections import OrderedDict
+import math
+
+import numpy as np
+
+# Default memory limit of the sample cache in bytes
+SAMPLE_CACHE_BYTES = 8 * 1024 * 1024
+# Default limits of the cache of calculation results
+RESULT_CACHE_ENTRIES = 1024
+RESULT_CACHE_BYTES = 1024 * 1024
+# Number of grid points stored in one tile
+TILE_POINTS = 32
+
+
+class LRUCache:
+  """ A mapping that keeps the most recently used entries within a memory
+      limit, evicting the least recently used ones first.
+  """
+
+  def __init__(self, max_bytes, max_entries=None):
+    """ Initializes an empty cache.
+
+    Args:
+        max_bytes (int): The limit for the total size of the entries.
+        max_entries (int, optional): The limit for the number of entries.
+            Defaults to no limit.
+    """
+    self.max_bytes = max_bytes
+    self.max_entries = max_entries
+    self.nbytes = 0
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+    self._entries = OrderedDict()
+
+  def __len__(self):
+    return len(self._entries)
+
+  def __contains__(self, key):
+    return key in self._entries
+
+  def get(self, key, default=None):
+    """ Returns the value stored for the key and marks it as recently used.
+
+    Args:
+        key (Hashable): The key to look up.
+        default (object): The value returned if the key is missing.
+    """
+    if key not in self._entries:
+      self.misses += 1
+      return default
+    self.hits += 1
+    self._entries.move_to_end(key)
+    return self._entries[key][0]
+
+  def peek(self, key, default=None):
+    """ Returns the value stored for the key without counting a hit or a
+        miss and without marking it as recently used.
+
+    Args:
+        key (Hashable): The key to look up.
+        default (object): The value returned if the key is missing.
+    """
+    entry = self._entries.get(key)
+    return default if entry is None else entry[0]
+
+  def put(self, key, value, size):
+    """ Stores a value, evicting old entries while a limit is exceeded.
+        A value larger than the whole memory limit is not stored.
+
+    Args:
+        key (Hashable): The key to store the value under.
+        value (object): The value.
+        size (int): The size of the value in bytes.
+    """
+    self.discard(key)
+    if size > self.max_bytes:
+      return
+    self._entries[key] = (value, size)
+    self.nbytes += size
+    while self.nbytes > self.max_bytes or (
+        self.max_entries is not None and len(self) > self.max_entries):
+      _, (_, evicted_size) = self._entries.popitem(last=False)
+      self.nbytes -= evicted_size
+      self.evictions += 1
+
+  def discard(self, key):
+    """ Removes the entry of the key if there is one.
+
+    Args:
+        key (Hashable): The key to remove.
+    """
+    if key in self._entries:
+      self.nbytes -= self._entries.pop(key)[1]
+
+  def clear(self):
+    """ Removes all entries. """
+    self._entries.clear()
+    self.nbytes = 0
+
+  def stats(self):
+    """ Returns the usage statistics of the cache.
+
+    Returns:
+        dict: The numbers of hits, misses and evictions, the hit rate, and
+            the current number of entries and their size in bytes.
+    """
+    lookups = self.hits + self.misses
+    return {
+      'hits': self.hits,
+      'misses': self.misses,
+      'evictions': self.evictions,
+      'hit_rate': self.hits / lookups if lookups else 0.0,
+      'entries': len(self),
+      'nbytes': self.nbytes,
+    }
+
+
+class SampleCache:
+  """ Caches samples of expressions split into tiles of the x axis, so that
+      panning and zooming evaluate only the part of the view that was not
+      visible before.
+
+      Each tile starts as a piece of a uniform grid whose step is a power of
+      two, so views at a similar zoom share their points exactly, and then
+      collects the points added when the curve is refined.
+  """
+
+  def __init__(self, max_bytes=SAMPLE_CACHE_BYTES, tile_points=TILE_POINTS):
+    """ Initializes an empty cache.
+
+    Args:
+        max_bytes (int): The memory limit for the cached samples.
+        tile_points (int): The number of grid points in one tile.
+    """
+    self.tiles = LRUCache(max_bytes)
+    self.tile_points = tile_points
+
+  def grid_level(self, x_min, x_max, points):
+    """ Returns the level of the grid used for a range: its step is two to
+        the power of the level.
+
+    Args:
+        x_min (float): The left end of the range.
+        x_max (float): The right end of the range.
+        points (int): The minimal number of grid intervals in the range.
+    """
+    return math.floor(math.log2(max(x_max - x_min, 1e-300) / points))
+
+  def samples(self, function, expression, level, x_min, x_max):
+    """ Returns the known samples of a function around [x_min, x_max],
+        evaluating the grid of the tiles that are not cached yet.
+
+    Args:
+        function (Callable[[numpy.ndarray], numpy.ndarray]): Vectorized
+            function of the expression.
+        expression (str): The expression, used as the cache key.
+        level (int): The grid level returned by grid_level().
+        x_min (float): The left end of the range.
+        x_max (float): The right end of the range.
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray]: The sorted sample points from
+            the last one before x_min to the first one after x_max, and the
+            values.
+    """
+    step = 2.0 ** level
+    tile_width = step * self.tile_points
+    indices = range(math.floor((x_min - step) / tile_width),
+                    math.floor((x_max + step) / tile_width) + 1)
+    keys = [(expression, level, index) for index in indices]
+    tiles = [self.tiles.get(key) for key in keys]
+
+    missing = [i for i, tile in enumerate(tiles) if tile is None]
+    if missing:
+      x_grid = [(indices[i] * self.tile_points +
+                 np.arange(self.tile_points)) * step for i in missing]
+      values = np.split(function(np.concatenate(x_grid)), len(missing))
+      for i, x_coord, y_coord in zip(missing, x_grid, values):
+        tiles[i] = (x_coord, y_coord.copy())
+        self.tiles.put(keys[i], tiles[i], 2 * x_coord.nbytes)
+
+    x_coord = np.concatenate([tile[0] for tile in tiles])
+    y_coord = np.concatenate([tile[1] for tile in tiles])
+    first = max(np.searchsorted(x_coord, x_min, side='right') - 1, 0)
+    last = np.searchsorted(x_coord, x_max, side='left') + 1
+    return x_coord[first:last], y_coord[first:last]
+
+  def update(self, expression, level, x_coord, y_coord):
+    """ Adds evaluated samples to the cached tiles of a grid level.
+
+    Args:
+        expression (str): The expression, used as the cache key.
+        level (int): The grid level passed to samples().
+        x_coord (numpy.ndarray): The new sample points.
+        y_coord (numpy.ndarray): The values at the new sample points.
+    """
+    tile_indices = np.floor(x_coord / (2.0 ** level * self.tile_points))
+    for index in np.unique(tile_indices):
+      key = (expression, level, int(index))
+      # Merging is not a use of the tile, samples() has counted that
+      tile = self.tiles.peek(key)
+      if tile is None:
+        continue
+      mask = tile_indices == index
+      merged_x, unique = np.unique(np.concatenate([tile[0], x_coord[mask]]),
+                                   return_index=True)
+      merged_y = np.concatenate([tile[1], y_coord[mask]])[unique]
+      self.tiles.put(key, (merged_x, merged_y), 2 * merged_x.nbytes)
+
+  def clear(self):
+    """ Removes all cached samples. """
+    self.tiles.clear()
@@ -2,22 +2,406 @@
     This module provides a Calculator class for performing
     arithmetic calculations.
 """
+import abc
 import os
+import math
+import time
 import ctypes
 import ctypes.util
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
 
+import numpy as np
 
-class Calculator:  # pylint: disable=too-few-public-methods
-  """ A simple calculator that can evaluate arithmetic expressions
-        containing numbers, operators, and functions. A class
-        for performing arithmetic calculations using a shared library.
-   """
+# Error codes reported by the shared library (s21::ErrorCode)
+STATUS_OK = 0
+STATUS_SYNTAX_ERROR = 1
+STATUS_DIVISION_BY_ZERO = 2
+STATUS_DOMAIN_ERROR = 3
+STATUS_OVERFLOW_ERROR = 4
+
+STATUS_MESSAGES = {
+  STATUS_SYNTAX_ERROR: 'syntax error',
+  STATUS_DIVISION_BY_ZERO: 'division by zero',
+  STATUS_DOMAIN_ERROR: 'domain error',
+  STATUS_OVERFLOW_ERROR: 'overflow',
+}
+
+# Flags of interval evaluation, see NumpyExpression.evaluate_interval: the
+# expression may be an error somewhere in the interval, it is an error
+# everywhere in it, or it may jump or have a pole in it
+INTERVAL_MAYBE_UNDEFINED = 1
+INTERVAL_UNDEFINED = 2
+INTERVAL_MAYBE_DISCONTINUOUS = 4
+
+# Stages measured by the native profiler, in the order of s21::Stage
+NATIVE_STAGES = ('compile', 'evaluate', 'format')
+# Stages of Calculator.calculate measured in Python; 'call' is the whole
+# foreign call including the native stages
+PYTHON_STAGES = ('encode', 'buffer', 'call', 'decode')
+
+# Smallest number of points worth sending to another process
+SHARD_MIN_POINTS = 100_000
+# Number of shards per process, so that faster workers take more of them
+SHARDS_PER_PROCESS = 4
+# Number of expressions a thread of evaluate_concurrent passes to the
+# library at once; the GIL is released for the whole chunk
+CONCURRENT_CHUNK = 4096
+
+# The shared library built by make
+LIBRARY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'libcalculator.dylib')
+# Factories of the evaluation backends by name, see register_backend
+BACKENDS = {}
+# Backend name that chooses the backend by the workload
+AUTO_BACKEND = 'auto'
+# Environment variable with the backend name of new calculators
+BACKEND_VARIABLE = 'SMARTCALC_BACKEND'
+# Smallest array the automatic choice evaluates with NumPy
+NUMPY_MIN_POINTS = 1024
+
+# The expression compiled by a worker of evaluate_parallel
+_worker_expression = None  # pylint: disable=invalid-name
+
+
+class CalculationError(ValueError):
+  """ Raised when an expression cannot be evaluated to a number.
+
+  Attributes:
+      status (int): One of the STATUS_* error codes.
+  """
+
+  def __init__(self, status, expression):
+    super().__init__(
+      f'{STATUS_MESSAGES.get(status, "error")} in {expression!r}')
+    self.status = status
+
+
+def status_message(status):
+  """
+  Describes the result of an evaluation for reports.
+
+  Args:
+      status (int): One of the STATUS_* codes.
+
+  Returns:
+      str: 'ok' or the description of the error.
+  """
+  return 'ok' if status == STATUS_OK else STATUS_MESSAGES.get(status, 'error')
+
+
+def format_result(value):
+  """
+  Formats a numeric result the way the calculator displays it: fixed point
+  with at most 7 decimal places and no trailing zeros.
+
+  Args:
+      value (float): The value to format.
+
+  Returns:
+      str: The formatted value, or 'Error' if it is not finite.
+  """
+  if not math.isfinite(value):
+    return 'Error'
+  return f'{value:.7f}'.rstrip('0').rstrip('.')
+
+
+class CompiledExpression:
+  """ An arithmetic expression that was validated and parsed once by the
+      shared library. Evaluating it for another value of x reuses the
+      parsed program instead of tokenizing the string again.
+  """
+
+  def __init__(self, lib, handle, expression):
+    """ Initializes a new instance of the CompiledExpression class.
+
+    Args:
+        lib (ctypes.CDLL): The loaded calculator library.
+        handle (int): The native handle of the parsed expression or None
+            if the expression is invalid.
+        expression (str): The source expression.
+    """
+    self.lib = lib
+    self.handle = handle
+    self.expression = expression
+    self._intervals = None
+
+  @property
+  def is_valid(self):
+    """ bool: Whether the expression was compiled successfully. """
+    return bool(self.handle)
+
+  def evaluate(self, x_value=0.0):
+    """
+    Evaluates the compiled expression for the given value of x.
+
+    Args:
+        x_value (float): The value substituted for the variable x.
+
+    Returns:
+        str: The result formatted like Calculator.calculate, or 'Error'.
+    """
+    if not self.handle:
+      return 'Error'
+    result_buf = ctypes.create_string_buffer(256)
+    self.lib.EvaluateExpressionWrapper(result_buf, self.handle,
+                                       float(x_value))
+    return result_buf.value.decode('ascii')
+
+  def evaluate_value(self, x_value=0.0):
+    """
+    Evaluates the compiled expression for the given value of x without
+    formatting the result.
+
+    Args:
+        x_value (float): The value substituted for the variable x.
+
+    Returns:
+        float: The result with full double precision.
+
+    Raises:
+        CalculationError: If the expression cannot be evaluated.
+    """
+    if not self.handle:
+      raise CalculationError(STATUS_SYNTAX_ERROR, self.expression)
+    error = ctypes.c_int()
+    value = self.lib.EvaluateValueWrapper(self.handle, float(x_value),
+                                          ctypes.byref(error))
+    if error.value != STATUS_OK:
+      raise CalculationError(error.value, self.expression)
+    return value
+
+  def evaluate_array(self, x_values):
+    """
+    Evaluates the compiled expression for every element of an array in a
+    single call to the shared library.
+
+    Args:
+        x_values (numpy.ndarray): The values substituted for x. A
+            contiguous float64 array is passed to the library without
+            copying.
+
+    Returns:
+        numpy.ndarray: The float64 results with the shape of x_values, NaN
+            wherever Calculator.calculate would return 'Error'.
+    """
+    x_array = np.ascontiguousarray(x_values, dtype=np.float64)
+    result = np.empty_like(x_array)
+    if not self.handle:
+      result.fill(np.nan)
+      return result
+    self.lib.EvaluateArrayWrapper(
+      self.handle, x_array.ctypes.data_as(ctypes.POINTER(ctypes.c_double)),
+      result.ctypes.data_as(ctypes.POINTER(ctypes.c_double)), x_array.size)
+    return result
+
+  def evaluate_interval(self, x_low, x_high):
+    """ Bounds the expression on intervals of x like
+        NumpyExpression.evaluate_interval. The library has no interval
+        arithmetic, so the expression is parsed by the NumPy backend at
+        the first call. """
+    if self._intervals is None:
+      self._intervals = create_backend('numpy').compile(self.expression)
+    return self._intervals.evaluate_interval(x_low, x_high)
+
+  def __del__(self):
+    """ Releases the native program. """
+    if self.handle:
+      self.lib.FreeExpressionWrapper(self.handle)
+      self.handle = None
+
+
+def _init_worker(expression, backend):
+  """ Loads the backend and compiles the expression once per worker. """
+  global _worker_expression  # pylint: disable=global-statement
+  _worker_expression = Calculator(backend).compile(expression)
+
+
+def _evaluate_shard(name, size, start, stop):
+  """ Evaluates x[start:stop] of a shared block holding x followed by the
+      results. """
+  block = shared_memory.SharedMemory(name=name)
+  try:
+    data = np.ndarray((2, size), dtype=np.float64, buffer=block.buf)
+    data[1, start:stop] = _worker_expression.evaluate_array(
+      data[0, start:stop])
+    del data
+  finally:
+    block.close()
+
+
+class CalculatorContext:
+  """ A calculator state in the shared library that keeps its buffers
+      between calls. A context must be used by one thread at a time, so
+      every thread that evaluates many expressions should own one.
+  """
+
+  def __init__(self, lib):
+    """ Creates a new context.
 
-  def __init__(self):
-    """Initializes a new instance of the Calculator class."""
-    lib_path = os.path.abspath(
-      os.path.join(os.path.dirname(__file__), '..', 'model',
-                   'libcalculator.dylib'))
+    Args:
+        lib (ctypes.CDLL): The loaded calculator library.
+    """
+    self.lib = lib
+    self.handle = lib.CreateContextWrapper()
+
+  def calculate(self, expression):
+    """
+    Evaluates an arithmetic expression like Calculator.calculate.
+
+    Args:
+        expression (str): The arithmetic expression to evaluate.
+
+    Returns:
+        str: The formatted result, or 'Error'.
+    """
+    result_buf = ctypes.create_string_buffer(256)
+    self.lib.ContextCalculateWrapper(self.handle, result_buf,
+                                     expression.encode('ascii'))
+    return result_buf.value.decode('ascii')
+
+  def calculate_value(self, expression):
+    """
+    Evaluates an arithmetic expression like Calculator.calculate_value.
+
+    Args:
+        expression (str): The arithmetic expression to evaluate.
+
+    Returns:
+        float: The result with full double precision.
+
+    Raises:
+        CalculationError: If the expression cannot be evaluated.
+    """
+    try:
+      expression_str = expression.encode('ascii')
+    except UnicodeEncodeError as error:
+      raise CalculationError(STATUS_SYNTAX_ERROR, expression) from error
+    error = ctypes.c_int()
+    value = self.lib.ContextCalculateValueWrapper(self.handle, expression_str,
+                                                  ctypes.byref(error))
+    if error.value != STATUS_OK:
+      raise CalculationError(error.value, expression)
+    return value
+
+  def __del__(self):
+    """ Releases the native context. """
+    if self.handle:
+      self.lib.DestroyContextWrapper(self.handle)
+      self.handle = None
+
+
+class DispatchingExpression:
+  """ A compiled expression whose arrays may be evaluated by another
+      backend than its single values, as chosen by
+      Calculator.array_backend. The other backend compiles the expression
+      when it is first needed. It has the methods of CompiledExpression.
+
+      The backends round differently, so the same value may differ between
+      array sizes: by a few units in the last place for most expressions,
+      but from the 4th digit on for functions of huge arguments such as
+      sin(x*10^x). Callers that need consistent values across sizes must
+      compile with the backend of the calculator.
+  """
+
+  def __init__(self, compiled, backend, choose_backend):
+    """ Initializes a new instance of the DispatchingExpression class.
+
+    Args:
+        compiled (CompiledExpression): The expression compiled by the
+            backend of the calculator.
+        backend (Backend): The backend of the calculator.
+        choose_backend (Callable[[int], Backend]): Returns the backend for
+            an array of the given size.
+    """
+    self.compiled = compiled
+    self.expression = compiled.expression
+    self.choose_backend = choose_backend
+    self._by_backend = {backend.name: compiled}
+
+  @property
+  def is_valid(self):
+    """ bool: Whether the expression was compiled successfully. """
+    return self.compiled.is_valid
+
+  def evaluate(self, x_value=0.0):
+    """ Evaluates the expression like CompiledExpression.evaluate. """
+    return self.compiled.evaluate(x_value)
+
+  def evaluate_value(self, x_value=0.0):
+    """ Evaluates the expression like CompiledExpression.evaluate_value. """
+    return self.compiled.evaluate_value(x_value)
+
+  def evaluate_array(self, x_values):
+    """ Evaluates the expression like CompiledExpression.evaluate_array,
+        with the backend chosen for the size of the array. """
+    backend = self.choose_backend(np.size(x_values))
+    compiled = self._by_backend.get(backend.name)
+    if compiled is None:
+      compiled = self._by_backend[backend.name] = backend.compile(
+        self.expression)
+    return compiled.evaluate_array(x_values)
+
+  def evaluate_interval(self, x_low, x_high):
+    """ Bounds the expression like CompiledExpression.evaluate_interval,
+        with the NumPy program if arrays have needed it. """
+    compiled = self._by_backend.get('numpy', self.compiled)
+    return compiled.evaluate_interval(x_low, x_high)
+
+
+class Backend(abc.ABC):
+  """ An engine that parses and evaluates expressions for Calculator.
+      Backends are looked up by name in BACKENDS, where register_backend
+      adds them.
+
+  Attributes:
+      name (str): The name the backend is registered under.
+  """
+
+  name = None
+
+  @abc.abstractmethod
+  def calculate(self, expression):
+    """ Evaluates an expression like Calculator.calculate. """
+    raise NotImplementedError
+
+  @abc.abstractmethod
+  def calculate_value(self, expression):
+    """ Evaluates an expression like Calculator.calculate_value. """
+    raise NotImplementedError
+
+  @abc.abstractmethod
+  def compile(self, expression):
+    """ Parses an expression like Calculator.compile; the result has the
+        methods of CompiledExpression. """
+    raise NotImplementedError
+
+  @abc.abstractmethod
+  def calculate_many(self, expressions, x_value=None):
+    """ Evaluates expressions like Calculator.calculate_many. """
+    raise NotImplementedError
+
+  def create_context(self):
+    """ Returns an object with the calculate methods of CalculatorContext
+        for the calling thread. A backend without state serves every
+        thread itself. """
+    return self
+
+
+class NativeBackend(Backend):
+  """ Evaluates expressions with the shared library. """
+
+  name = 'native'
+
+  def __init__(self, lib_path=LIBRARY_PATH):
+    """ Loads the shared library.
+
+    Args:
+        lib_path (str): The path of the library.
+
+    Raises:
+        RuntimeError: If the library is not built.
+    """
     if not os.path.exists(lib_path):
       raise RuntimeError(f'Shared library not found: {lib_path}')
 
@@ -26,6 +410,201 @@ class Calculator:  # pylint: disable=too-few-public-methods
     # We specify that the function takes two arguments char*
     self.lib.CalculateWrapper.argtypes = [ctypes.POINTER(ctypes.c_char),
                                           ctypes.POINTER(ctypes.c_char)]
+    self.lib.CompileExpressionWrapper.argtypes = [ctypes.c_char_p]
+    self.lib.CompileExpressionWrapper.restype = ctypes.c_void_p
+    self.lib.EvaluateExpressionWrapper.argtypes = [
+      ctypes.POINTER(ctypes.c_char), ctypes.c_void_p, ctypes.c_double]
+    self.lib.EvaluateArrayWrapper.argtypes = [
+      ctypes.c_void_p, ctypes.POINTER(ctypes.c_double),
+      ctypes.POINTER(ctypes.c_double), ctypes.c_size_t]
+    self.lib.FreeExpressionWrapper.argtypes = [ctypes.c_void_p]
+    self.lib.CalculateValueWrapper.argtypes = [ctypes.c_char_p,
+                                               ctypes.POINTER(ctypes.c_int)]
+    self.lib.CalculateValueWrapper.restype = ctypes.c_double
+    self.lib.EvaluateValueWrapper.argtypes = [
+      ctypes.c_void_p, ctypes.c_double, ctypes.POINTER(ctypes.c_int)]
+    self.lib.EvaluateValueWrapper.restype = ctypes.c_double
+    self.lib.CalculateManyWrapper.argtypes = [
+      ctypes.c_char_p, ctypes.POINTER(ctypes.c_size_t), ctypes.c_size_t,
+      ctypes.POINTER(ctypes.c_double), ctypes.POINTER(ctypes.c_int)]
+    self.lib.EvaluateManyWrapper.argtypes = [
+      ctypes.c_char_p, ctypes.POINTER(ctypes.c_size_t), ctypes.c_size_t,
+      ctypes.c_double, ctypes.POINTER(ctypes.c_double),
+      ctypes.POINTER(ctypes.c_int)]
+    self.lib.CreateContextWrapper.restype = ctypes.c_void_p
+    self.lib.ContextCalculateWrapper.argtypes = [
+      ctypes.c_void_p, ctypes.POINTER(ctypes.c_char), ctypes.c_char_p]
+    self.lib.ContextCalculateValueWrapper.argtypes = [
+      ctypes.c_void_p, ctypes.c_char_p, ctypes.POINTER(ctypes.c_int)]
+    self.lib.ContextCalculateValueWrapper.restype = ctypes.c_double
+    self.lib.DestroyContextWrapper.argtypes = [ctypes.c_void_p]
+    self.lib.SetProfilingWrapper.argtypes = [ctypes.c_int]
+    self.lib.ReadProfileWrapper.argtypes = [ctypes.POINTER(ctypes.c_uint64),
+                                            ctypes.POINTER(ctypes.c_uint64)]
+
+  def calculate(self, expression):
+    """ Evaluates an expression like Calculator.calculate. """
+    # The string must be converted to an array of bytes.
+    # Then a b'\0' is appended to the end of the byte sequence
+    # to indicate the end of the string
+    expression_str = expression.encode('ascii') + b'\0'
+    # A 256 byte buffer is created in the method.
+    result_buf = ctypes.create_string_buffer(256)
+    self.lib.CalculateWrapper(result_buf, expression_str)
+    # The resulting byte array is reduced to a string.
+    result = result_buf.value.decode('ascii')
+    return result
+
+  def calculate_value(self, expression):
+    """ Evaluates an expression like Calculator.calculate_value. """
+    try:
+      expression_str = expression.encode('ascii')
+    except UnicodeEncodeError as error:
+      raise CalculationError(STATUS_SYNTAX_ERROR, expression) from error
+    error = ctypes.c_int()
+    value = self.lib.CalculateValueWrapper(expression_str, ctypes.byref(error))
+    if error.value != STATUS_OK:
+      raise CalculationError(error.value, expression)
+    return value
+
+  def compile(self, expression):
+    """ Parses an expression like Calculator.compile. """
+    try:
+      expression_str = expression.encode('ascii')
+    except UnicodeEncodeError:
+      return CompiledExpression(self.lib, None, expression)
+    handle = self.lib.CompileExpressionWrapper(expression_str)
+    return CompiledExpression(self.lib, handle, expression)
+
+  def calculate_many(self, expressions, x_value=None):
+    """ Evaluates expressions like Calculator.calculate_many. """
+    encoded = [expression.encode('ascii', errors='replace')
+               for expression in expressions]
+    count = len(encoded)
+    offsets = np.zeros(count + 1, dtype=np.uintp)
+    np.cumsum(np.fromiter(map(len, encoded), dtype=np.uintp, count=count),
+              out=offsets[1:])
+    results = np.empty(count, dtype=np.float64)
+    statuses = np.empty(count, dtype=np.int32)
+    arguments = (b''.join(encoded),
+                 offsets.ctypes.data_as(ctypes.POINTER(ctypes.c_size_t)),
+                 count)
+    outputs = (results.ctypes.data_as(ctypes.POINTER(ctypes.c_double)),
+               statuses.ctypes.data_as(ctypes.POINTER(ctypes.c_int)))
+    if x_value is None:
+      self.lib.CalculateManyWrapper(*arguments, *outputs)
+    else:
+      self.lib.EvaluateManyWrapper(*arguments, float(x_value), *outputs)
+    return results, statuses
+
+  def create_context(self):
+    """ Creates a native calculator context for the calling thread. """
+    return CalculatorContext(self.lib)
+
+
+def _create_numpy_backend():
+  """ Creates the NumPy backend, whose module imports this one. """
+  # pylint: disable=import-outside-toplevel, import-error
+  from model.numpy_backend import NumpyBackend
+  return NumpyBackend()
+
+
+def register_backend(name, factory):
+  """
+  Makes a backend available to calculators under a name.
+
+  Args:
+      name (str): The name of the backend, replacing any backend
+          registered under it before.
+      factory (Callable[[], Backend]): Creates the backend for a
+          calculator, raising RuntimeError if it cannot work here.
+  """
+  BACKENDS[name] = factory
+
+
+def create_backend(name):
+  """
+  Creates a registered backend.
+
+  Args:
+      name (str): The name of the backend.
+
+  Returns:
+      Backend: The new backend.
+
+  Raises:
+      ValueError: If no backend is registered under the name.
+      RuntimeError: If the backend cannot work here.
+  """
+  if name not in BACKENDS:
+    raise ValueError(f'unknown backend {name!r}, expected one of '
+                     f'{", ".join([AUTO_BACKEND, *BACKENDS])}')
+  return BACKENDS[name]()
+
+
+register_backend(NativeBackend.name, NativeBackend)
+register_backend('numpy', _create_numpy_backend)
+
+
+class Calculator:
+  """ A simple calculator that can evaluate arithmetic expressions
+        containing numbers, operators, and functions. A class
+        for performing arithmetic calculations using a shared library
+        or, where it is not built, NumPy.
+   """
+
+  def __init__(self, backend=None):
+    """Initializes a new instance of the Calculator class.
+
+    Args:
+        backend (str, optional): The name of the backend in BACKENDS that
+            does all the work. Defaults to the environment variable
+            SMARTCALC_BACKEND, or else AUTO_BACKEND: the shared library
+            if it is built, with arrays of at least NUMPY_MIN_POINTS
+            values evaluated by NumPy, and NumPy otherwise.
+
+    Raises:
+        ValueError: If the backend is unknown.
+        RuntimeError: If the backend cannot work here.
+    """
+    self.backend_name = backend or os.environ.get(BACKEND_VARIABLE) or \
+      AUTO_BACKEND
+    if self.backend_name != AUTO_BACKEND:
+      self.backend = create_backend(self.backend_name)
+    else:
+      try:
+        self.backend = create_backend(NativeBackend.name)
+      except RuntimeError:
+        self.backend = create_backend('numpy')
+    # The library of the native backend, whose stages are profiled
+    self.lib = getattr(self.backend, 'lib', None)
+    self._array_backend = None
+
+    self.profiling = False
+    self._timings = {stage: [0, 0] for stage in PYTHON_STAGES}
+
+  def array_backend(self, size):
+    """
+    Chooses the backend for evaluating an expression on an array.
+
+    Args:
+        size (int): The number of values in the array.
+
+    Returns:
+        Backend: NumPy for large arrays when the backend is chosen
+            automatically, else the backend of the calculator.
+    """
+    if self.backend_name != AUTO_BACKEND or size < NUMPY_MIN_POINTS or \
+        self.lib is None:
+      return self.backend
+    return self._numpy_backend()
+
+  def _numpy_backend(self):
+    """ Returns the NumPy backend used besides the backend of the
+        calculator, creating it at the first call. """
+    if self._array_backend is None:
+      self._array_backend = create_backend('numpy')
+    return self._array_backend
 
   def calculate(self, expression):
     """
@@ -37,13 +616,248 @@ class Calculator:  # pylint: disable=too-few-public-methods
     Returns:
         str: The result of the arithmetic expression as a string.
     """
-    # The string must be converted to an array of bytes.
-    # Then a b'\0' is appended to the end of the byte sequence
-    # to indicate the end of the string
+    if self.profiling and self.lib is not None:
+      return self._calculate_profiled(expression)
+    return self.backend.calculate(expression)
+
+  def _calculate_profiled(self, expression):
+    """ Does the work of calculate, timing every step. """
+    start = time.perf_counter_ns()
     expression_str = expression.encode('ascii') + b'\0'
-    # A 256 byte buffer is created in the method.
+    encoded = time.perf_counter_ns()
     result_buf = ctypes.create_string_buffer(256)
+    buffered = time.perf_counter_ns()
     self.lib.CalculateWrapper(result_buf, expression_str)
-    # The resulting byte array is reduced to a string.
+    called = time.perf_counter_ns()
     result = result_buf.value.decode('ascii')
+    decoded = time.perf_counter_ns()
+    for stage, elapsed in zip(PYTHON_STAGES, (encoded - start,
+                                              buffered - encoded,
+                                              called - buffered,
+                                              decoded - called)):
+      self._timings[stage][0] += 1
+      self._timings[stage][1] += elapsed
+    return result
+
+  def set_profiling(self, enabled=True):
+    """
+    Switches the recording of call counts and times on or off. The native
+    stages are counted for all calculators of the process, the Python
+    stages of calculate only for this one. Only the native backend is
+    profiled.
+
+    Args:
+        enabled (bool): Whether to record the timings.
+    """
+    self.profiling = enabled
+    if self.lib is not None:
+      self.lib.SetProfilingWrapper(int(enabled))
+
+  def stats(self):
+    """
+    Returns a snapshot of the recorded timings.
+
+    Returns:
+        dict[str, dict[str, int]]: The number of calls and the cumulative
+            nanoseconds ('calls' and 'ns') of every native stage in
+            NATIVE_STAGES and of every Python stage in PYTHON_STAGES, the
+            latter prefixed with 'python_'.
+    """
+    calls = (ctypes.c_uint64 * len(NATIVE_STAGES))()
+    nanoseconds = (ctypes.c_uint64 * len(NATIVE_STAGES))()
+    if self.lib is not None:
+      self.lib.ReadProfileWrapper(calls, nanoseconds)
+    stats = {stage: {'calls': calls[i], 'ns': nanoseconds[i]}
+             for i, stage in enumerate(NATIVE_STAGES)}
+    for stage, (count, elapsed) in self._timings.items():
+      stats[f'python_{stage}'] = {'calls': count, 'ns': elapsed}
+    return stats
+
+  def reset_stats(self):
+    """ Sets all recorded timings to zero. """
+    if self.lib is not None:
+      self.lib.ResetProfileWrapper()
+    self._timings = {stage: [0, 0] for stage in PYTHON_STAGES}
+
+  def calculate_value(self, expression):
+    """
+    Evaluates an arithmetic expression and returns the result as a number,
+    skipping the formatting and parsing of the string result.
+
+    Args:
+        expression (str): The arithmetic expression to evaluate.
+
+    Returns:
+        float: The result with full double precision.
+
+    Raises:
+        CalculationError: If the expression cannot be evaluated; its status
+            tells a syntax error from a division by zero or a domain error.
+    """
+    return self.backend.calculate_value(expression)
+
+  def create_context(self):
+    """
+    Creates a calculator context for the calling thread.
+
+    Returns:
+        CalculatorContext: The new context, or an object with its methods
+            for backends other than the native one.
+    """
+    return self.backend.create_context()
+
+  def compile(self, expression):
+    """
+    Validates and parses an expression once so that it can be evaluated
+    repeatedly. The expression may contain the variable x.
+
+    Args:
+        expression (str): The arithmetic expression to compile.
+
+    Returns:
+        CompiledExpression: The parsed expression. If the expression is
+            invalid, its evaluate method always returns 'Error'. With
+            the automatic choice it is a DispatchingExpression that
+            evaluates large arrays with NumPy.
+    """
+    compiled = self.backend.compile(expression)
+    if self.array_backend(NUMPY_MIN_POINTS) is self.backend:
+      return compiled
+    return DispatchingExpression(compiled, self.backend, self.array_backend)
+
+  def compile_surface(self, expression):
+    """
+    Validates and parses an expression of the variables x and y once so
+    that it can be evaluated on grids. The shared library knows only x, so
+    backends without grids leave them to NumPy.
+
+    Args:
+        expression (str): The arithmetic expression to compile.
+
+    Returns:
+        SurfaceExpression: The parsed expression. If the expression is
+            invalid, its grids are NaN.
+    """
+    backend = self.backend if hasattr(self.backend, 'compile_surface') \
+      else self._numpy_backend()
+    return backend.compile_surface(expression)
+
+  def evaluate_array(self, expression, x_values):
+    """
+    Evaluates an expression containing the variable x for every element
+    of an array.
+
+    Args:
+        expression (str): The arithmetic expression to evaluate.
+        x_values (numpy.ndarray): The values substituted for x.
+
+    Returns:
+        numpy.ndarray: The float64 results, NaN where the expression
+            cannot be evaluated.
+    """
+    return self.array_backend(np.size(x_values)).compile(
+      expression).evaluate_array(x_values)
+
+  def calculate_many(self, expressions, x_value=None):
+    """
+    Evaluates a sequence of independent expressions with a single call to
+    the shared library. The expressions are packed into one buffer with an
+    array of offsets instead of crossing into the library once for each.
+    Other backends evaluate them one by one.
+
+    Args:
+        expressions (Iterable[str]): The arithmetic expressions.
+        x_value (float, optional): The value of the variable x. If it is
+            None, expressions containing x are syntax errors.
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray]: The float64 results (NaN on
+            error) and the int32 STATUS_* codes of the expressions.
+    """
+    return self.backend.calculate_many(expressions, x_value)
+
+  def evaluate_parallel(self, expression, x_values, processes=None):
+    """
+    Evaluates an expression containing the variable x for a large array
+    using several processes. Every worker loads the backend and compiles
+    the expression once, and the values are exchanged through shared
+    memory instead of being pickled.
+
+    Args:
+        expression (str): The arithmetic expression to evaluate.
+        x_values (numpy.ndarray): The values substituted for x.
+        processes (int, optional): The number of worker processes.
+            Defaults to the number of CPUs.
+
+    Returns:
+        numpy.ndarray: The float64 results with the shape of x_values, NaN
+            where the expression cannot be evaluated.
+    """
+    x_array = np.asarray(x_values, dtype=np.float64)
+    size = x_array.size
+    processes = min(processes or os.cpu_count() or 1,
+                    size // SHARD_MIN_POINTS)
+    if processes <= 1:
+      return self.evaluate_array(expression, x_array)
+
+    block = shared_memory.SharedMemory(create=True, size=2 * x_array.nbytes)
+    try:
+      data = np.ndarray((2, size), dtype=np.float64, buffer=block.buf)
+      data[0] = x_array.ravel()
+      bounds = np.linspace(0, size, processes * SHARDS_PER_PROCESS + 1,
+                           dtype=np.intp)
+      with ProcessPoolExecutor(
+          processes, initializer=_init_worker,
+          initargs=(expression, self.backend_name)) as pool:
+        # Consuming the results re-raises errors of the workers
+        list(pool.map(_evaluate_shard, [block.name] * (bounds.size - 1),
+                      [size] * (bounds.size - 1), bounds[:-1], bounds[1:]))
+      result = data[1].reshape(x_array.shape).copy()
+      del data
+    finally:
+      block.close()
+      block.unlink()
     return result
+
+  def evaluate_concurrent(self, expressions, workers=None,
+                          chunk_size=CONCURRENT_CHUNK, x_value=None):
+    """
+    Evaluates a sequence of independent expressions like calculate_many,
+    spreading chunks of them over a thread pool.
+
+    Every thread evaluates its chunks with its own native calculator
+    context, compiled programs are never shared, and the library keeps no
+    global state, so the threads do not race with each other or with
+    other callers. The GIL is released while a chunk is evaluated.
+
+    Args:
+        expressions (Iterable[str]): The arithmetic expressions.
+        workers (int, optional): The number of threads. Defaults to the
+            number of CPUs.
+        chunk_size (int): The number of expressions per library call.
+        x_value (float, optional): The value of the variable x, as in
+            calculate_many.
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray]: The float64 results (NaN on
+            error) and the int32 STATUS_* codes, in the input order.
+    """
+    expressions = list(expressions)
+    count = len(expressions)
+    workers = min(workers or os.cpu_count() or 1,
+                  -(-count // chunk_size))
+    if workers <= 1:
+      return self.calculate_many(expressions, x_value)
+
+    results = np.empty(count, dtype=np.float64)
+    statuses = np.empty(count, dtype=np.int32)
+
+    def evaluate_chunk(start):
+      stop = start + chunk_size
+      results[start:stop], statuses[start:stop] = self.calculate_many(
+        expressions[start:stop], x_value)
+
+    with ThreadPoolExecutor(workers) as pool:
+      # Consuming the results re-raises errors of the threads
+      list(pool.map(evaluate_chunk, range(0, count, chunk_size)))
+    return results, statuses
@@ -0,0 +1,165 @@
+"""
+    This module provides an on-disk store of the calculation history.
+"""
+import sqlite3
+
+# Largest number of entries returned by a search
+SEARCH_LIMIT = 1000
+# Shortest text the trigram index can look up
+TRIGRAM_LENGTH = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (id INTEGER PRIMARY KEY, entry TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS history_entry ON history (entry);
+"""
+_TEXT_INDEX = """
+CREATE VIRTUAL TABLE IF NOT EXISTS history_text USING fts5(
+  entry, content='history', content_rowid='id',
+  tokenize='trigram case_sensitive 1');
+"""
+
+
+class HistoryStore:
+  """ An append-only list of history entries kept in an SQLite database.
+
+  Every entry is committed as soon as it is appended, so the history
+  survives a crash of the application. Entries are never removed one by
+  one, which keeps the row ids contiguous: the entry at position i has the
+  id i + 1, and any range of positions is read through the primary key
+  without scanning the entries before it.
+
+  Substring search uses a trigram index, which is brought up to date by
+  the first search after new entries: merging its segments can take a
+  noticeable time, which appending an entry must not.
+
+  Several stores may use the same file: the ids are assigned by SQLite
+  while the database is locked for writing, and the number of entries is
+  read from the database rather than remembered.
+  """
+
+  def __init__(self, path=':memory:'):
+    """ Opens the store, creating the database if necessary.
+
+    Args:
+        path (str): The database file, or ':memory:' for a store that is
+            not saved.
+    """
+    self.connection = sqlite3.connect(path)
+    # The write-ahead log makes every append a short sequential write
+    self.connection.execute('PRAGMA journal_mode=WAL')
+    self.connection.execute('PRAGMA synchronous=NORMAL')
+    self.connection.executescript(_SCHEMA)
+    try:
+      self.connection.executescript(_TEXT_INDEX)
+      self._text_index = True
+    except sqlite3.OperationalError:
+      # SQLite before 3.34 has no trigram tokenizer; substring search then
+      # scans the entries
+      self._text_index = False
+
+  def __len__(self):
+    # The largest id is read through the primary key without a scan
+    return self.connection.execute(
+      'SELECT coalesce(max(id), 0) FROM history').fetchone()[0]
+
+  def append(self, entry):
+    """ Adds an entry to the end of the history and saves it.
+
+    Args:
+        entry (str): The entry to add.
+
+    Returns:
+        int: The position of the entry.
+    """
+    return self.extend([entry])
+
+  def extend(self, entries):
+    """ Adds several entries with a single transaction.
+
+    Args:
+        entries (Iterable[str]): The entries to add.
+
+    Returns:
+        int: The position of the last entry added.
+    """
+    with self.connection:
+      # Another store on the same file cannot append until the commit, so
+      # the entries get consecutive ids after the last one
+      self.connection.execute('BEGIN IMMEDIATE')
+      self.connection.executemany('INSERT INTO history (entry) VALUES (?)',
+                                  ((entry,) for entry in entries))
+      count = len(self)
+    return count - 1
+
+  def rows(self, start, count):
+    """ Reads consecutive entries.
+
+    Args:
+        start (int): The position of the first entry.
+        count (int): The number of entries to read.
+
+    Returns:
+        list[str]: The entries, fewer than count at the end of the history.
+    """
+    return [row[0] for row in self.connection.execute(
+      'SELECT entry FROM history WHERE id > ? AND id <= ? ORDER BY id',
+      (start, start + count))]
+
+  def search(self, text, prefix=False, limit=SEARCH_LIMIT):
+    """ Finds the entries that start with or contain a text, case
+        sensitively.
+
+    Args:
+        text (str): The text to look for.
+        prefix (bool): Whether the entries must start with the text.
+        limit (int): The largest number of entries to return.
+
+    Returns:
+        list[tuple[int, str]]: The positions and the entries, oldest first.
+    """
+    if not text:
+      query, arguments = 'SELECT id, entry FROM history', ()
+    elif prefix:
+      # A range of the index instead of LIKE, which ignores the index for
+      # case sensitive comparisons
+      query = 'SELECT id, entry FROM history WHERE entry >= ? AND entry < ?'
+      arguments = (text, text[:-1] + chr(ord(text[-1]) + 1))
+    elif self._text_index and len(text) >= TRIGRAM_LENGTH:
+      self._update_text_index()
+      query = ('SELECT rowid, entry FROM history_text '
+               'WHERE history_text MATCH ?')
+      arguments = ('"' + text.replace('"', '""') + '"',)
+    else:
+      query = 'SELECT id, entry FROM history WHERE instr(entry, ?) > 0'
+      arguments = (text,)
+    return [(row_id - 1, entry) for row_id, entry in self.connection.execute(
+      f'SELECT * FROM ({query}) ORDER BY 1 LIMIT ?', (*arguments, limit))]
+
+  def _update_text_index(self):
+    """ Adds the entries appended since the last search to the trigram
+        index. Indexing them with one statement is several times faster
+        than indexing them one by one. """
+    if self._indexed() < len(self):
+      with self.connection:
+        # The index may have been updated by another store meanwhile
+        self.connection.execute('BEGIN IMMEDIATE')
+        self.connection.execute(
+          'INSERT INTO history_text (rowid, entry) '
+          'SELECT id, entry FROM history WHERE id > ?', (self._indexed(),))
+
+  def _indexed(self):
+    """ Returns the number of entries in the trigram index. """
+    return self.connection.execute(
+      'SELECT coalesce(max(id), 0) FROM history_text_docsize').fetchone()[0]
+
+  def clear(self):
+    """ Removes all entries. """
+    with self.connection:
+      self.connection.execute('DELETE FROM history')
+      if self._text_index:
+        self.connection.execute(
+          "INSERT INTO history_text (history_text) VALUES ('delete-all')")
+
+  def close(self):
+    """ Closes the database. """
+    self.connection.close()
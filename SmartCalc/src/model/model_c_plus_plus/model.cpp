@@ -1,92 +1,171 @@
 #include "model.hpp"
 
-#include <iostream>
 #include <locale>
 
 namespace s21 {
-void SmartCalculator::Calculate(std::string &result_str,
-                                const std::string &str) {
-  std::locale::global(std::locale("C"));
-  result_str = str;
-  try {
-    CheckInput(result_str);
-  } catch (std::invalid_argument const &ex) {
+namespace {
+const double kPi = std::acos(-1);
+
+struct FunctionName {
+  const char *name;
+  char type;
+};
+
+// Допустимые имена и их лексемы ('P' - число Пи, 'E' - *(10)^)
+constexpr FunctionName kNames[] = {
+    {"sin", 's'},  {"cos", 'c'},  {"tan", 't'}, {"asin", 'a'},
+    {"acos", 'x'}, {"atan", 'z'}, {"log", 'l'}, {"ln", 'n'},
+    {"sqrt", 'q'}, {"mod", 'm'},  {"Pi", 'P'},  {"E", 'E'}};
+
+bool IsLetter(char c) {
+  return (c >= 'a' && c <= 'z') || (c >= 'A' && c <= 'Z');
+}
+
+bool IsDigit(char c) { return c >= '0' && c <= '9'; }
+
+bool IsOperator(char c) {
+  return c == '+' || c == '-' || c == '*' || c == '/' || c == '^';
+}
+
+// Заменяет непересекающиеся вхождения слева направо
+void ReplaceAll(std::string &str, const std::string &from,
+                const std::string &to) {
+  for (size_t pos = str.find(from); pos != std::string::npos;
+       pos = str.find(from, pos + to.length())) {
+    str.replace(pos, from.length(), to);
+  }
+}
+}  // namespace
+
+std::atomic<bool> Profiler::enabled_{false};
+std::atomic<uint64_t> Profiler::calls_[kStageCount] = {};
+std::atomic<uint64_t> Profiler::nanoseconds_[kStageCount] = {};
+
+void Profiler::Enable(bool enabled) {
+  enabled_.store(enabled, std::memory_order_relaxed);
+}
+
+bool Profiler::IsEnabled() { return enabled_.load(std::memory_order_relaxed); }
+
+void Profiler::Add(Stage stage, uint64_t calls, uint64_t nanoseconds) {
+  calls_[stage].fetch_add(calls, std::memory_order_relaxed);
+  nanoseconds_[stage].fetch_add(nanoseconds, std::memory_order_relaxed);
+}
+
+// Копирует счетчики всех стадий в массивы из kStageCount элементов
+void Profiler::Read(uint64_t *calls, uint64_t *nanoseconds) {
+  for (int stage = 0; stage < kStageCount; stage++) {
+    calls[stage] = calls_[stage].load(std::memory_order_relaxed);
+    nanoseconds[stage] = nanoseconds_[stage].load(std::memory_order_relaxed);
+  }
+}
+
+void Profiler::Reset() {
+  for (int stage = 0; stage < kStageCount; stage++) {
+    calls_[stage].store(0, std::memory_order_relaxed);
+    nanoseconds_[stage].store(0, std::memory_order_relaxed);
+  }
+}
+
+StageTimer::StageTimer(Stage stage, uint64_t calls)
+    : stage_(stage), calls_(calls), enabled_(Profiler::IsEnabled()) {
+  if (enabled_) {
+    start_ = std::chrono::steady_clock::now();
+  }
+}
+
+StageTimer::~StageTimer() {
+  if (enabled_) {
+    auto elapsed = std::chrono::steady_clock::now() - start_;
+    Profiler::Add(
+        stage_, calls_,
+        std::chrono::duration_cast<std::chrono::nanoseconds>(elapsed).count());
+  }
+}
+
+SmartCalculator::SmartCalculator() { stream_.imbue(std::locale::classic()); }
+
+void SmartCalculator::Calculate(std::string &result_str, std::string_view str) {
+  double result = 0;
+  if (CalculateValue(str, result)) {
     result_str = "Error";
-    return;
+  } else {
+    FixString(result_str, result);
   }
+}
+
+// Вычисляет выражение без переменной, не форматируя результат
+ErrorCode SmartCalculator::CalculateValue(std::string_view str,
+                                          double &result) {
+  return Compile(scratch_, str) ? kSyntaxError : scratch_.Evaluate(0, result);
+}
+
+// Вычисляет выражение с переменной x, равной заданному значению
+ErrorCode SmartCalculator::CalculateValue(std::string_view str, double x,
+                                          double &result) {
+  return Compile(scratch_, str, true) ? kSyntaxError
+                                      : scratch_.Evaluate(x, result);
+}
+
+// Проверяет и разбирает строку один раз, сохраняя программу в ОПН
+bool SmartCalculator::Compile(CompiledExpression &expression,
+                              std::string_view str, bool with_variable) {
+  StageTimer timer(kStageCompile);
+  expression.Clear();
   try {
-    double result = Parser(result_str);
-    FixString(result_str, result);
+    Parser(str, expression, with_variable);
   } catch (...) {
-    result_str = "Error";
-    return;
+    expression.Clear();
+    return true;
   }
+  return false;
 }
 
-double SmartCalculator::Parser(std::string &result_str) {
-  size_t i = 0;
-  bool flag = false;
-  std::stack<Lexsema> numlist;
-  std::stack<Lexsema> operatorlist;
+void SmartCalculator::Parser(std::string_view str,
+                             CompiledExpression &expression,
+                             bool with_variable) {
+  Lexer lexer(str, with_variable);
+  operatorlist_.clear();
   Lexsema leks = {};
-  while (!flag) {
-    if ((result_str[i] >= '0' && result_str[i] <= '9')) {  //  If number
-      AddNumToStack(result_str, i, leks, numlist);
-    } else if (result_str[i] == 'P') {  //  If PI
-      AddPiToStack(i, leks, numlist);
-    } else if (strchr("sctlm", result_str[i]) &&
-               (result_str[i] != '\0')) {  //  If cos/sin/tan/log/mod
-      AddOperatorToStack(result_str, i, leks, operatorlist);
-    } else if (result_str[i] == 'a') {  //  if acos/asin/atan
-      AddAnotherOperatorToStack(result_str, i, leks, operatorlist);
-    } else if (result_str[i] == '(') {  //  If bracket (
-      AddOpeningBracketToStack(result_str, i, leks, operatorlist);
-    } else if (result_str[i] == ')') {  //  If bracket )
-      if (AddClosingBracketToStack(i, operatorlist, numlist)) {
+  while (lexer.Next(leks)) {
+    if (leks.type == '0' || leks.type == 'v') {  //  Number, Pi or x
+      expression.Append(leks);
+    } else if (leks.type == ')') {
+      if (AddClosingBracketToStack(expression)) {
         throw std::invalid_argument("Invalid input: too many closing brackets");
       }
-    } else if ((result_str[i] == '+' || result_str[i] == '-' ||
-                result_str[i] == '*' || result_str[i] == '/' ||
-                result_str[i] == '^')) {
-      if (AddSignToStack(result_str, i, leks, operatorlist, numlist)) {
+    } else if (IsOperator(leks.type)) {
+      if (AddSignToStack(leks, expression)) {
         throw std::invalid_argument(
             "Invalid input: there is incorrect math action");
       }
-    } else if (result_str[i] == '\0') {
-      flag = true;
-    }
-    // if someone try to calculate Error, nan, inf
-    else if ((result_str[i] == 'E' || result_str[i] == 'n' ||
-              result_str[i] == 'i' || result_str[i] == 'x')) {
-      throw std::invalid_argument(
-          "Invalid input: cannot calculate error, NaN, or inf");
-    } else {
-      throw std::invalid_argument("Invalid input: unrecognized character");
+    } else {  //  Bracket (, function or mod
+      operatorlist_.push_back(leks);
     }
   }
-  //  Вызываем матем. функцию до тех пор, пока в стеке с операциями не будет 0
-  //  элементов
-  while (operatorlist.size() != 0) {
-    if (CallMathFun(operatorlist, numlist)) {
+  //  Переносим в программу операции до тех пор, пока в стеке с операциями не
+  //  будет 0 элементов
+  while (!operatorlist_.empty()) {
+    if (CallMathFun(expression)) {
       throw std::invalid_argument(
           "Invalid input: there is incorrect math action");
     }
   }
-  if (numlist.size() != 1) {
+  if (expression.depth_ != 1) {
     throw std::invalid_argument(
         "Invalid input: operation not equal to numbers");
   }
-  return numlist.top().number;
 }
 
 // Делаем красивую строку на выходе (удаляем нули, обрубаем до 7 знаков)
 void SmartCalculator::FixString(std::string &buf, double res_number) {
+  StageTimer timer(kStageFormat);
   if (std::isnan(res_number) || std::isinf(res_number)) {
     buf = "Error";
   } else {
-    std::ostringstream oss;
-    oss << std::fixed << std::setprecision(7) << res_number;
-    buf = oss.str();
+    stream_.str(std::string());
+    stream_ << std::fixed << std::setprecision(7) << res_number;
+    buf = stream_.str();
     size_t dot_pos = buf.find('.');
     if (dot_pos != std::string::npos) {
       size_t last_nonzero_pos = buf.find_last_not_of('0');
@@ -102,119 +181,292 @@ void SmartCalculator::FixString(std::string &buf, double res_number) {
   }
 }
 
-void SmartCalculator::PushNumberPopOperator(std::stack<Lexsema> &stack_n,
-                                            std::stack<Lexsema> &stack_o,
-                                            double num, Lexsema &item) {
-  item.type = '0';
-  item.number = num;
-  stack_n.push(item);
-  if (!stack_o.empty()) {
-    stack_o.pop();
+ErrorCode CompiledExpression::Evaluate(double x, double &result) const {
+  StageTimer timer(kStageEvaluate);
+  return Run(x, result);
+}
+
+ErrorCode CompiledExpression::Run(double x, double &result) const {
+  double inline_stack[kInlineDepth];
+  std::vector<double> heap_stack;
+  double *stack = inline_stack;
+  if (max_depth_ + registers_ > kInlineDepth) {
+    heap_stack.resize(max_depth_ + registers_);
+    stack = heap_stack.data();
+  }
+  double *registers = stack + max_depth_;
+  size_t size = 0;
+  ErrorCode error = program_.empty() ? kSyntaxError : kOk;
+  for (size_t i = 0; i < program_.size() && error == kOk; i++) {
+    if (program_[i].type == '0') {  //  Число
+      stack[size++] = program_[i].number;
+    } else if (program_[i].type == 'v') {  //  Переменная x
+      stack[size++] = x;
+    } else if (program_[i].type == 'r') {  //  Сохраненное значение
+      stack[size++] = registers[static_cast<size_t>(program_[i].number)];
+    } else if (program_[i].type == 'w') {  //  Сохранение вершины стека
+      registers[static_cast<size_t>(program_[i].number)] = stack[size - 1];
+    } else {
+      error = Maths(program_[i].type, stack, size);
+    }
+  }
+  if (error == kOk) {
+    result = stack[0];
+    if (std::isnan(result)) {
+      error = kDomainError;
+    } else if (std::isinf(result)) {
+      error = kOverflowError;
+    }
   }
+  return error;
 }
 
-bool SmartCalculator::Maths(std::stack<Lexsema> &stack_n,
-                            std::stack<Lexsema> &stack_o) {
-  constexpr double kEpsilon = 0.0000001;
-  Lexsema item;
+void CompiledExpression::Clear() {
+  program_.clear();
+  depth_ = 0;
+  max_depth_ = 0;
+  registers_ = 0;
+}
+
+void CompiledExpression::Optimize() {
+  StageTimer timer(kStageCompile, 0);  //  Часть компиляции
+  if (!program_.empty()) {
+    Optimizer(*this).Run();
+  }
+}
+
+// Вычисляет выражение для массива x, ошибки заменяются на NaN
+void CompiledExpression::EvaluateArray(const double *x, double *result,
+                                       size_t size) const {
+  StageTimer timer(kStageEvaluate, size);
+  for (size_t i = 0; i < size; i++) {
+    if (Run(x[i], result[i]) != kOk) {
+      result[i] = std::numeric_limits<double>::quiet_NaN();
+    }
+  }
+}
+
+//  Добавляет лексему в программу, проверяя, что операндов достаточно
+bool CompiledExpression::Append(const Lexsema &leks) {
   bool error = false;
-  double first_number, second_number, result_number;
-  first_number =
-      stack_n.top().number;  //  Берется верхнее число из стека с числами
-  stack_n.pop();  //  Удаляется верхнее число из стека с числами
-  switch (
-      stack_o.top()
-          .type) {  //  Проверяется тип верхней операции из стека с операциями
-    case '+':  //  Если тип верхней операции из стека с операциями сложение
-      second_number = stack_n.top().number;
-      stack_n.pop();
+  if (leks.type == '0' || leks.type == 'v') {
+    depth_++;
+    max_depth_ = std::max(max_depth_, depth_);
+  } else {
+    int arity = GetArity(leks.type);
+    if (arity == 0 || depth_ < static_cast<size_t>(arity)) {
+      error = true;
+    } else {
+      depth_ -= arity - 1;
+    }
+  }
+  if (!error) {
+    program_.push_back(leks);
+  }
+  return error;
+}
+
+// Количество операндов операции (0 - не операция)
+int CompiledExpression::GetArity(char type) const {
+  return type == 's' || type == 'c' || type == 't' || type == 'q' ||
+                 type == 'n' || type == 'l' || type == 'a' || type == 'x' ||
+                 type == 'z'
+             ? 1
+         : type == '+' || type == '-' || type == '*' || type == '/' ||
+                 type == '^' || type == 'm'
+             ? 2
+             : 0;
+}
+
+ErrorCode CompiledExpression::Maths(char type, double *stack,
+                                    size_t &size) const {
+  constexpr double kEpsilon = 0.0000001;
+  ErrorCode error = kOk;
+  double first_number, second_number = 0, result_number = 0;
+  first_number = stack[size - 1];  //  Берется верхнее число из стека
+  if (GetArity(type) == 2) {
+    size--;
+    second_number = stack[size - 1];
+  }
+  switch (type) {  //  Проверяется тип операции
+    case '+':
       result_number = first_number + second_number;
-      PushNumberPopOperator(stack_n, stack_o, result_number, item);
       break;
     case '-':
-      second_number = stack_n.top().number;
-      stack_n.pop();
       result_number = second_number - first_number;
-      PushNumberPopOperator(stack_n, stack_o, result_number, item);
       break;
     case '^':
-      second_number = stack_n.top().number;
-      stack_n.pop();
       result_number = pow(second_number, first_number);
-      PushNumberPopOperator(stack_n, stack_o, result_number, item);
       break;
-
     case '*':
-      second_number = stack_n.top().number;
-      stack_n.pop();
       result_number = first_number * second_number;
-      PushNumberPopOperator(stack_n, stack_o, result_number, item);
       break;
-
     case '/':
-      second_number = stack_n.top().number;
-      stack_n.pop();
       if (first_number == 0) {
-        error = true;
+        error = kDivisionByZero;
       } else {
         result_number = (second_number / first_number);
-        PushNumberPopOperator(stack_n, stack_o, result_number, item);
       }
       break;
     case 's':
       result_number = std::sin(first_number);
-      PushNumberPopOperator(stack_n, stack_o, result_number, item);
       break;
     case 'c':
       result_number = std::cos(first_number);
-      PushNumberPopOperator(stack_n, stack_o, result_number, item);
       break;
     case 't':
       if (fabs(cos(first_number)) <= kEpsilon) {
-        error = true;
+        error = kDomainError;
       } else {
         result_number = std::tan(first_number);
         if (fabs(result_number) <= kEpsilon) result_number = 0;
-        PushNumberPopOperator(stack_n, stack_o, result_number, item);
       }
       break;
     case 'q':
       result_number = std::sqrt(first_number);
-      PushNumberPopOperator(stack_n, stack_o, result_number, item);
       break;
     case 'l':
       result_number = std::log10(first_number);
-      PushNumberPopOperator(stack_n, stack_o, result_number, item);
       break;
     case 'n':
       result_number = std::log(first_number);
-      PushNumberPopOperator(stack_n, stack_o, result_number, item);
       break;
     case 'm':
-      second_number = stack_n.top().number;
-      stack_n.pop();
-      result_number = fmod(second_number, first_number);
-      PushNumberPopOperator(stack_n, stack_o, result_number, item);
+      if (first_number == 0) {
+        error = kDivisionByZero;
+      } else {
+        result_number = fmod(second_number, first_number);
+      }
       break;
     case 'a':
       result_number = std::asin(first_number);
-      PushNumberPopOperator(stack_n, stack_o, result_number, item);
       break;
     case 'x':
       result_number = std::acos(first_number);
-      PushNumberPopOperator(stack_n, stack_o, result_number, item);
       break;
     case 'z':
       result_number = std::atan(first_number);
-      PushNumberPopOperator(stack_n, stack_o, result_number, item);
       break;
     default:
-      error = true;
+      error = kSyntaxError;
       break;
   }
+  stack[size - 1] = result_number;  //  Результат заменяет верхнее число
   return error;
 }
 
+Optimizer::Optimizer(CompiledExpression &expression)
+    : expression_(expression) {}
+
+void Optimizer::Run() {
+  //  Строим граф, выполняя программу над номерами узлов
+  std::vector<int> stack;
+  std::vector<int> saved;
+  for (const Lexsema &leks : expression_.program_) {
+    size_t slot = static_cast<size_t>(leks.number);
+    if (leks.type == '0' || leks.type == 'v') {
+      stack.push_back(Find({leks.type, leks.type == '0' ? leks.number : 0,
+                            -1, -1}));
+    } else if (leks.type == 'r') {
+      stack.push_back(saved[slot]);
+    } else if (leks.type == 'w') {
+      saved.resize(std::max(saved.size(), slot + 1));
+      saved[slot] = stack.back();
+    } else if (expression_.GetArity(leks.type) == 1) {
+      stack.back() = Operation(leks.type, stack.back(), -1);
+    } else {
+      int right = stack.back();
+      stack.pop_back();
+      stack.back() = Operation(leks.type, stack.back(), right);
+    }
+  }
+  int root = stack.back();
+
+  uses_.assign(nodes_.size(), 0);
+  CountUses(root);
+  registers_.assign(nodes_.size(), -1);
+  int registers = 0;
+  for (size_t i = 0; i < nodes_.size(); i++) {
+    if (uses_[i] > 1 && nodes_[i].left >= 0) {
+      registers_[i] = registers++;
+    }
+  }
+  emitted_.assign(nodes_.size(), false);
+  Emit(root);
+
+  //  Глубина стека новой программы
+  size_t depth = 0, max_depth = 0;
+  for (const Lexsema &leks : program_) {
+    if (leks.type == '0' || leks.type == 'v' || leks.type == 'r') {
+      max_depth = std::max(max_depth, ++depth);
+    } else if (leks.type != 'w') {
+      depth -= expression_.GetArity(leks.type) - 1;
+    }
+  }
+  expression_.program_.swap(program_);
+  expression_.max_depth_ = max_depth;
+  expression_.registers_ = registers;
+}
+
+//  Узел операции: свертка констант или поиск такого же узла
+int Optimizer::Operation(char type, int left, int right) {
+  Node first = nodes_[left];
+  if (first.type == '0' && (right < 0 || nodes_[right].type == '0')) {
+    //  Вычисляется так же, как при выполнении программы; операция с
+    //  ошибкой остается, чтобы ошибка произошла при выполнении
+    double stack[2] = {first.number, right < 0 ? 0 : nodes_[right].number};
+    size_t size = right < 0 ? 1 : 2;
+    if (expression_.Maths(type, stack, size) == kOk) {
+      return Find({'0', stack[0], -1, -1});
+    }
+  }
+  return Find({type, 0, left, right});
+}
+
+//  Возвращает номер узла, добавляя его, если такого еще нет. Сложение и
+//  умножение перестановочны, поэтому a+b и b+a - один узел
+int Optimizer::Find(const Node &node) {
+  uint64_t bits = 0;
+  std::memcpy(&bits, &node.number, sizeof(bits));
+  bool commutative = node.type == '+' || node.type == '*';
+  auto key = std::make_tuple(
+      node.type, bits,
+      commutative ? std::min(node.left, node.right) : node.left,
+      commutative ? std::max(node.left, node.right) : node.right);
+  auto found = index_.find(key);
+  if (found != index_.end()) {
+    return found->second;
+  }
+  nodes_.push_back(node);
+  index_.emplace(key, static_cast<int>(nodes_.size() - 1));
+  return static_cast<int>(nodes_.size() - 1);
+}
+
+void Optimizer::CountUses(int node) {
+  if (uses_[node]++ == 0) {
+    if (nodes_[node].left >= 0) CountUses(nodes_[node].left);
+    if (nodes_[node].right >= 0) CountUses(nodes_[node].right);
+  }
+}
+
+//  Записывает узел в ОПН; повторно используемое значение вычисляется один
+//  раз и затем читается из регистра
+void Optimizer::Emit(int node) {
+  const Node &current = nodes_[node];
+  int slot = registers_[node];
+  if (slot >= 0 && emitted_[node]) {
+    program_.push_back({'r', static_cast<double>(slot)});
+  } else {
+    if (current.left >= 0) Emit(current.left);
+    if (current.right >= 0) Emit(current.right);
+    program_.push_back({current.type, current.number});
+    if (slot >= 0) {
+      program_.push_back({'w', static_cast<double>(slot)});
+      emitted_[node] = true;
+    }
+  }
+}
+
 // Опредение приоритета операций
 int SmartCalculator::GetRang(char Ch) {
   return Ch == 's' || Ch == 'c' || Ch == 't' || Ch == 'q' || Ch == 'n' ||
@@ -226,271 +478,208 @@ int SmartCalculator::GetRang(char Ch) {
                                   : 0;  // unrecognized operator
 }
 
-//  Добавляет знак в стек
-bool SmartCalculator::AddSignToStack(const std::string &str, size_t &i,
-                                     Lexsema &leks,
-                                     std::stack<Lexsema> &operatorlist,
-                                     std::stack<Lexsema> &numlist) {
+//  Добавляет знак в стек, сначала перенося операции с не меньшим приоритетом
+bool SmartCalculator::AddSignToStack(const Lexsema &leks,
+                                     CompiledExpression &expression) {
   bool res = false;
-  if (!operatorlist.empty() &&
-      GetRang(str[i]) <= GetRang(operatorlist.top().type)) {
-    res = CallMathFun(operatorlist, numlist);
-  } else {
-    leks.type = str[i];
-    leks.number = 0;
-    operatorlist.push(leks);
-    i++;
-    if (str[i] == '+' || str[i] == '-') {
-      i++;
-    }
+  while (!res && !operatorlist_.empty() &&
+         GetRang(leks.type) <= GetRang(operatorlist_.back().type)) {
+    res = CallMathFun(expression);
   }
+  operatorlist_.push_back(leks);
   return res;
 }
 
-bool SmartCalculator::CallMathFun(std::stack<Lexsema> &operatorlist,
-                                  std::stack<Lexsema> &numlist) {
-  bool error = false;
-  try {
-    error = Maths(numlist, operatorlist);
-  } catch (...) {
-    error = true;
-  }
+//  Переносит верхнюю операцию из стека в программу
+bool SmartCalculator::CallMathFun(CompiledExpression &expression) {
+  bool error = expression.Append(operatorlist_.back());
+  operatorlist_.pop_back();
   return error;
 }
 
-//  Добавляет число в стек
-void SmartCalculator::AddNumToStack(const std::string &str, size_t &i,
-                                    Lexsema &leks,
-                                    std::stack<Lexsema> &numlist) {
-  double num = GetNum(str, i);
-  leks.type = 0;
-  leks.number = num;
-  numlist.push(leks);
-}
-
-//  Добавляет число Пи в стек
-void SmartCalculator::AddPiToStack(size_t &i, Lexsema &leks,
-                                   std::stack<Lexsema> &numlist) {
-  leks.number = Pi;
-  leks.type = 0;
-  numlist.push(leks);
-  i += 2;
-}
-
-//  Добавляет скобку в стек
-void SmartCalculator::AddOpeningBracketToStack(
-    const std::string &str, size_t &i, Lexsema &leks,
-    std::stack<Lexsema> &operatorlist) {
-  leks.type = str[i];
-  leks.number = 0;
-  operatorlist.push(leks);
-  i++;
-  if (str[i] == '+') {
-    i++;
-  }
-}
-
 //  Обрабатывает действия в скобках
 bool SmartCalculator::AddClosingBracketToStack(
-    size_t &i, std::stack<Lexsema> &operatorlist,
-    std::stack<Lexsema> &numlist) {
+    CompiledExpression &expression) {
   bool res = false;
-  while (!operatorlist.empty() && operatorlist.top().type != '(' &&
+  while (!operatorlist_.empty() && operatorlist_.back().type != '(' &&
          res == false) {
-    if (Maths(numlist, operatorlist)) {  //  Если функция вернет "false", то
-                                         //  прекращаем работу
+    if (CallMathFun(expression)) {  //  Если функция вернет
+                                                  //  "true", то прекращаем
+                                                  //  работу
       res = true;
     }
   }
-  if (res == false) {
-    operatorlist.pop();
+  if (operatorlist_.empty()) {  //  Нет парной открывающей скобки
+    res = true;
+  } else if (res == false) {
+    operatorlist_.pop_back();
   }
-  i++;
   return res;
-  ;
 }
 
-//  Добавляет оператор в стек (cos/sin/tan/log/mod)
-void SmartCalculator::AddOperatorToStack(const std::string &str, size_t &i,
-                                         Lexsema &leks,
-                                         std::stack<Lexsema> &operatorlist) {
-  switch (str[i + 1]) {
-    case 'q':
-      leks.type = 'q';
-      i += 1;
-      break;
-    case 'n':
-      leks.type = 'n';
-      i -= 1;
-      break;
-    default:
-      leks.type = str[i];
-      break;
+Lexer::Lexer(std::string_view str, bool with_variable)
+    : str_(str), with_variable_(with_variable) {
+  if (str.empty() || str.length() > 255) {
+    throw std::invalid_argument("Invalid input");
   }
-  leks.number = 0;
-  operatorlist.push(leks);
-  i += 3;
-}
-
-//  Добавляет оставшиеся операторы(функции) в стек (acos/asin/atan)
-void SmartCalculator::AddAnotherOperatorToStack(
-    const std::string &str, size_t &i, Lexsema &leks,
-    std::stack<Lexsema> &operatorlist) {
-  switch (str[i + 1]) {
-    case 's':
-      leks.type = str[i];  // asin
-      break;
-    case 'c':
-      leks.type = 'x';  // acos
-      break;
-    default:
-      leks.type = 'z';  // atan
-      break;
+  //  Выражение не может начинаться с бинарной операции и заканчиваться
+  //  операцией, скобкой ( или E
+  if (std::strchr("m*/^E", str.front()) ||
+      std::strchr("+-*/^d(E", str.back())) {
+    throw std::invalid_argument("Invalid input");
   }
-  leks.number = 0;
-  operatorlist.push(leks);
-  i += 4;
 }
 
-// Получение числа из строки
-double SmartCalculator::GetNum(const std::string &str, size_t &i) {
-  double res;
-  bool flag = true;
-  std::string lexsema;
-  // Skip leading whitespace
-  while (i < str.length() && std::isspace(str[i])) {
-    i++;
-  }
-  for (size_t j = i; j <= str.length() && flag; j++) {
-    if (j != str.length() &&
-        ((str[j] >= '0' && str[j] <= '9') || str[j] == '.')) {
-      lexsema.push_back(str[j]);
+bool Lexer::Next(Lexsema &leks) {
+  while (pending_begin_ == pending_end_) {
+    if (i_ < str_.length()) {
+      Read();
+    } else if (brackets_ < 0) {
+      throw std::invalid_argument("Invalid input: too many closing brackets");
+    } else if (brackets_ > 0) {  //  Закрываем оставшиеся скобки
+      brackets_--;
+      Push(')');
     } else {
-      flag = false;
+      return false;
     }
-    i = j;
   }
-  // Skip trailing whitespace
-  while (i < str.length() && std::isspace(str[i])) {
-    i++;
-  }
-  try {
-    res = std::stod(lexsema);
-  } catch (const std::invalid_argument &) {
-    // Handle invalid input (e.g. return 0.0)
-    res = 0.0;
-  } catch (const std::out_of_range &) {
-    // Handle out-of-range input (e.g. return infinity)
-    res = std::numeric_limits<double>::infinity();
-  }
-  return res;
+  leks = pending_[pending_begin_++];
+  return true;
 }
 
-// Проверяем строку на корректность и добавляем скобки ')' (если нужно)
-void SmartCalculator::CheckInput(std::string &str) {
-  if (str.length() > 255) {
-    throw std::invalid_argument("Invalid input");
-  }
-  if (!IsFunction(str) || !IsValidExpression(str)) {
-    throw std::invalid_argument("Invalid input");
+void Lexer::Read() {
+  char c = str_[i_];
+  if (IsDigit(c)) {
+    ReadNumber();
+  } else if (c == '+' || c == '-') {
+    ReadSigns();
+  } else if (c == '*' || c == '/' || c == '^') {
+    i_++;
+    PushOperator(c);
+  } else if (c == '(') {
+    i_++;
+    brackets_++;
+    Push(c);
+  } else if (c == ')') {
+    i_++;
+    brackets_--;
+    Push(c);
+  } else if (c == 'x' && with_variable_) {
+    i_++;
+    Push('v');
+  } else if (IsLetter(c)) {
+    ReadName();
+  } else {
+    throw std::invalid_argument("Invalid input: unrecognized character");
   }
-  str = regex_replace(str, std::regex("E"), "*(10)^");
-  int temp = CountBrack(str, '(') - CountBrack(str, ')');
-  if (str.find_last_of("+-*/^d(E") == str.length() - 1 ||
-      str.find_first_of("mE*/") == 0 || temp < 0) {
-    throw std::invalid_argument("Invalid input");
+}
+
+//  Число - цифра, за которой идут цифры и точки; значение имеет самый
+//  длинный корректный префикс ("1.2.3" - это 1.2)
+void Lexer::ReadNumber() {
+  size_t begin = i_;
+  while (i_ < str_.length() && (IsDigit(str_[i_]) || str_[i_] == '.')) {
+    i_++;
   }
-  while (temp != 0) {
-    str += ")";
-    temp--;
+  // Разбор не зависит от локали, поэтому не требует ее установки
+  double value = 0;
+#if defined(__cpp_lib_to_chars)
+  if (std::from_chars(str_.data() + begin, str_.data() + i_, value).ec ==
+      std::errc::result_out_of_range) {
+    value = std::numeric_limits<double>::infinity();
   }
-  ChangeSign(str);
-  if (!IsValidCombOperator(str)) {
-    throw std::invalid_argument("Invalid input");
+#else
+  std::istringstream stream(std::string(str_.substr(begin, i_ - begin)));
+  stream.imbue(std::locale::classic());
+  if (!(stream >> value)) {
+    value = std::numeric_limits<double>::infinity();
   }
+#endif
+  Push('0', value);
 }
 
-// Вспомогательная функция к CheckInput, считает кол-во элементов
-int SmartCalculator::CountBrack(const std::string &str, char bracket) const {
-  return std::count(str.begin(), str.end(), bracket);
+void Lexer::ReadSigns() {
+  size_t begin = i_;
+  while (i_ < str_.length() && (str_[i_] == '+' || str_[i_] == '-')) {
+    i_++;
+  }
+  char sign = FoldSigns(begin, i_);
+  bool after_bracket = previous_ == '(';
+  if (begin == 0 || (after_bracket && sign == '-')) {
+    Push('0');
+  }
+  if (after_bracket && sign == '+') {  //  Плюс после скобки ( пропускается
+    if (after_operator_) {
+      throw std::invalid_argument("Invalid input: two operators in a row");
+    }
+    after_operator_ = true;
+    previous_ = sign;
+  } else {
+    PushOperator(sign);
+  }
 }
 
-// Обработка нескольких знаков
-void SmartCalculator::ChangeSign(std::string &str) {
-  // Replace multiple '-' signs with '+'
-  std::regex minus_regex("\\--");
-  str = std::regex_replace(str, minus_regex, "+");
-
-  // Replace multiple '+' signs with '+'
-  std::regex plus_regex("\\++");
-  str = std::regex_replace(str, plus_regex, "+");
-
-  // Replace '+-' with '-'
-  std::regex plus_minus_regex("\\+-");
-  str = std::regex_replace(str, plus_minus_regex, "-");
-
-  // Replace '-+' with '-'
-  std::regex minus_plus_regex("\\-\\+");
-  str = std::regex_replace(str, minus_plus_regex, "-");
-
-  // Insert '0' after '(' followed by a '-' sign
-  std::regex opening_parenthesis_regex("\\(-");
-  str = std::regex_replace(str, opening_parenthesis_regex, "(0-");
-
-  // Insert '0' at the beginning if the string starts with a sign
-  if (str.size() > 1 && (str[0] == '-' || str[0] == '+')) {
-    str.insert(0, "0");
+//  Имена функций, Pi и E; с переменной x она разделяет имена
+void Lexer::ReadName() {
+  size_t begin = i_;
+  while (i_ < str_.length() && IsLetter(str_[i_]) &&
+         !(with_variable_ && str_[i_] == 'x')) {
+    i_++;
+  }
+  char type = '\0';
+  for (const FunctionName &name : kNames) {
+    if (str_.compare(begin, i_ - begin, name.name) == 0) {
+      type = name.type;
+    }
+  }
+  if (type == '\0') {
+    throw std::invalid_argument("Invalid input: unknown function");
+  } else if (type == 'P') {
+    Push('0', kPi);
+  } else if (type == 'E') {
+    PushOperator('*');
+    Push('(');
+    Push('0', 10);
+    Push(')');
+    PushOperator('^');
+  } else {
+    Push(type);
   }
 }
 
-// Проверка корректности написания функций
-bool SmartCalculator::IsFunction(const std::string &str) {
-  std::set<std::string> validFunctions{"sin",  "cos",  "tan", "asin",
-                                       "acos", "atan", "log", "mod",
-                                       "ln",   "Pi",   "E",   "sqrt"};
-  std::string currentFunction;
-  for (size_t i = 0; i < str.size(); i++) {
-    if (std::isalpha(str[i])) {
-      currentFunction += str[i];
-    } else if (currentFunction.size() > 0) {
-      if (validFunctions.count(currentFunction) == 1) {
-        currentFunction = "";
-      } else {
-        return false;
-      }
-    }
+//  Сворачивает знаки так же, как последовательные замены "--" на "+",
+//  "++" на "+", "+-" на "-" и "-+" на "-"; должен остаться один знак
+char Lexer::FoldSigns(size_t begin, size_t end) const {
+  if (end - begin == 1) {
+    return str_[begin];
   }
-  return true;
+  std::string signs(str_.substr(begin, end - begin));
+  ReplaceAll(signs, "--", "+");
+  signs.erase(std::unique(signs.begin(), signs.end(),
+                          [](char a, char b) { return a == '+' && b == '+'; }),
+              signs.end());
+  ReplaceAll(signs, "+-", "-");
+  ReplaceAll(signs, "-+", "-");
+  if (signs.length() != 1) {
+    throw std::invalid_argument("Invalid input: two operators in a row");
+  }
+  return signs[0];
 }
 
-// Проверка, что нет недопустимых символов в строке
-bool SmartCalculator::IsValidExpression(const std::string &str) {
-  std::string validSymbols = "+-*/^().0123456789";
-  std::string currentFunction;
-  for (const char &c : str) {
-    if (!std::isalpha(c) && (validSymbols.find(c) == std::string::npos)) {
-      return false;
-    }
+void Lexer::Push(char type, double number) {
+  if (pending_begin_ == pending_end_) {
+    pending_begin_ = pending_end_ = 0;
   }
-  return true;
+  pending_[pending_end_++] = {type, number};
+  previous_ = type;
+  after_operator_ = IsOperator(type);
 }
 
-// Проверка на недопустимые комбинации операторов
-bool SmartCalculator::IsValidCombOperator(const std::string &str) {
-  std::string operators = "*/^+-";
-  for (size_t i = 0; i < str.length(); i++) {
-    if (operators.find(str[i]) != std::string::npos) {
-      if (i == 0 || i == str.length() - 1) {
-        // Operator at beginning or end of string
-        return false;
-      } else if (operators.find(str[i - 1]) != std::string::npos ||
-                 operators.find(str[i + 1]) != std::string::npos) {
-        // Two operators in a row
-        return false;
-      }
-    }
+void Lexer::PushOperator(char type) {
+  if (after_operator_) {
+    throw std::invalid_argument("Invalid input: two operators in a row");
   }
-  return true;
+  Push(type);
 }
 
 }  // namespace s21
@@ -2,61 +2,204 @@
 #define SRC_MODEL_MODEL_HPP_
 
 #include <algorithm>
+#include <atomic>
+#include <charconv>
+#include <chrono>
 #include <cmath>
+#include <cstdint>
+#include <cstring>
 #include <iomanip>
-#include <regex>
-#include <set>
+#include <limits>
+#include <map>
 #include <sstream>
-#include <stack>
+#include <string>
+#include <string_view>
+#include <tuple>
+#include <vector>
 
 namespace s21 {
 
-class SmartCalculator {
+// Reason why an expression could not be evaluated
+enum ErrorCode : int {
+  kOk = 0,
+  kSyntaxError = 1,
+  kDivisionByZero = 2,
+  kDomainError = 3,
+  kOverflowError = 4,
+};
+
+// Stages measured by the Profiler
+enum Stage : int {
+  kStageCompile = 0,
+  kStageEvaluate = 1,
+  kStageFormat = 2,
+  kStageCount = 3,
+};
+
+// Optional call counters and cumulative times of the stages, shared by all
+// threads. While it is disabled a measured stage costs one relaxed atomic
+// load.
+class Profiler {
+ public:
+  static void Enable(bool enabled);
+  static bool IsEnabled();
+  static void Add(Stage stage, uint64_t calls, uint64_t nanoseconds);
+  static void Read(uint64_t *calls, uint64_t *nanoseconds);
+  static void Reset();
+
  private:
-  const double Pi = acos(-1);
-  struct Lexsema {
+  static std::atomic<bool> enabled_;
+  static std::atomic<uint64_t> calls_[kStageCount];
+  static std::atomic<uint64_t> nanoseconds_[kStageCount];
+};
+
+// Adds the time until the end of the scope to a stage if profiling is on
+class StageTimer {
+ public:
+  explicit StageTimer(Stage stage, uint64_t calls = 1);
+  ~StageTimer();
+
+ private:
+  Stage stage_;
+  uint64_t calls_;
+  bool enabled_;
+  std::chrono::steady_clock::time_point start_;
+};
+
+struct Lexsema {
+  char type;
+  double number;
+};
+
+class Optimizer;
+
+// An expression that was validated and parsed once into reverse Polish
+// notation. Evaluate() only reads the program, so a single compiled
+// expression can be evaluated for any number of x values.
+class CompiledExpression {
+ public:
+  CompiledExpression() = default;
+  ~CompiledExpression() = default;
+  ErrorCode Evaluate(double x, double &result) const;
+  void EvaluateArray(const double *x, double *result, size_t size) const;
+  // Empties the program, keeping its memory for the next one
+  void Clear();
+  // Rewrites the program for repeated evaluation, see Optimizer
+  void Optimize();
+
+ private:
+  friend class SmartCalculator;
+  friend class Optimizer;
+  // Programs whose stack and registers fit here are evaluated without heap
+  // allocation
+  static constexpr size_t kInlineDepth = 64;
+
+  ErrorCode Run(double x, double &result) const;
+  bool Append(const Lexsema &leks);
+  int GetArity(char type) const;
+  ErrorCode Maths(char type, double *stack, size_t &size) const;
+
+  std::vector<Lexsema> program_;
+  size_t depth_ = 0;
+  size_t max_depth_ = 0;
+  // Values of repeated subexpressions saved by 'w' and loaded by 'r'
+  size_t registers_ = 0;
+};
+
+// Optimization pass over a compiled program. The program is turned into a
+// graph in which equal subexpressions are one node; operations on
+// constants are folded and a subexpression used more than once is computed
+// once and kept in a register. The operations that can fail are evaluated
+// in the original order, so the reported error does not change. Every
+// rewrite gives the same bits as the original program, so powers are left
+// to pow: the library pow is not always correctly rounded, and even a^2
+// may then differ from a*a in the last bit.
+class Optimizer {
+ public:
+  explicit Optimizer(CompiledExpression &expression);
+  ~Optimizer() = default;
+  void Run();
+
+ private:
+  struct Node {
     char type;
     double number;
+    int left;  // Operands, -1 if absent
+    int right;
   };
 
+  int Operation(char type, int left, int right);
+  int Find(const Node &node);
+  void CountUses(int node);
+  void Emit(int node);
+
+  CompiledExpression &expression_;
+  std::vector<Node> nodes_;
+  std::map<std::tuple<char, uint64_t, int, int>, int> index_;
+  std::vector<int> uses_;
+  std::vector<int> registers_;  // -1 for values that are not kept
+  std::vector<bool> emitted_;
+  std::vector<Lexsema> program_;
+};
+
+// Single-pass lexer. Validates the input and yields the tokens of the
+// normalized expression: E expanded to *(10)^, runs of signs folded, a zero
+// inserted before a leading sign or a '-' after '(', missing closing
+// brackets appended. Invalid input throws std::invalid_argument.
+class Lexer {
+ public:
+  Lexer(std::string_view str, bool with_variable);
+  ~Lexer() = default;
+  // Returns false after the last token
+  bool Next(Lexsema &leks);
+
+ private:
+  // Longest sequence of tokens produced by one step (E)
+  static constexpr size_t kMaxPending = 5;
+
+  void Read();
+  void ReadNumber();
+  void ReadSigns();
+  void ReadName();
+  char FoldSigns(size_t begin, size_t end) const;
+  void Push(char type, double number = 0);
+  void PushOperator(char type);
+
+  std::string_view str_;
+  bool with_variable_;
+  size_t i_ = 0;
+  int brackets_ = 0;  // Opening brackets minus closing ones
+  char previous_ = '\0';
+  bool after_operator_ = false;
+  Lexsema pending_[kMaxPending] = {};
+  size_t pending_begin_ = 0;
+  size_t pending_end_ = 0;
+};
+
+// Calculator context. It touches no global state and keeps its buffers
+// between calls, so every thread can own one and use it without locks.
+class SmartCalculator {
  public:
-  SmartCalculator() = default;
+  SmartCalculator();
   ~SmartCalculator() = default;
-  void Calculate(std::string &res, const std::string &str);
+  void Calculate(std::string &res, std::string_view str);
+  ErrorCode CalculateValue(std::string_view str, double &result);
+  ErrorCode CalculateValue(std::string_view str, double x, double &result);
+  bool Compile(CompiledExpression &expression, std::string_view str,
+               bool with_variable = false);
+  void FixString(std::string &buf, double res_number);
 
  private:
-  void AddNumToStack(const std::string &str, size_t &i, Lexsema &leks,
-                     std::stack<Lexsema> &numlist);
-  double GetNum(const std::string &str, size_t &i);
-  bool AddSignToStack(const std::string &str, size_t &i, Lexsema &leks,
-                      std::stack<Lexsema> &operatorlist,
-                      std::stack<Lexsema> &numlist);
+  bool AddSignToStack(const Lexsema &leks, CompiledExpression &expression);
   int GetRang(char Ch);
-  bool CallMathFun(std::stack<Lexsema> &operatorlist,
-                   std::stack<Lexsema> &numlist);
-  bool Maths(std::stack<Lexsema> &stack_n, std::stack<Lexsema> &stack_o);
-  void PushNumberPopOperator(std::stack<Lexsema> &stack_n,
-                             std::stack<Lexsema> &stack_o, double num,
-                             Lexsema &item);
-  void FixString(std::string &buf, double res_number);
-  void AddPiToStack(size_t &i, Lexsema &leks, std::stack<Lexsema> &numlist);
-  void AddOpeningBracketToStack(const std::string &str, size_t &i,
-                                Lexsema &leks,
-                                std::stack<Lexsema> &operatorlist);
-  bool AddClosingBracketToStack(size_t &i, std::stack<Lexsema> &operatorlist,
-                                std::stack<Lexsema> &numlist);
-  void AddAnotherOperatorToStack(const std::string &str, size_t &i,
-                                 Lexsema &leks,
-                                 std::stack<Lexsema> &operatorlist);
-  void AddOperatorToStack(const std::string &str, size_t &i, Lexsema &leks,
-                          std::stack<Lexsema> &operatorlist);
-  void CheckInput(std::string &str);
-  int CountBrack(const std::string &str, char bracket) const;
-  void ChangeSign(std::string &str);
-  double Parser(std::string &result_str);
-  bool IsFunction(const std::string &token);
-  bool IsValidExpression(const std::string &str);
-  bool IsValidCombOperator(const std::string &str);
+  bool CallMathFun(CompiledExpression &expression);
+  bool AddClosingBracketToStack(CompiledExpression &expression);
+  void Parser(std::string_view str, CompiledExpression &expression,
+              bool with_variable);
+
+  std::vector<Lexsema> operatorlist_;
+  CompiledExpression scratch_;
+  std::ostringstream stream_;
 };
 }  // namespace s21
 
@@ -1,5 +1,8 @@
 #include <gtest/gtest.h>
 
+#include <cstring>
+#include <thread>
+
 #include "model.hpp"
 
 TEST(CalculateTest, SimpleAddition) {
@@ -374,6 +377,184 @@ TEST(CalculateTest, AnotherTest27) {
   ASSERT_EQ(result, "Error");
 }
 
+TEST(CompileTest, EvaluateWithVariable) {
+  s21::SmartCalculator calculator;
+  s21::CompiledExpression expression;
+  double result = 0;
+  ASSERT_FALSE(calculator.Compile(expression, "x^2-2*x", true));
+  ASSERT_FALSE(expression.Evaluate(3, result));
+  ASSERT_DOUBLE_EQ(result, 3);
+  ASSERT_FALSE(expression.Evaluate(-1, result));
+  ASSERT_DOUBLE_EQ(result, 3);
+}
+
+TEST(CompileTest, DivisionByZeroAtRuntime) {
+  s21::SmartCalculator calculator;
+  s21::CompiledExpression expression;
+  double result = 0;
+  ASSERT_FALSE(calculator.Compile(expression, "1/x", true));
+  ASSERT_TRUE(expression.Evaluate(0, result));
+}
+
+TEST(CompileTest, ErrorCodes) {
+  s21::SmartCalculator calculator;
+  s21::CompiledExpression expression;
+  double result = 0;
+  ASSERT_FALSE(calculator.Compile(expression, "1/x", true));
+  ASSERT_EQ(expression.Evaluate(0, result), s21::kDivisionByZero);
+  ASSERT_FALSE(calculator.Compile(expression, "sqrt(x)", true));
+  ASSERT_EQ(expression.Evaluate(-1, result), s21::kDomainError);
+  ASSERT_FALSE(calculator.Compile(expression, "10^x", true));
+  ASSERT_EQ(expression.Evaluate(400, result), s21::kOverflowError);
+  ASSERT_EQ(expression.Evaluate(2, result), s21::kOk);
+}
+
+TEST(CompileTest, VariableNotAllowed) {
+  s21::SmartCalculator calculator;
+  s21::CompiledExpression expression;
+  ASSERT_TRUE(calculator.Compile(expression, "x+1"));
+}
+
+TEST(OptimizerTest, SameResults) {
+  const char *expressions[] = {
+      "sin(Pi/4)*x",         "sin(x)^2+sin(x)",   "x^3-2*x^2+x-1",
+      "sqrt(x^2+1)/(x^2+1)", "(x+1)^4-(1+x)^2",   "2E2*xmod7",
+      "x^2.5+x^0+x^1",       "cos(x)*cos(x)^2^2", "ln(x)+log(x)*ln(x)"};
+  const double xs[] = {-2.5, -1, 0, 0.7, 3, 1e3};
+  s21::SmartCalculator calculator;
+  for (const char *expression : expressions) {
+    s21::CompiledExpression plain, optimized;
+    ASSERT_FALSE(calculator.Compile(plain, expression, true));
+    ASSERT_FALSE(calculator.Compile(optimized, expression, true));
+    optimized.Optimize();
+    for (double x : xs) {
+      double expected = 0, value = 0;
+      ASSERT_EQ(optimized.Evaluate(x, value), plain.Evaluate(x, expected))
+          << expression << " at " << x;
+      if (std::isfinite(expected)) {
+        ASSERT_EQ(value, expected) << expression << " at " << x;
+      }
+    }
+  }
+}
+
+TEST(OptimizerTest, SquaresAreSameBits) {
+  //  pow(a, 2) differs from a*a in the last bit for this value with glibc
+  const char *expression = "(((sqrt(1.5))^2)/((x)-((3)mod(x))))^2";
+  s21::SmartCalculator calculator;
+  s21::CompiledExpression plain, optimized;
+  ASSERT_FALSE(calculator.Compile(plain, expression, true));
+  ASSERT_FALSE(calculator.Compile(optimized, expression, true));
+  optimized.Optimize();
+  double expected = 0, value = 0;
+  ASSERT_EQ(plain.Evaluate(7, expected), s21::kOk);
+  ASSERT_EQ(optimized.Evaluate(7, value), s21::kOk);
+  ASSERT_EQ(std::memcmp(&value, &expected, sizeof value), 0);
+}
+
+TEST(OptimizerTest, ErrorsAreKept) {
+  s21::SmartCalculator calculator;
+  s21::CompiledExpression expression;
+  double value = 0;
+  ASSERT_FALSE(calculator.Compile(expression, "x+1/0", true));
+  expression.Optimize();
+  ASSERT_EQ(expression.Evaluate(1, value), s21::kDivisionByZero);
+  ASSERT_FALSE(calculator.Compile(expression, "tan(Pi/2)*x+xmod0", true));
+  expression.Optimize();
+  ASSERT_EQ(expression.Evaluate(1, value), s21::kDomainError);
+  ASSERT_FALSE(calculator.Compile(expression, "1/(x-1)+1/(x-1)", true));
+  expression.Optimize();
+  expression.Optimize();
+  ASSERT_EQ(expression.Evaluate(1, value), s21::kDivisionByZero);
+  ASSERT_EQ(expression.Evaluate(2, value), s21::kOk);
+  ASSERT_DOUBLE_EQ(value, 2);
+  ASSERT_FALSE(calculator.Compile(expression, "ln(0-1)^2*x", true));
+  expression.Optimize();
+  ASSERT_EQ(expression.Evaluate(1, value), s21::kDomainError);
+}
+
+TEST(LexerTest, SignsAreFolded) {
+  s21::SmartCalculator calculator;
+  std::string result;
+  calculator.Calculate(result, "1---2");
+  ASSERT_EQ(result, "-1");
+  calculator.Calculate(result, "-(+-3)");
+  ASSERT_EQ(result, "3");
+  calculator.Calculate(result, "1-+-2");
+  ASSERT_EQ(result, "Error");
+  calculator.Calculate(result, "2*-3");
+  ASSERT_EQ(result, "Error");
+}
+
+TEST(LexerTest, ExponentAndBrackets) {
+  s21::SmartCalculator calculator;
+  std::string result;
+  calculator.Calculate(result, "1.5E2");
+  ASSERT_EQ(result, "150");
+  calculator.Calculate(result, "2E-3");
+  ASSERT_EQ(result, "Error");
+  calculator.Calculate(result, "sqrt(sin(Pi/2");
+  ASSERT_EQ(result, "1");
+  calculator.Calculate(result, "(1+2))");
+  ASSERT_EQ(result, "Error");
+}
+
+TEST(LexerTest, NamesAreValidated) {
+  s21::SmartCalculator calculator;
+  std::string result;
+  calculator.Calculate(result, "sin1+ln(1E1)");
+  ASSERT_EQ(result, "3.1440561");
+  calculator.Calculate(result, "1+sinPi");
+  ASSERT_EQ(result, "Error");
+  calculator.Calculate(result, "1.2.3");
+  ASSERT_EQ(result, "1.2");
+}
+
+TEST(ContextTest, CalculatorIsReused) {
+  s21::SmartCalculator calculator;
+  std::string result;
+  double value = 0;
+  calculator.Calculate(result, "(1+2");
+  ASSERT_EQ(result, "3");
+  ASSERT_EQ(calculator.CalculateValue("sin(", value), s21::kSyntaxError);
+  ASSERT_EQ(calculator.CalculateValue("2^0.5*2^0.5", value), s21::kOk);
+  ASSERT_DOUBLE_EQ(value, 2);
+  calculator.Calculate(result, "0.5");
+  ASSERT_EQ(result, "0.5");
+  ASSERT_EQ(calculator.CalculateValue("x^2", value), s21::kSyntaxError);
+  ASSERT_EQ(calculator.CalculateValue("x^2", 3, value), s21::kOk);
+  ASSERT_DOUBLE_EQ(value, 9);
+}
+
+TEST(ContextTest, ThreadsWithOwnContexts) {
+  std::vector<std::string> expressions;
+  std::vector<std::string> expected(200);
+  s21::SmartCalculator calculator;
+  for (int i = 0; i < 200; i++) {
+    expressions.push_back(std::to_string(i) + "E1/(sin(" + std::to_string(i) +
+                          ")+2)");
+    calculator.Calculate(expected[i], expressions[i]);
+  }
+  std::vector<int> mismatches(8);
+  std::vector<std::thread> threads;
+  for (int t = 0; t < 8; t++) {
+    threads.emplace_back([&, t]() {
+      s21::SmartCalculator context;
+      std::string result;
+      for (int repeat = 0; repeat < 50; repeat++) {
+        for (size_t i = 0; i < expressions.size(); i++) {
+          context.Calculate(result, expressions[i]);
+          mismatches[t] += result != expected[i];
+        }
+      }
+    });
+  }
+  for (std::thread &thread : threads) {
+    thread.join();
+  }
+  ASSERT_EQ(std::count(mismatches.begin(), mismatches.end(), 0), 8);
+}
+
 int main(int argc, char* argv[]) {
   ::testing::InitGoogleTest(&argc, argv);
   return RUN_ALL_TESTS();
@@ -1,14 +1,160 @@
+#include <cstring>
 #include <string>
 
 #include "model.hpp"
 
+namespace {
+// Calculator reused by the calls that do not pass a context
+s21::SmartCalculator &ThreadCalculator() {
+  thread_local s21::SmartCalculator calculator;
+  return calculator;
+}
+
+void CopyResult(char *result, const std::string &result_str) {
+  strncpy(result, result_str.c_str(), 256);
+}
+
+template <typename Calculate>
+void CalculateMany(const char *buffer, const size_t *offsets, size_t count,
+                   double *results, int *statuses, Calculate calculate) {
+  s21::SmartCalculator &calculator = ThreadCalculator();
+  for (size_t i = 0; i < count; i++) {
+    double value = 0;
+    s21::ErrorCode error = calculate(
+        calculator,
+        std::string_view(buffer + offsets[i], offsets[i + 1] - offsets[i]),
+        value);
+    results[i] =
+        error == s21::kOk ? value : std::numeric_limits<double>::quiet_NaN();
+    statuses[i] = error;
+  }
+}
+}  // namespace
+
 extern "C" {
 
 void CalculateWrapper(char* result, const char* expression) {
   std::string result_str;
-  std::string expression_str(expression);
-  s21::SmartCalculator calculator;
-  calculator.Calculate(result_str, expression_str);
-  strncpy(result, result_str.c_str(), 256);
+  ThreadCalculator().Calculate(result_str, expression);
+  CopyResult(result, result_str);
+}
+
+// Evaluates count expressions packed one after another into buffer.
+// Expression i occupies buffer[offsets[i]] .. buffer[offsets[i + 1] - 1].
+// Results get the value (NaN on error) and statuses get the s21::ErrorCode.
+void CalculateManyWrapper(const char* buffer, const size_t* offsets,
+                          size_t count, double* results, int* statuses) {
+  CalculateMany(buffer, offsets, count, results, statuses,
+                [](s21::SmartCalculator& calculator, std::string_view str,
+                   double& value) {
+                  return calculator.CalculateValue(str, value);
+                });
+}
+
+// Like CalculateManyWrapper, but the expressions may contain the variable
+// x, which takes the given value.
+void EvaluateManyWrapper(const char* buffer, const size_t* offsets,
+                         size_t count, double x, double* results,
+                         int* statuses) {
+  CalculateMany(buffer, offsets, count, results, statuses,
+                [x](s21::SmartCalculator& calculator, std::string_view str,
+                    double& value) {
+                  return calculator.CalculateValue(str, x, value);
+                });
+}
+
+// Returns the value of the expression without formatting it. error receives
+// s21::kOk or the reason why the expression could not be evaluated.
+double CalculateValueWrapper(const char* expression, int* error) {
+  double value = std::numeric_limits<double>::quiet_NaN();
+  *error = ThreadCalculator().CalculateValue(expression, value);
+  return *error == s21::kOk ? value : std::numeric_limits<double>::quiet_NaN();
+}
+
+// Returns an opaque handle to the parsed expression or nullptr if the
+// expression is invalid. The handle must be released with
+// FreeExpressionWrapper. The program is optimized, since compiled
+// expressions are meant to be evaluated repeatedly.
+void* CompileExpressionWrapper(const char* expression) {
+  s21::CompiledExpression* compiled = new s21::CompiledExpression();
+  if (ThreadCalculator().Compile(*compiled, expression, true)) {
+    delete compiled;
+    compiled = nullptr;
+  } else {
+    compiled->Optimize();
+  }
+  return compiled;
+}
+
+void EvaluateExpressionWrapper(char* result, const void* handle, double x) {
+  std::string result_str = "Error";
+  const s21::CompiledExpression* compiled =
+      static_cast<const s21::CompiledExpression*>(handle);
+  double value = 0;
+  if (compiled != nullptr && !compiled->Evaluate(x, value)) {
+    ThreadCalculator().FixString(result_str, value);
+  }
+  CopyResult(result, result_str);
 }
+
+double EvaluateValueWrapper(const void* handle, double x, int* error) {
+  const s21::CompiledExpression* compiled =
+      static_cast<const s21::CompiledExpression*>(handle);
+  double value = std::numeric_limits<double>::quiet_NaN();
+  *error = compiled == nullptr ? s21::kSyntaxError
+                               : compiled->Evaluate(x, value);
+  return *error == s21::kOk ? value : std::numeric_limits<double>::quiet_NaN();
+}
+
+// Fills result[i] with the value at x[i], or NaN where the expression
+// cannot be evaluated.
+void EvaluateArrayWrapper(const void* handle, const double* x, double* result,
+                          size_t size) {
+  const s21::CompiledExpression* compiled =
+      static_cast<const s21::CompiledExpression*>(handle);
+  if (compiled != nullptr) {
+    compiled->EvaluateArray(x, result, size);
+  } else {
+    std::fill(result, result + size, std::numeric_limits<double>::quiet_NaN());
+  }
+}
+
+void FreeExpressionWrapper(void* handle) {
+  delete static_cast<s21::CompiledExpression*>(handle);
+}
+
+// Returns a calculator context that keeps its buffers between calls. A
+// context must not be used by two threads at once; it is released with
+// DestroyContextWrapper.
+void* CreateContextWrapper() { return new s21::SmartCalculator(); }
+
+void ContextCalculateWrapper(void* context, char* result,
+                             const char* expression) {
+  std::string result_str;
+  static_cast<s21::SmartCalculator*>(context)->Calculate(result_str,
+                                                          expression);
+  CopyResult(result, result_str);
+}
+
+double ContextCalculateValueWrapper(void* context, const char* expression,
+                                    int* error) {
+  double value = std::numeric_limits<double>::quiet_NaN();
+  *error = static_cast<s21::SmartCalculator*>(context)->CalculateValue(
+      expression, value);
+  return *error == s21::kOk ? value : std::numeric_limits<double>::quiet_NaN();
+}
+
+void DestroyContextWrapper(void* context) {
+  delete static_cast<s21::SmartCalculator*>(context);
+}
+
+void SetProfilingWrapper(int enabled) { s21::Profiler::Enable(enabled != 0); }
+
+// Fills arrays of s21::kStageCount elements with the number of calls and
+// the cumulative nanoseconds of every s21::Stage.
+void ReadProfileWrapper(uint64_t* calls, uint64_t* nanoseconds) {
+  s21::Profiler::Read(calls, nanoseconds);
+}
+
+void ResetProfileWrapper() { s21::Profiler::Reset(); }
 }
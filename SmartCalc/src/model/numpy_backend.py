@@ -0,0 +1,787 @@
+"""
+    This module provides an evaluation backend written in NumPy only. It
+    parses expressions with the grammar of the shared library and evaluates
+    them on whole arrays at once, one ufunc per operation, so it works
+    where the library is not built and is fast for large arrays. It also
+    evaluates expressions of two variables, x and y, on grids, and bounds
+    expressions of x on whole intervals with interval arithmetic.
+"""
+import math
+import re
+
+import numpy as np
+
+# pylint: disable=import-error
+from model.calculator import Backend, CalculationError, format_result, \
+  STATUS_OK, STATUS_SYNTAX_ERROR, STATUS_DIVISION_BY_ZERO, \
+  STATUS_DOMAIN_ERROR, STATUS_OVERFLOW_ERROR, INTERVAL_MAYBE_UNDEFINED, \
+  INTERVAL_UNDEFINED, INTERVAL_MAYBE_DISCONTINUOUS
+
+# Longest expression accepted by the library
+MAX_LENGTH = 255
+# A cosine at most this far from zero makes the tangent an error, and a
+# tangent this close to zero is rounded to zero, as in the library
+TAN_EPSILON = 0.0000001
+
+# Function names and their tokens, as in the library ('P' is Pi and 'E'
+# is *(10)^)
+NAMES = {'sin': 's', 'cos': 'c', 'tan': 't', 'asin': 'a', 'acos': 'x',
+         'atan': 'z', 'log': 'l', 'ln': 'n', 'sqrt': 'q', 'mod': 'm',
+         'Pi': 'P', 'E': 'E'}
+OPERATORS = '+-*/^'
+FUNCTIONS = 'sctqlnaxz'
+# Tokens of the variables
+VARIABLES = {'x': 'v', 'y': 'u'}
+# Grid points evaluated at once by SurfaceExpression.evaluate_grid, which
+# bounds the memory of the intermediate arrays
+GRID_CHUNK_POINTS = 1 << 16
+
+# The longest valid number at the start of a run of digits and dots
+_NUMBER = re.compile(r'[0-9]+(\.[0-9]*)?')
+
+
+def _pow(base, exponent):
+  """ Raises to a power like C pow, which numpy.power is not for a base of
+      minus infinity and an exponent that is not an integer: that is
+      infinity or 0, the limit for a base of a large magnitude, not NaN. """
+  result = np.power(base, exponent)
+  return np.where(np.isneginf(base) & np.isnan(result) & ~np.isnan(exponent),
+                  np.where(exponent > 0, np.inf, 0.0), result)
+
+
+# Plain ufuncs of the functions and of the binary operators without
+# errors; the right operand is on top of the stack
+_UNARY = {'s': np.sin, 'c': np.cos, 'q': np.sqrt, 'l': np.log10,
+          'n': np.log, 'a': np.arcsin, 'x': np.arccos, 'z': np.arctan}
+_BINARY = {'+': np.add, '-': np.subtract, '*': np.multiply, '^': _pow}
+# Relative widening of interval bounds after every operation, which covers
+# the rounding of the operation in the library
+_ROUNDING = 4 * np.finfo(np.float64).eps
+# Distance from a pole of the tangent within which it may be an error
+_TAN_POLE = 2 * TAN_EPSILON
+# An error everywhere is also an error somewhere
+_UNDEFINED = INTERVAL_UNDEFINED | INTERVAL_MAYBE_UNDEFINED
+# A pole: the expression jumps and may be an error
+_POLE = INTERVAL_MAYBE_UNDEFINED | INTERVAL_MAYBE_DISCONTINUOUS
+
+
+def _rank(token):
+  """ Returns the priority of an operation, 0 for a bracket. """
+  if token in FUNCTIONS or token == 'm':
+    return 4
+  if token == '^':
+    return 3
+  return {'*': 2, '/': 2, '+': 1, '-': 1}.get(token, 0)
+
+
+def _arity(token):
+  """ Returns the number of operands of an operation, 0 if it is none. """
+  if token in FUNCTIONS:
+    return 1
+  return 2 if token in OPERATORS or token == 'm' else 0
+
+
+def _fold_signs(signs):
+  """ Reduces a run of signs to one like the library: '--' is '+', then
+      repeated '+' are one, then '+-' and '-+' are '-'. """
+  signs = re.sub(r'\++', '+', signs.replace('--', '+'))
+  signs = signs.replace('+-', '-').replace('-+', '-')
+  if len(signs) != 1:
+    raise ValueError('two operators in a row')
+  return signs
+
+
+class _Lexer:
+  """ Splits an expression into the tokens of the library: numbers ('0'),
+      the variables ('v' for x, 'u' for y), brackets, operators and
+      function letters. """
+
+  def __init__(self, text, variables):
+    if not text or len(text) > MAX_LENGTH or text[0] in 'm*/^E' or \
+        text[-1] in '+-*/^d(E':
+      raise ValueError('invalid input')
+    self.text = text
+    self.variables = variables
+    self.tokens = []
+    self.previous = None
+    self.after_operator = False
+
+  def push(self, token, number=0.0):
+    """ Appends a token. """
+    self.tokens.append((token, number))
+    self.previous = token
+    self.after_operator = token in OPERATORS
+
+  def push_operator(self, token):
+    """ Appends an operator unless another one precedes it. """
+    if self.after_operator:
+      raise ValueError('two operators in a row')
+    self.push(token)
+
+  def read(self):
+    """
+    Splits the expression like the lexer of the library.
+
+    Returns:
+        list[tuple[str, float]]: The tokens with their values, the
+            brackets left open closed at the end.
+
+    Raises:
+        ValueError: If the expression is not valid.
+    """
+    text, i, brackets = self.text, 0, 0
+    while i < len(text):
+      char = text[i]
+      if '0' <= char <= '9':
+        end = i
+        while end < len(text) and ('0' <= text[end] <= '9' or
+                                   text[end] == '.'):
+          end += 1
+        # Only the longest valid prefix counts, '1.2.3' is 1.2
+        self.push('0', float(_NUMBER.match(text, i, end).group()))
+        i = end
+      elif char in '+-':
+        end = i
+        while end < len(text) and text[end] in '+-':
+          end += 1
+        self.read_signs(_fold_signs(text[i:end]), i == 0)
+        i = end
+      elif char in '*/^':
+        self.push_operator(char)
+        i += 1
+      elif char in '()':
+        brackets += 1 if char == '(' else -1
+        self.push(char)
+        i += 1
+      elif char in self.variables:
+        self.push(VARIABLES[char])
+        i += 1
+      elif 'a' <= char <= 'z' or 'A' <= char <= 'Z':
+        end = i
+        while end < len(text) and ('a' <= text[end] <= 'z' or
+                                   'A' <= text[end] <= 'Z') and \
+            text[end] not in self.variables:
+          end += 1
+        self.read_name(text[i:end])
+        i = end
+      else:
+        raise ValueError('unrecognized character')
+    if brackets < 0:
+      raise ValueError('too many closing brackets')
+    for _ in range(brackets):
+      self.push(')')
+    return self.tokens
+
+  def read_signs(self, sign, at_start):
+    """ Appends a folded sign; a leading minus is subtraction from 0 and a
+        plus after an opening bracket is skipped. """
+    after_bracket = self.previous == '('
+    if at_start or (after_bracket and sign == '-'):
+      self.push('0')
+    if after_bracket and sign == '+':
+      if self.after_operator:
+        raise ValueError('two operators in a row')
+      self.after_operator = True
+      self.previous = sign
+    else:
+      self.push_operator(sign)
+
+  def read_name(self, name):
+    """ Appends a function, Pi or the exponent E. """
+    token = NAMES.get(name)
+    if token is None:
+      raise ValueError('unknown function')
+    if token == 'P':
+      self.push('0', math.pi)
+    elif token == 'E':
+      self.push_operator('*')
+      self.push('(')
+      self.push('0', 10.0)
+      self.push(')')
+      self.push_operator('^')
+    else:
+      self.push(token)
+
+
+def parse(expression, variables='x'):
+  """
+  Translates an expression into the postfix program of the library.
+
+  Args:
+      expression (str): The arithmetic expression.
+      variables (str): The letters of the variables, '', 'x' or 'xy'.
+
+  Returns:
+      list[tuple[str, float]]: The tokens of the program in postfix order.
+
+  Raises:
+      ValueError: If the expression is not valid.
+  """
+  program, operators = [], []
+  depth = 0
+
+  def apply(token):
+    nonlocal depth
+    arity = _arity(token)
+    if arity == 0 or depth < arity:
+      raise ValueError('incorrect math action')
+    depth -= arity - 1
+    program.append((token, 0.0))
+
+  for token, number in _Lexer(expression, variables).read():
+    if token in '0vu':
+      program.append((token, number))
+      depth += 1
+    elif token == ')':
+      while operators and operators[-1] != '(':
+        apply(operators.pop())
+      if not operators:
+        raise ValueError('too many closing brackets')
+      operators.pop()
+    elif token in OPERATORS:
+      while operators and _rank(token) <= _rank(operators[-1]):
+        apply(operators.pop())
+      operators.append(token)
+    else:
+      operators.append(token)
+  while operators:
+    apply(operators.pop())
+  if depth != 1:
+    raise ValueError('operation not equal to numbers')
+  return program
+
+
+def run(program, x_values, y_values=None):
+  """
+  Evaluates a postfix program for an array of values of x with one ufunc
+  call per operation. Parts that do not depend on x are evaluated once, as
+  scalars. The values of y are broadcast against those of x, so a row of x
+  and a column of y give a grid.
+
+  Args:
+      program (list[tuple[str, float]]): The program returned by parse.
+      x_values (numpy.ndarray): The float64 values of x.
+      y_values (numpy.ndarray, optional): The float64 values of y, needed
+          if the program was parsed with the variable y.
+
+  Returns:
+      tuple[numpy.ndarray, numpy.ndarray]: The float64 results with the
+          broadcast shape of the variables, NaN on error, and the int32
+          STATUS_* codes.
+  """
+  shape = x_values.shape if y_values is None else np.broadcast_shapes(
+    x_values.shape, y_values.shape)
+  status = np.zeros(shape, dtype=np.int32)
+
+  def fail(mask, code):
+    # The library stops at the first error of every value
+    status[(status == STATUS_OK) & mask] = code
+
+  stack = []
+  with np.errstate(all='ignore'):
+    for token, number in program:
+      if token == '0':
+        stack.append(np.float64(number))
+      elif token == 'v':
+        stack.append(x_values)
+      elif token == 'u':
+        stack.append(y_values)
+      elif token in _UNARY:
+        stack[-1] = _UNARY[token](stack[-1])
+      elif token == 't':
+        value = stack[-1]
+        fail(np.abs(np.cos(value)) <= TAN_EPSILON, STATUS_DOMAIN_ERROR)
+        value = np.tan(value)
+        stack[-1] = np.where(np.abs(value) <= TAN_EPSILON, 0.0, value)
+      else:
+        right = stack.pop()
+        if token in _BINARY:
+          stack[-1] = _BINARY[token](stack[-1], right)
+        else:
+          fail(right == 0, STATUS_DIVISION_BY_ZERO)
+          stack[-1] = (np.divide if token == '/' else np.fmod)(stack[-1],
+                                                               right)
+    result = np.array(np.broadcast_to(stack[0], shape), dtype=np.float64)
+  fail(np.isnan(result), STATUS_DOMAIN_ERROR)
+  fail(np.isinf(result), STATUS_OVERFLOW_ERROR)
+  result[status != STATUS_OK] = np.nan
+  return result, status
+
+
+def _interval(low, high, flags):
+  """ Finishes the bounds of an operation: they are widened by its
+      rounding, and NaN bounds of values that are not errors everywhere
+      become infinite, as the operation may fail for some of them. """
+  undefined = (flags & INTERVAL_UNDEFINED) != 0
+  unknown = ~undefined & (np.isnan(low) | np.isnan(high))
+  if np.any(undefined) or np.any(unknown):
+    flags = flags | np.where(unknown, INTERVAL_MAYBE_UNDEFINED, 0)
+    low = np.where(undefined, np.nan, np.where(unknown, -np.inf, low))
+    high = np.where(undefined, np.nan, np.where(unknown, np.inf, high))
+  low = np.where(np.isinf(low), low, low - np.abs(low) * _ROUNDING)
+  high = np.where(np.isinf(high), high, high + np.abs(high) * _ROUNDING)
+  return low, high, flags
+
+
+def _add(left, right):
+  """ Bounds the sum of two intervals. """
+  return _interval(left[0] + right[0], left[1] + right[1],
+                   left[2] | right[2])
+
+
+def _subtract(left, right):
+  """ Bounds the difference of two intervals. """
+  return _interval(left[0] - right[1], left[1] - right[0],
+                   left[2] | right[2])
+
+
+def _multiply(left, right):
+  """ Bounds the product of two intervals by the products of their ends;
+      0 * inf makes the bounds unknown. """
+  products = [a * b for a in left[:2] for b in right[:2]]
+  low = np.minimum(np.minimum(products[0], products[1]),
+                   np.minimum(products[2], products[3]))
+  high = np.maximum(np.maximum(products[0], products[1]),
+                    np.maximum(products[2], products[3]))
+  return _interval(low, high, left[2] | right[2])
+
+
+def _divide(left, right):
+  """ Bounds the quotient of two intervals. A divisor that may be zero is
+      a pole and may be a division by zero, one that is zero everywhere
+      is an error. """
+  low, high, flags = right
+  zero = (low <= 0) & (high >= 0)
+  quotient = _multiply(left, _interval(1 / high, 1 / low, flags))
+  flags = quotient[2] | np.where(zero, _POLE, 0) | np.where(
+    (low == 0) & (high == 0), _UNDEFINED, 0)
+  return _interval(np.where(zero, -np.inf, quotient[0]),
+                   np.where(zero, np.inf, quotient[1]), flags)
+
+
+def _power(left, right):
+  """ Bounds a power of two intervals. Over a rectangle of bases that are
+      not negative and exponents the power is monotonic along both sides,
+      so its ends are at the corners. Negative bases are defined for
+      integer exponents only, and a base of zero is a pole for negative
+      exponents. """
+  base_low, base_high, base_flags = left
+  exp_low, exp_high, exp_flags = right
+  flags = base_flags | exp_flags
+  integer = (exp_low == exp_high) & (exp_low == np.round(exp_low))
+  even = integer & (np.fmod(exp_low, 2) == 0)
+  may_be_integer = np.ceil(exp_low) <= exp_high
+  negative = base_low < 0
+  # Of the negative bases only -inf is defined for other exponents, as 0
+  # or inf
+  infinite = negative & ~may_be_integer & (base_low == -np.inf)
+  base_low = np.where(negative & ~may_be_integer, 0.0, base_low)
+  powers = [np.power(a, b) for a in (base_low, base_high)
+            for b in (exp_low, exp_high)]
+  low = np.minimum(np.minimum(powers[0], powers[1]),
+                   np.minimum(powers[2], powers[3]))
+  high = np.maximum(np.maximum(powers[0], powers[1]),
+                    np.maximum(powers[2], powers[3]))
+  # Even powers of bases on both sides of zero reach zero
+  low = np.where(even & (exp_low > 0) & negative & (base_high > 0), 0.0, low)
+  pole = (base_low <= 0) & (base_high >= 0) & (exp_low < 0)
+  low = np.where(pole & ~(even | ~may_be_integer), -np.inf, low)
+  high = np.where(pole, np.inf, high)
+  flags = flags | np.where(pole, INTERVAL_MAYBE_DISCONTINUOUS, 0)
+  flags = flags | np.where(negative & ~may_be_integer, np.where(
+    (base_high < 0) & ~infinite, _UNDEFINED, INTERVAL_MAYBE_UNDEFINED), 0)
+  low = np.where(infinite, np.where(base_high < 0, 0.0, np.minimum(low, 0.0)),
+                 low)
+  high = np.where(infinite, np.inf, high)
+  # Negative bases with varying exponents are defined at single points
+  scattered = negative & may_be_integer & ~integer
+  low = np.where(scattered, -np.inf, low)
+  high = np.where(scattered, np.inf, high)
+  flags = flags | np.where(scattered, _POLE, 0)
+  # NaN to the power of 0 and 1 to the power of NaN are 1
+  one = ((base_flags & INTERVAL_UNDEFINED) != 0) & (exp_low <= 0) & (
+    exp_high >= 0) | ((exp_flags & INTERVAL_UNDEFINED) != 0) & (
+      base_low <= 1) & (base_high >= 1)
+  flags = np.where(one, flags & ~INTERVAL_UNDEFINED | INTERVAL_MAYBE_UNDEFINED,
+                   flags)
+  return _interval(np.where(one, 1.0, low), np.where(one, 1.0, high), flags)
+
+
+def _modulo(left, right):
+  """ Bounds the remainder of two intervals, which has the sign of the
+      dividend and is smaller than the divisor. Within a period of a
+      constant divisor it grows with the dividend; elsewhere it may jump. """
+  low, high, flags = left
+  div_low, div_high, div_flags = right
+  flags = flags | div_flags
+  zero = (div_low <= 0) & (div_high >= 0)
+  size = np.maximum(np.abs(div_low), np.abs(div_high))
+  smallest = np.where(zero, 0.0, np.minimum(np.abs(div_low),
+                                            np.abs(div_high)))
+  # Dividends smaller than the divisor are the remainder themselves
+  whole = np.maximum(np.abs(low), np.abs(high)) < smallest
+  period = np.abs(div_low)
+  first, last = _interval(low / period, high / period, 0)[:2]
+  same = ~zero & (div_low == div_high) & np.isfinite(period) & (
+    np.trunc(first) == np.trunc(last))
+  continuous = whole | same
+  new_low = np.where(continuous, np.fmod(low, period),
+                     np.where(low >= 0, 0.0, np.maximum(low, -size)))
+  new_high = np.where(continuous, np.fmod(high, period),
+                      np.where(high <= 0, 0.0, np.minimum(high, size)))
+  new_low = np.where(whole, low, new_low)
+  new_high = np.where(whole, high, new_high)
+  flags = flags | np.where(continuous, 0, INTERVAL_MAYBE_DISCONTINUOUS)
+  flags = flags | np.where(zero, _POLE, 0) | np.where(
+    (div_low == 0) & (div_high == 0), _UNDEFINED, 0)
+  # The remainder of an infinite dividend is NaN
+  flags = flags | np.where(np.isinf(low) | np.isinf(high),
+                           INTERVAL_MAYBE_UNDEFINED, 0)
+  return _interval(new_low, new_high, flags)
+
+
+def _periodic(function, peak):
+  """ Returns the interval version of sine or cosine, whose maxima are at
+      peak + 2 pi k and minima half a period later. """
+
+  def bound(value):
+    low, high, flags = value
+    ends = function(low), function(high)
+    new_low, new_high = np.minimum(*ends), np.maximum(*ends)
+    turn = 2 * math.pi
+    top = peak + turn * np.ceil((low - peak) / turn)
+    bottom = peak + math.pi + turn * np.ceil((low - peak - math.pi) / turn)
+    new_high = np.where(top <= high, 1.0, new_high)
+    new_low = np.where(bottom <= high, -1.0, new_low)
+    # Whole periods, and infinite values where the function is NaN
+    full = ~(high - low < turn)
+    flags = flags | np.where(np.isinf(low) | np.isinf(high),
+                             INTERVAL_MAYBE_UNDEFINED, 0)
+    return _interval(np.where(full, -1.0, new_low),
+                     np.where(full, 1.0, new_high), flags)
+
+  return bound
+
+
+def _tangent(value):
+  """ Bounds the tangent, which grows between its poles. A pole in the
+      interval makes the bounds infinite, and one just outside of it may
+      make the tangent an error. """
+  low, high, flags = value
+  pole = math.pi / 2 + math.pi * np.ceil((low - math.pi / 2) / math.pi)
+  ends = [np.tan(end) for end in (low, high)]
+  new_low, new_high = (np.where(np.abs(end) <= TAN_EPSILON, 0.0, end)
+                       for end in ends)
+  # Ends in the wrong order also show a pole, if rounding hid it
+  across = ~(pole > high) | ~(high - low < math.pi) | (new_low > new_high)
+  near = (pole - _TAN_POLE <= high) | (pole - math.pi + _TAN_POLE >= low)
+  flags = flags | np.where(across, _POLE, np.where(
+    near, INTERVAL_MAYBE_UNDEFINED, 0))
+  return _interval(np.where(across, -np.inf, new_low),
+                   np.where(across, np.inf, new_high), flags)
+
+
+def _monotonic(function, lowest, highest, increasing=True):
+  """ Returns the interval version of a monotonic function defined on
+      [lowest, highest] and NaN outside. """
+
+  def bound(value):
+    low, high, flags = value
+    outside = (high < lowest) | (low > highest)
+    partly = (low < lowest) | (high > highest)
+    flags = flags | np.where(outside, _UNDEFINED, np.where(
+      partly, INTERVAL_MAYBE_UNDEFINED, 0))
+    ends = [function(np.clip(end, lowest, highest)) for end in (low, high)]
+    if not increasing:
+      ends.reverse()
+    return _interval(*ends, flags)
+
+  return bound
+
+
+_INTERVAL_UNARY = {
+  's': _periodic(np.sin, math.pi / 2), 'c': _periodic(np.cos, 0.0),
+  't': _tangent, 'q': _monotonic(np.sqrt, 0.0, np.inf),
+  'l': _monotonic(np.log10, 0.0, np.inf), 'n': _monotonic(np.log, 0.0, np.inf),
+  'a': _monotonic(np.arcsin, -1.0, 1.0),
+  'x': _monotonic(np.arccos, -1.0, 1.0, increasing=False),
+  'z': _monotonic(np.arctan, -np.inf, np.inf)}
+_INTERVAL_BINARY = {'+': _add, '-': _subtract, '*': _multiply, '/': _divide,
+                    '^': _power, 'm': _modulo}
+
+
+def run_interval(program, x_low, x_high):
+  """
+  Evaluates a postfix program with interval arithmetic: for every interval
+  of x it bounds the results of run at all points of the interval, one
+  vectorized step per operation. The bounds are widened by the rounding of
+  every operation, so they hold for the values the library computes.
+
+  Args:
+      program (list[tuple[str, float]]): The program returned by parse.
+      x_low (numpy.ndarray): The float64 lower ends of the intervals.
+      x_high (numpy.ndarray): The float64 upper ends of the intervals.
+
+  Returns:
+      tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]: The lower and
+          upper bounds of the results that are not errors, NaN if every
+          result is one, and the int32 INTERVAL_* flags.
+  """
+  shape = np.broadcast_shapes(x_low.shape, x_high.shape)
+  stack = []
+  with np.errstate(all='ignore'):
+    for token, number in program:
+      if token == '0':
+        stack.append((np.float64(number), np.float64(number), 0))
+      elif token == 'v':
+        stack.append((x_low, x_high, 0))
+      elif token in _INTERVAL_UNARY:
+        stack[-1] = _INTERVAL_UNARY[token](stack[-1])
+      else:
+        right = stack.pop()
+        stack[-1] = _INTERVAL_BINARY[token](stack[-1], right)
+    low, high, flags = (np.array(np.broadcast_to(part, shape))
+                        for part in stack[0])
+  low, high = low.astype(np.float64), high.astype(np.float64)
+  flags = flags.astype(np.int32)
+  # Infinite results are overflow errors
+  flags |= np.where((low == -np.inf) | (high == np.inf),
+                    INTERVAL_MAYBE_UNDEFINED, 0).astype(np.int32)
+  flags |= np.where((low == high) & np.isinf(low), _UNDEFINED,
+                    0).astype(np.int32)
+  undefined = (flags & INTERVAL_UNDEFINED) != 0
+  low[undefined] = np.nan
+  high[undefined] = np.nan
+  return low, high, flags
+
+
+class NumpyExpression:
+  """ An expression parsed once into a postfix program that is evaluated
+      on whole arrays. It has the methods of CompiledExpression.
+  """
+
+  def __init__(self, expression, program):
+    """ Initializes a new instance of the NumpyExpression class.
+
+    Args:
+        expression (str): The source expression.
+        program (list[tuple[str, float]] | None): The program returned by
+            parse, or None if the expression is invalid.
+    """
+    self.expression = expression
+    self.program = program
+
+  @property
+  def is_valid(self):
+    """ bool: Whether the expression was compiled successfully. """
+    return self.program is not None
+
+  def evaluate(self, x_value=0.0):
+    """
+    Evaluates the expression for the given value of x.
+
+    Args:
+        x_value (float): The value substituted for the variable x.
+
+    Returns:
+        str: The formatted result, or 'Error'.
+    """
+    if self.program is None:
+      return 'Error'
+    return format_result(self.evaluate_array(float(x_value))[()])
+
+  def evaluate_value(self, x_value=0.0):
+    """
+    Evaluates the expression for the given value of x without formatting
+    the result.
+
+    Args:
+        x_value (float): The value substituted for the variable x.
+
+    Returns:
+        float: The result with full double precision.
+
+    Raises:
+        CalculationError: If the expression cannot be evaluated.
+    """
+    if self.program is None:
+      raise CalculationError(STATUS_SYNTAX_ERROR, self.expression)
+    result, status = run(self.program, np.array(float(x_value)))
+    if status[()] != STATUS_OK:
+      raise CalculationError(int(status[()]), self.expression)
+    return float(result[()])
+
+  def evaluate_array(self, x_values):
+    """
+    Evaluates the expression for every element of an array.
+
+    Args:
+        x_values (numpy.ndarray): The values substituted for x.
+
+    Returns:
+        numpy.ndarray: The float64 results with the shape of x_values, NaN
+            where the expression cannot be evaluated.
+    """
+    x_array = np.asarray(x_values, dtype=np.float64)
+    if self.program is None:
+      return np.full(x_array.shape, np.nan)
+    return run(self.program, x_array)[0]
+
+  def evaluate_interval(self, x_low, x_high):
+    """
+    Bounds the expression on intervals of x with interval arithmetic. The
+    bounds hold for every point of an interval, but may be wider than the
+    values there.
+
+    Args:
+        x_low (numpy.ndarray): The lower ends of the intervals.
+        x_high (numpy.ndarray): The upper ends of the intervals.
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]: The lower and
+            upper bounds of the values that are not errors, NaN where
+            every value is one, and the int32 INTERVAL_* flags, which tell
+            whether the expression may be an error, is an error everywhere
+            or may jump in the interval.
+    """
+    x_low = np.asarray(x_low, dtype=np.float64)
+    x_high = np.asarray(x_high, dtype=np.float64)
+    if self.program is None:
+      shape = np.broadcast_shapes(x_low.shape, x_high.shape)
+      return (np.full(shape, np.nan), np.full(shape, np.nan),
+              np.full(shape, _UNDEFINED, dtype=np.int32))
+    return run_interval(self.program, x_low, x_high)
+
+
+class SurfaceExpression:
+  """ An expression of the variables x and y parsed once into a postfix
+      program that is evaluated on grids.
+  """
+
+  def __init__(self, expression, program):
+    """ Initializes a new instance of the SurfaceExpression class.
+
+    Args:
+        expression (str): The source expression.
+        program (list[tuple[str, float]] | None): The program returned by
+            parse with the variables x and y, or None if the expression is
+            invalid.
+    """
+    self.expression = expression
+    self.program = program
+
+  @property
+  def is_valid(self):
+    """ bool: Whether the expression was compiled successfully. """
+    return self.program is not None
+
+  def evaluate_value(self, x_value, y_value):
+    """
+    Evaluates the expression at a point.
+
+    Args:
+        x_value (float): The value of x.
+        y_value (float): The value of y.
+
+    Returns:
+        float: The result with full double precision.
+
+    Raises:
+        CalculationError: If the expression cannot be evaluated.
+    """
+    if self.program is None:
+      raise CalculationError(STATUS_SYNTAX_ERROR, self.expression)
+    result, status = run(self.program, np.array(float(x_value)),
+                         np.array(float(y_value)))
+    if status[()] != STATUS_OK:
+      raise CalculationError(int(status[()]), self.expression)
+    return float(result[()])
+
+  def evaluate_grid(self, x_values, y_values, chunk_points=GRID_CHUNK_POINTS):
+    """
+    Evaluates the expression at every point of a grid. The rows are
+    evaluated in chunks of about chunk_points points, so the intermediate
+    arrays do not grow with the grid.
+
+    Args:
+        x_values (numpy.ndarray): The values of x, one per column.
+        y_values (numpy.ndarray): The values of y, one per row.
+        chunk_points (int): The number of points evaluated at once; a
+            chunk has at least one row.
+
+    Returns:
+        numpy.ndarray: The float64 results of shape (y size, x size), the
+            value at (x_values[j], y_values[i]) in row i and column j, NaN
+            where the expression cannot be evaluated.
+    """
+    x_row = np.asarray(x_values, dtype=np.float64).reshape(1, -1)
+    y_column = np.asarray(y_values, dtype=np.float64).reshape(-1, 1)
+    result = np.full((y_column.shape[0], x_row.shape[1]), np.nan)
+    if self.program is None:
+      return result
+    rows = max(1, chunk_points // max(x_row.shape[1], 1))
+    for start in range(0, y_column.shape[0], rows):
+      result[start:start + rows] = run(self.program, x_row,
+                                       y_column[start:start + rows])[0]
+    return result
+
+
+class NumpyBackend(Backend):
+  """ Evaluates expressions with NumPy, without the shared library. """
+
+  name = 'numpy'
+
+  def compile(self, expression, variables='x'):
+    """
+    Parses an expression so that it can be evaluated repeatedly.
+
+    Args:
+        expression (str): The arithmetic expression to compile.
+        variables (str): The letters of the variables, '' or 'x'.
+
+    Returns:
+        NumpyExpression: The parsed expression, invalid if it has errors.
+    """
+    try:
+      return NumpyExpression(expression, parse(expression, variables))
+    except ValueError:
+      return NumpyExpression(expression, None)
+
+  def compile_surface(self, expression):
+    """
+    Parses an expression of x and y for evaluation on grids.
+
+    Args:
+        expression (str): The arithmetic expression to compile.
+
+    Returns:
+        SurfaceExpression: The parsed expression, invalid if it has errors.
+    """
+    try:
+      return SurfaceExpression(expression, parse(expression, 'xy'))
+    except ValueError:
+      return SurfaceExpression(expression, None)
+
+  def calculate(self, expression):
+    """ Evaluates an expression without the variable and formats it like
+        Calculator.calculate. """
+    return self.compile(expression, '').evaluate()
+
+  def calculate_value(self, expression):
+    """ Evaluates an expression without the variable like
+        Calculator.calculate_value. """
+    return self.compile(expression, '').evaluate_value()
+
+  def calculate_many(self, expressions, x_value=None):
+    """ Evaluates independent expressions like Calculator.calculate_many,
+        one at a time. """
+    expressions = list(expressions)
+    results = np.full(len(expressions), np.nan)
+    statuses = np.full(len(expressions), STATUS_SYNTAX_ERROR, dtype=np.int32)
+    x_array = np.array(0.0 if x_value is None else float(x_value))
+    for i, expression in enumerate(expressions):
+      compiled = self.compile(expression, '' if x_value is None else 'x')
+      if compiled.is_valid:
+        result, status = run(compiled.program, x_array)
+        results[i], statuses[i] = result[()], status[()]
+    return results, statuses
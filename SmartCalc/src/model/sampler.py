@@ -0,0 +1,306 @@
+"""
+    This module provides adaptive sampling of a function of one variable
+    for plotting.
+"""
+import numpy as np
+
+# pylint: disable=import-error
+from model.calculator import INTERVAL_MAYBE_UNDEFINED, INTERVAL_UNDEFINED, \
+  INTERVAL_MAYBE_DISCONTINUOUS
+
+# Number of points of the first, uniform pass
+INITIAL_POINTS = 65
+# Maximal number of function evaluations per curve
+EVALUATION_BUDGET = 2000
+# Allowed deviation of a sample from the straight line between its
+# neighbours, as a fraction of the height of the view
+TOLERANCE = 1e-3
+# Jumps larger than this fraction of the view height are checked for
+# discontinuities
+JUMP_THRESHOLD = 0.05
+# Number of bisections used to tell a discontinuity from a steep slope
+JUMP_PROBES = 12
+# Share of the budget kept for the discontinuity checks
+JUMP_BUDGET = 0.2
+# Intervals narrower than this fraction of the range are not split
+MIN_WIDTH = 2.0 ** -30
+# Interval flags of a line that may have to be broken
+_MAY_BREAK = INTERVAL_MAYBE_DISCONTINUOUS | INTERVAL_MAYBE_UNDEFINED
+
+
+def adaptive_sample(function, x_min, x_max, y_range=None, *,
+                    budget=EVALUATION_BUDGET, clip=False, initial=None,
+                    interval=None):
+  """
+  Samples a function on [x_min, x_max] for plotting. A coarse uniform grid
+  is refined where the curve bends or reaches the edge of its domain, and
+  the line is broken with NaN at detected discontinuities.
+
+  Args:
+      function (Callable[[numpy.ndarray], numpy.ndarray]): Vectorized
+          function returning NaN where it is undefined.
+      x_min (float): The left end of the range.
+      x_max (float): The right end of the range.
+      y_range (tuple[float, float], optional): The visible y limits. Detail
+          outside them is ignored. Defaults to the bulk of the samples.
+      budget (int): The maximal number of function evaluations.
+      clip (bool): Whether to limit the values to the view extended by its
+          height on both sides, so that samples next to a pole do not
+          dominate autoscaling.
+      initial (tuple[numpy.ndarray, numpy.ndarray], optional): Sorted
+          samples that were already evaluated, used instead of the first
+          uniform pass.
+      interval (Callable, optional): Bounds the function on intervals of
+          x like NumpyExpression.evaluate_interval. Intervals proven flat
+          or undefined are not refined, the line is broken only where it
+          may jump, and at every pole.
+
+  Returns:
+      tuple[numpy.ndarray, numpy.ndarray]: The sorted x coordinates and the
+          y values, NaN where the line must be broken.
+  """
+  if initial is None:
+    x_coord = np.linspace(x_min, x_max, min(INITIAL_POINTS, budget))
+    y_coord = function(x_coord)
+    evaluations = x_coord.size
+  else:
+    x_coord, y_coord = initial
+    evaluations = 0
+  bounds = _view_bounds(y_coord, y_range)
+  min_width = (x_max - x_min) * MIN_WIDTH
+  # Intervals that need no more samples whatever their neighbours do
+  settled = np.zeros(max(x_coord.size - 1, 0), dtype=bool)
+
+  while evaluations < budget * (1 - JUMP_BUDGET):
+    deviation = _deviation(x_coord, np.clip(y_coord, *bounds), bounds)
+    score = np.maximum(deviation[:-1], deviation[1:])
+    score[(np.diff(x_coord) <= min_width) | settled] = 0
+    intervals = np.flatnonzero(score > TOLERANCE)
+    if interval is not None and intervals.size:
+      flat = _proven_flat(interval, x_coord[intervals],
+                          x_coord[intervals + 1], bounds)
+      settled[intervals[flat]] = True
+      intervals = intervals[~flat]
+    if intervals.size == 0:
+      break
+    limit = int(budget * (1 - JUMP_BUDGET)) - evaluations
+    if intervals.size > limit:
+      intervals = intervals[np.argsort(score[intervals])[::-1]]
+      intervals = np.sort(intervals[:limit])
+    x_mid = (x_coord[intervals] + x_coord[intervals + 1]) / 2
+    x_coord = np.insert(x_coord, intervals + 1, x_mid)
+    y_coord = np.insert(y_coord, intervals + 1, function(x_mid))
+    settled = np.insert(settled, intervals + 1, False)
+    evaluations += x_mid.size
+
+  x_coord, y_coord = _break_at_jumps(function, x_coord, y_coord, bounds,
+                                     budget - evaluations,
+                                     interval=interval)
+  if clip:
+    y_coord = np.clip(y_coord, *bounds)
+  return x_coord, y_coord
+
+
+def decimate(x_coord, y_coord, column_width):
+  """
+  Reduces samples to what can be seen at the resolution of the screen: the
+  first, the lowest, the highest and the last sample of every pixel column,
+  in their order along x (M4 decimation). A line through them covers the
+  same pixels as the line through all samples, and at most four points per
+  column are left to draw. Breaks are kept, a run of NaN as a single one.
+
+  Args:
+      x_coord (numpy.ndarray): The sorted x coordinates.
+      y_coord (numpy.ndarray): The values, NaN where the line is broken.
+      column_width (float): The width of a pixel column in units of x.
+
+  Returns:
+      tuple[numpy.ndarray, numpy.ndarray]: The kept samples, the input
+          itself if there is nothing to remove.
+  """
+  size = x_coord.size
+  if size <= 4 or not column_width > 0:
+    return x_coord, y_coord
+  column = np.floor((x_coord - x_coord[0]) / column_width)
+  defined = ~np.isnan(y_coord)
+  # Groups are the runs of defined samples within a column and the runs of
+  # undefined ones
+  first = np.empty(size, dtype=bool)
+  first[0] = True
+  first[1:] = (defined[1:] != defined[:-1]) | (
+    defined[1:] & (column[1:] != column[:-1]))
+  starts = np.flatnonzero(first)
+  if 4 * starts.size >= size:
+    return x_coord, y_coord
+  group = np.cumsum(first) - 1
+  ends = np.append(starts[1:], size) - 1
+  keep = first.copy()
+  keep[ends[defined[ends]]] = True
+  for reduce, fill in ((np.minimum, np.inf), (np.maximum, -np.inf)):
+    extreme = reduce.reduceat(np.where(defined, y_coord, fill), starts)
+    hits = np.flatnonzero(defined & (y_coord == extreme[group]))
+    # The first sample of a group that reaches the extreme
+    keep[hits[np.unique(group[hits], return_index=True)[1]]] = True
+  return x_coord[keep], y_coord[keep]
+
+
+def typical_range(y_coord):
+  """
+  Returns the range of the bulk of the values, ignoring the largest ones
+  found next to poles.
+
+  Args:
+      y_coord (numpy.ndarray): The values, NaN where undefined.
+
+  Returns:
+      tuple[float, float]: The 5th and 95th percentiles of the defined
+          values, or (-1, 1) if there are none.
+  """
+  finite = y_coord[np.isfinite(y_coord)]
+  if finite.size == 0:
+    return -1.0, 1.0
+  y_low, y_high = np.percentile(finite, [5, 95])
+  return float(y_low), float(y_high)
+
+
+def value_range(values):
+  """
+  Returns the range of the values, cut off at the band around their bulk
+  so that the values next to poles do not make the rest look flat.
+
+  Args:
+      values (numpy.ndarray): The values, NaN where undefined.
+
+  Returns:
+      tuple[float, float]: The lowest and highest value within the band of
+          three times the height of typical_range, or (-1, 1) if no value
+          is defined.
+  """
+  finite = values[np.isfinite(values)]
+  if finite.size == 0:
+    return -1.0, 1.0
+  band_low, band_high = _view_bounds(finite, None)
+  return max(float(finite.min()), band_low), min(float(finite.max()),
+                                                 band_high)
+
+
+def interval_range(interval, x_min, x_max, pieces=INITIAL_POINTS - 1):
+  """
+  Returns the range of a function on [x_min, x_max] from its bounds on
+  equal pieces of it, without sampling. The range holds every value, but
+  may be a little wider than them.
+
+  Args:
+      interval (Callable): Bounds the function on intervals of x like
+          NumpyExpression.evaluate_interval.
+      x_min (float): The left end of the range.
+      x_max (float): The right end of the range.
+      pieces (int): The number of pieces; more give a closer range.
+
+  Returns:
+      tuple[float, float] | None: The lowest and highest bound, or None if
+          the function may be undefined or jump somewhere in the range.
+  """
+  edges = np.linspace(x_min, x_max, pieces + 1)
+  low, high, flags = interval(edges[:-1], edges[1:])
+  if np.any(flags) or not (np.all(np.isfinite(low)) and
+                           np.all(np.isfinite(high))):
+    return None
+  return float(low.min()), float(high.max())
+
+
+def _view_bounds(y_coord, y_range):
+  """ Returns the band of y values taken into account when refining: the
+      view extended by its height on both sides. """
+  if y_range is None:
+    y_range = typical_range(y_coord)
+  y_low, y_high = min(y_range), max(y_range)
+  height = max(y_high - y_low, 1e-12)
+  return y_low - height, y_high + height
+
+
+def _deviation(x_coord, y_coord, bounds):
+  """ Returns for every sample its distance from the chord between its
+      neighbours relative to the band height. Samples next to a change
+      between defined and undefined values get infinite deviation. """
+  deviation = np.zeros_like(y_coord)
+  if y_coord.size < 3:
+    return deviation
+  t_coord = (x_coord[1:-1] - x_coord[:-2]) / (x_coord[2:] - x_coord[:-2])
+  chord = y_coord[:-2] + t_coord * (y_coord[2:] - y_coord[:-2])
+  with np.errstate(invalid='ignore'):
+    inner = np.abs(y_coord[1:-1] - chord) / (bounds[1] - bounds[0])
+  defined = np.isfinite(y_coord)
+  edge = (defined[:-2] != defined[1:-1]) | (defined[1:-1] != defined[2:])
+  inner[edge] = np.inf
+  inner[~edge & ~defined[1:-1]] = 0
+  deviation[1:-1] = inner
+  return deviation
+
+
+def _proven_flat(interval, left, right, bounds):
+  """ Returns which intervals need no more samples: the function is an
+      error everywhere in them, or it is defined and continuous there and
+      its bounds within the band differ by at most the tolerance. """
+  low, high, flags = interval(left, right)
+  with np.errstate(invalid='ignore'):
+    extent = np.clip(high, *bounds) - np.clip(low, *bounds)
+  return ((flags & INTERVAL_UNDEFINED) != 0) | (
+    (flags == 0) & (extent <= TOLERANCE * (bounds[1] - bounds[0])))
+
+
+def _break_at_jumps(function, x_coord, y_coord, bounds, budget, *,
+                    interval=None):
+  """ Breaks the line inside intervals whose jump does not shrink when they
+      are bisected repeatedly, i.e. at poles and discontinuities. With
+      interval bounds, intervals proven continuous are never broken, and
+      poles are found even where the samples around them are close. """
+  height = bounds[1] - bounds[0]
+  jump = np.abs(np.diff(np.clip(y_coord, *bounds)))
+  large = jump > JUMP_THRESHOLD * height
+  pole = np.zeros(jump.size, dtype=bool)
+  if interval is not None and jump.size:
+    low, high, flags = interval(x_coord[:-1], x_coord[1:])
+    pole = ((flags & INTERVAL_MAYBE_DISCONTINUOUS) != 0) & np.isfinite(
+      jump) & ((low == -np.inf) | (high == np.inf))
+    large &= (flags & _MAY_BREAK) != 0
+  intervals = np.flatnonzero(large | pole)
+  intervals = intervals[np.argsort(np.where(pole, np.inf,
+                                            jump)[intervals])[::-1]]
+  intervals = intervals[:max(budget, 0) // JUMP_PROBES]
+  if intervals.size == 0:
+    return x_coord, y_coord
+
+  left, right = x_coord[intervals], x_coord[intervals + 1]
+  y_left, y_right = y_coord[intervals], y_coord[intervals + 1]
+  x_hole = np.zeros(intervals.size)
+  hole = np.zeros(intervals.size, dtype=bool)
+  for _ in range(JUMP_PROBES):
+    x_mid = (left + right) / 2
+    y_mid = function(x_mid)
+    new_hole = ~hole & ~np.isfinite(y_mid)
+    x_hole[new_hole] = x_mid[new_hole]
+    hole |= new_hole
+    # Follow the half that holds the larger part of the jump
+    c_left, c_mid, c_right = (np.clip(y, *bounds)
+                              for y in (y_left, y_mid, y_right))
+    to_left = ~hole & (np.abs(c_mid - c_left) >= np.abs(c_right - c_mid))
+    to_right = ~hole & ~to_left
+    right = np.where(to_left, x_mid, right)
+    y_right = np.where(to_left, y_mid, y_right)
+    left = np.where(to_right, x_mid, left)
+    y_left = np.where(to_right, y_mid, y_left)
+  final_jump = np.abs(np.clip(y_right, *bounds) - np.clip(y_left, *bounds))
+  # Jumps must not shrink much; a pole between close samples must have
+  # made a large one
+  broken = hole | (final_jump >= np.where(
+    large[intervals], jump[intervals] / 2, JUMP_THRESHOLD * height))
+  if interval is not None:
+    broken &= hole | ((interval(left, right)[2] & _MAY_BREAK) != 0)
+
+  x_break = np.where(hole, x_hole, (left + right) / 2)[broken]
+  x_coord = np.concatenate([x_coord, left[broken], right[broken], x_break])
+  y_coord = np.concatenate([y_coord, y_left[broken], y_right[broken],
+                            np.full(x_break.size, np.nan)])
+  x_coord, unique = np.unique(x_coord, return_index=True)
+  return x_coord, y_coord[unique]
@@ -3,7 +3,16 @@
     and formats it for display in the view.
 """
 
-from model.calculator import Calculator  # pylint: disable=import-error
+import sys
+
+import numpy as np
+
+# pylint: disable=import-error
+from model.calculator import Calculator, CalculationError, format_result
+from model.cache import LRUCache, SampleCache, RESULT_CACHE_BYTES, \
+  RESULT_CACHE_ENTRIES
+from model.sampler import adaptive_sample, interval_range, typical_range, \
+  INITIAL_POINTS
 
 
 class Presenter:
@@ -11,36 +20,149 @@ class Presenter:
     and model (calculator).
   """
 
-  def __init__(self, view):
+  def __init__(self, view, cache_results=False):
     """ Constructs a new Presenter object.
 
       Args:
           view (object): The view object to interact with.
+          cache_results (bool): Whether to remember the formatted results
+              of evaluated expressions. The limits can be changed by
+              assigning another LRUCache to result_cache.
     """
     self.view = view
     self.calculator = Calculator()
+    self.sample_cache = SampleCache()
+    self.result_cache = LRUCache(
+      RESULT_CACHE_BYTES, RESULT_CACHE_ENTRIES) if cache_results else None
 
-  def calculate_result(self, expression):
-    """ Calculates the result of the given expression using calculator object.
+  def format_value(self, expression, x_value=0.0):
+    """ Evaluates the expression numerically and formats the result only
+        for display.
 
         Args:
             expression (str): The mathematical expression to evaluate.
+            x_value (float): The value of the variable 'x'.
 
         Returns:
-            str: The result of the calculation, or 'Error' if an exception
-                occurred.
+            str: The formatted result, or 'Error' if it cannot be evaluated.
     """
+    # The value of x does not matter for expressions without it
+    key = (expression, float(x_value) if "x" in expression else 0.0)
+    if self.result_cache is not None:
+      result = self.result_cache.get(key)
+      if result is not None:
+        return result
     try:
-      result = self.calculator.calculate(expression)
-      return str(result)
-    except (ValueError, TypeError, IndexError):
-      return "Error"
+      result = format_result(
+        self.calculator.compile(expression).evaluate_value(x_value))
+    except CalculationError:
+      result = "Error"
+    if self.result_cache is not None:
+      self.result_cache.put(key, result,
+                            sys.getsizeof(expression) + sys.getsizeof(result))
+    return result
+
+  def invalidate_results(self):
+    """ Forgets the cached results, e.g. after the calculation engine
+        changed. """
+    if self.result_cache is not None:
+      self.result_cache.clear()
+
+  def compile_expression(self, expression):
+    """ Parses the given expression once for repeated evaluation. All of
+        its values come from the backend of the calculator, whatever the
+        size of the array, so that the samples of a curve, also those in
+        the sample cache, do not depend on the zoom.
+
+        Args:
+            expression (str): The mathematical expression, which may
+                contain the variable 'x'.
+
+        Returns:
+            CompiledExpression: The compiled expression.
+    """
+    return self.calculator.backend.compile(expression)
+
+  def sample_function(self, function, x_min, x_max, y_range=None):
+    """ Samples a compiled expression for plotting, with more points where
+        the curve bends and line breaks at discontinuities.
+
+        Args:
+            function (CompiledExpression): The expression to sample.
+            x_min (float): The left end of the visible range.
+            x_max (float): The right end of the visible range.
+            y_range (tuple[float, float], optional): The visible y limits.
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: The x and y coordinates,
+                y limited to a band around the view.
+    """
+    # Samples of the part of the range seen before come from the cache,
+    # and everything evaluated now is added to it
+    level = self.sample_cache.grid_level(x_min, x_max, INITIAL_POINTS - 1)
+    initial = self.sample_cache.samples(function.evaluate_array,
+                                        function.expression, level, x_min,
+                                        x_max)
+    if y_range is None:
+      # The band that autoscaling will follow is the range of a function
+      # proven continuous. Else only the uniform grid may decide it, as the
+      # cached refinement depends on earlier views
+      y_range = interval_range(function.evaluate_interval, x_min, x_max)
+    if y_range is None:
+      on_grid = np.mod(initial[0], 2.0 ** level) == 0
+      y_range = typical_range(initial[1][on_grid])
+    evaluated = []
+
+    def evaluate(x_values):
+      y_values = function.evaluate_array(x_values)
+      evaluated.append((x_values, y_values))
+      return y_values
+
+    result = adaptive_sample(evaluate, x_min, x_max, y_range, clip=True,
+                             initial=initial,
+                             interval=function.evaluate_interval)
+    if evaluated:
+      x_new, y_new = (np.concatenate(values) for values in zip(*evaluated))
+      self.sample_cache.update(function.expression, level, x_new, y_new)
+    return result
+
+  def compile_surface(self, expression):
+    """ Parses the given expression of x and y once for evaluation on
+        grids.
+
+        Args:
+            expression (str): The mathematical expression, which may
+                contain the variables 'x' and 'y'.
+
+        Returns:
+            SurfaceExpression: The compiled expression.
+    """
+    return self.calculator.compile_surface(expression)
+
+  def sample_surface(self, function, x_range, y_range, shape):
+    """ Evaluates an expression of x and y on a regular grid for heatmaps
+        and contour plots.
+
+        Args:
+            function (SurfaceExpression): The expression to sample.
+            x_range (tuple[float, float]): The ends of the x axis.
+            y_range (tuple[float, float]): The ends of the y axis.
+            shape (tuple[int, int]): The number of columns and rows.
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]: The x values
+                of the columns, the y values of the rows and the values of
+                the grid, one row per y value.
+    """
+    x_values = np.linspace(*x_range, shape[0])
+    y_values = np.linspace(*y_range, shape[1])
+    return x_values, y_values, function.evaluate_grid(x_values, y_values)
 
   def get_result(self, expression):
     """ Calculates the result of the given expression and displays it in the
         view object's history. If the expression contains the variable 'x',
-        prompts the user to enter a value for 'x' and replaces all occurrences
-        of 'x' with the entered value before calculating the result.
+        prompts the user to enter a value for 'x' and evaluates the compiled
+        expression with the entered value.
 
         Args:
             expression (str): The mathematical expression to evaluate.
@@ -49,12 +171,11 @@ class Presenter:
     if "x" in expression:
       x_value = self.view.show_x_dialog()
       if x_value is not None:
-        result = self.calculator.calculate(
-          expression.replace("x", str(x_value)))
+        result = self.format_value(expression, x_value)
         self.view.add_to_history(f"{expression} = {result}; x = {x_value}")
         self.view.set_text_edit_text(str(result))
     else:
-      result = self.calculator.calculate(expression)
+      result = self.format_value(expression)
       self.view.add_to_history(f"{expression} = {result}")
       self.view.set_text_edit_text(str(result))
 
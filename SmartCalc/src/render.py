@@ -0,0 +1,239 @@
+"""
+This module renders graphs of expressions to PNG or SVG without the
+graphical interface, for reports that need many of them.
+
+The graphs look like those of GraphWindow: the same axis lines, arrows,
+grid and limits. They are drawn with the Agg backend in a pool of
+processes. Every worker draws all of its graphs on one figure and only
+replaces the curve between them. Only the model, the presenter and
+matplotlib are imported, never PyQt6.
+
+Jobs are read one per line from a file or stdin: an expression, optionally
+followed by the ends of the x range, separated by whitespace, e.g.
+'sin(x)' or 'x^2 -5 5'.
+
+Usage:
+    python3 render.py [JOBS] [-o DIRECTORY] [--format png|svg]
+                      [--workers N] [--size WIDTH HEIGHT] [--dpi DPI]
+"""
+import argparse
+import io
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+# pylint: disable=import-error
+from model.sampler import decimate
+from presenter.presenter import Presenter
+from view import plot_style
+
+FORMATS = ('png', 'svg')
+# The x range of jobs that do not give one, as in GraphWindow
+DEFAULT_RANGE = (-10.0, 10.0)
+# Size of the figures in inches and their resolution
+FIGURE_SIZE = (8.0, 6.0)
+DPI = 100
+# Jobs sent to a worker at once
+JOBS_PER_TASK = 8
+
+# The renderer of a worker process
+_worker_renderer = None  # pylint: disable=invalid-name
+
+
+class PlotRenderer:
+  """ Draws graphs one after another on the same figure. The figure, the
+      grid and the arrows are created once; only the curve and the limits
+      change between graphs. """
+
+  def __init__(self, size=FIGURE_SIZE, dpi=DPI):
+    """ Initializes a new instance of the PlotRenderer class.
+
+    Args:
+        size (tuple[float, float]): The width and height in inches.
+        dpi (float): The resolution in pixels per inch.
+    """
+    self.presenter = Presenter(None)
+    self.figure = Figure(figsize=size, dpi=dpi)
+    FigureCanvasAgg(self.figure)
+    self.axis = self.figure.add_subplot(111)
+    plot_style.add_axis_lines(self.axis)
+    plot_style.add_grid(self.axis)
+    self.arrows = plot_style.add_arrows(self.axis)
+    self.line, = self.axis.plot([], [])
+
+  def render(self, expression, x_range=DEFAULT_RANGE, image_format='png'):
+    """
+    Draws the graph of an expression.
+
+    Args:
+        expression (str): The expression, which may contain the variable x.
+            Invalid expressions give an empty graph.
+        x_range (tuple[float, float]): The ends of the x axis. They are
+            limited to the value area of GraphWindow.
+        image_format (str): One of FORMATS.
+
+    Returns:
+        bytes: The image.
+    """
+    axis = self.axis
+    axis.set_xlim(*x_range)
+    axis.set_autoscaley_on(True)
+    plot_style.check_limits(axis)
+    x_min, x_max = axis.get_xlim()
+    function = self.presenter.compile_expression(expression)
+    samples = self.presenter.sample_function(function, x_min, x_max)
+    # At most four points per pixel column, as in GraphWindow
+    self.line.set_data(*decimate(*samples,
+                                 (x_max - x_min) / max(axis.bbox.width, 1)))
+    axis.relim()
+    axis.autoscale_view(scalex=False)
+    plot_style.check_limits(axis)
+    output = io.BytesIO()
+    self.figure.savefig(output, format=image_format)
+    return output.getvalue()
+
+
+def _init_worker(size, dpi):
+  """ Creates the renderer of a worker process. """
+  global _worker_renderer  # pylint: disable=global-statement
+  _worker_renderer = PlotRenderer(size, dpi)
+
+
+def _render_job(expression, x_range, image_format, path):
+  """ Renders a job with the renderer of the worker and returns the image,
+      or writes it to the path and returns the path. """
+  image = _worker_renderer.render(expression, x_range, image_format)
+  if path is None:
+    return image
+  with open(path, 'wb') as file:
+    file.write(image)
+  return path
+
+
+def render_plots(jobs, image_format='png', output_dir=None, processes=None,
+                 *, size=FIGURE_SIZE, dpi=DPI):
+  """
+  Renders graphs of many expressions in parallel.
+
+  Args:
+      jobs (Iterable[tuple[str, tuple[float, float]]]): The expressions and
+          the x ranges of their graphs.
+      image_format (str): One of FORMATS.
+      output_dir (str, optional): The directory the images are written to,
+          as plot_00000.png and so on in the order of the jobs. Without it
+          the images are returned.
+      processes (int, optional): The number of worker processes. Defaults
+          to the number of CPUs.
+      size (tuple[float, float]): The width and height in inches.
+      dpi (float): The resolution in pixels per inch.
+
+  Returns:
+      list[bytes] | list[str]: The images, or the paths of the files, in
+          the order of the jobs.
+
+  Raises:
+      ValueError: If the format is not supported.
+  """
+  if image_format not in FORMATS:
+    raise ValueError(f'unknown image format {image_format!r}')
+  jobs = list(jobs)
+  expressions = [expression for expression, _ in jobs]
+  ranges = [tuple(x_range) for _, x_range in jobs]
+  paths = [None if output_dir is None else
+           os.path.join(output_dir, f'plot_{index:05d}.{image_format}')
+           for index in range(len(jobs))]
+  processes = min(processes or os.cpu_count() or 1,
+                  -(-len(jobs) // JOBS_PER_TASK))
+  if processes <= 1:
+    _init_worker(size, dpi)
+    return list(map(_render_job, expressions, ranges,
+                    [image_format] * len(jobs), paths))
+  with ProcessPoolExecutor(processes, initializer=_init_worker,
+                           initargs=(size, dpi)) as pool:
+    return list(pool.map(_render_job, expressions, ranges,
+                         [image_format] * len(jobs), paths,
+                         chunksize=JOBS_PER_TASK))
+
+
+def read_jobs(lines):
+  """
+  Parses job lines; empty lines are skipped.
+
+  Args:
+      lines (Iterable[str]): Lines with an expression and optionally the
+          ends of the x range.
+
+  Returns:
+      list[tuple[str, tuple[float, float]]]: The jobs.
+
+  Raises:
+      ValueError: If a line has not one or three fields, or the range is
+          not a pair of numbers.
+  """
+  jobs = []
+  for number, line in enumerate(lines, 1):
+    fields = line.split()
+    if not fields:
+      continue
+    if len(fields) == 1:
+      jobs.append((fields[0], DEFAULT_RANGE))
+    elif len(fields) == 3:
+      jobs.append((fields[0], (float(fields[1]), float(fields[2]))))
+    else:
+      raise ValueError(f'line {number}: expected an expression and '
+                       'optionally two numbers')
+  return jobs
+
+
+def main(argv=None):
+  """
+  Renders the jobs given on the command line.
+
+  Args:
+      argv (list[str], optional): The command line arguments.
+
+  Returns:
+      int: The exit code, 0 on success.
+  """
+  parser = argparse.ArgumentParser(
+    description=__doc__.split('\n\n', maxsplit=1)[0])
+  parser.add_argument('jobs', nargs='?', default='-',
+                      help='file with one job per line, - for stdin')
+  parser.add_argument('-o', '--output-dir', default='.',
+                      help='directory to write the images to')
+  parser.add_argument('--format', choices=FORMATS, default='png',
+                      dest='image_format', help='image format')
+  parser.add_argument('--workers', type=int, default=0,
+                      help='worker processes, 0 for all CPUs')
+  parser.add_argument('--size', type=float, nargs=2, default=FIGURE_SIZE,
+                      metavar=('WIDTH', 'HEIGHT'),
+                      help='size of the images in inches')
+  parser.add_argument('--dpi', type=float, default=DPI,
+                      help='resolution in pixels per inch')
+  args = parser.parse_args(argv)
+  if args.workers < 0:
+    parser.error('--workers must be >= 0')
+
+  # pylint: disable=consider-using-with
+  source = sys.stdin if args.jobs == '-' else open(args.jobs,
+                                                   encoding='utf-8')
+  try:
+    jobs = read_jobs(source)
+  except ValueError as error:
+    parser.error(str(error))
+  finally:
+    if source is not sys.stdin:
+      source.close()
+  os.makedirs(args.output_dir, exist_ok=True)
+  for path in render_plots(jobs, args.image_format, args.output_dir,
+                           args.workers, size=tuple(args.size),
+                           dpi=args.dpi):
+    print(path)
+  return 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -0,0 +1,385 @@
+"""
+This module serves the calculator over HTTP on a TCP port or a Unix socket,
+for local services that would otherwise call the library once per request.
+
+Concurrent requests are queued and coalesced into micro-batches: the first
+request of a batch waits a short window for others, and every batch is
+evaluated with one call of the shared library in a worker thread while the
+event loop keeps accepting requests. The queue is bounded; when it is full
+new requests are rejected with 503 so that clients back off instead of
+piling up latency. Only the model is imported.
+
+Endpoints:
+    POST /evaluate  {"expression": "sin(x)", "x": 1} or
+                    {"expressions": ["1+2", "3*4"], "x": 1}, x is optional
+    GET /stats      latency percentiles, throughput and batch sizes
+
+Usage:
+    python3 server.py [--host HOST] [--port PORT | --unix PATH]
+                      [--window MS] [--max-batch N] [--max-queue N]
+"""
+import argparse
+import asyncio
+import json
+import math
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import numpy as np
+# pylint: disable=import-error
+from model.calculator import Calculator, status_message
+
+# Time the first request of a batch waits for more requests, in seconds
+BATCH_WINDOW = 0.001
+# Largest number of requests evaluated with one call of the library
+MAX_BATCH = 4096
+# Requests waiting for evaluation before new ones are rejected
+MAX_QUEUE = 65536
+# Number of recent requests the latency percentiles are computed from
+LATENCY_SAMPLES = 100_000
+# Largest accepted request body in bytes
+MAX_BODY = 1 << 20
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+           413: 'Payload Too Large', 503: 'Service Unavailable'}
+
+
+class Overloaded(RuntimeError):
+  """ Raised when the queue of a MicroBatcher is full. """
+
+
+class BadRequest(ValueError):
+  """ Raised for requests that cannot be parsed.
+
+  Attributes:
+      status (int): The HTTP status of the response.
+  """
+
+  def __init__(self, message, status=400):
+    super().__init__(message)
+    self.status = status
+
+
+class MicroBatcher:
+  """ Coalesces concurrent evaluation requests into batches that are
+      evaluated with one call of the shared library each.
+  """
+
+  def __init__(self, calculator=None, window=BATCH_WINDOW,
+               max_batch=MAX_BATCH, max_queue=MAX_QUEUE):
+    """ Initializes a new instance of the MicroBatcher class. It must be
+        started inside the event loop that submits the requests.
+
+    Args:
+        calculator (Calculator, optional): The calculator to use.
+        window (float): The time in seconds the first request of a batch
+            waits for others.
+        max_batch (int): The largest number of requests per batch.
+        max_queue (int): The number of waiting requests at which new ones
+            are rejected.
+    """
+    self.calculator = calculator or Calculator()
+    self.window = window
+    self.max_batch = max_batch
+    self.queue = asyncio.Queue(max_queue)
+    # A single thread keeps the batches in order and reuses its context
+    self.executor = ThreadPoolExecutor(max_workers=1)
+    self.task = None
+    self.started = time.perf_counter()
+    self.latencies = deque(maxlen=LATENCY_SAMPLES)
+    self.counters = {'completed': 0, 'rejected': 0, 'batches': 0,
+                     'library_calls': 0}
+
+  def start(self):
+    """ Starts evaluating the queued requests. """
+    self.task = asyncio.get_running_loop().create_task(self.run())
+
+  async def stop(self):
+    """ Stops the batching task and the worker thread. """
+    if self.task is not None:
+      self.task.cancel()
+      await asyncio.gather(self.task, return_exceptions=True)
+    self.executor.shutdown(wait=False, cancel_futures=True)
+
+  async def evaluate(self, expression, x_value=None):
+    """
+    Evaluates an expression as part of the next batch.
+
+    Args:
+        expression (str): The arithmetic expression.
+        x_value (float, optional): The value of the variable x.
+
+    Returns:
+        tuple[float, int]: The value (NaN on error) and the STATUS_* code.
+
+    Raises:
+        Overloaded: If the queue is full.
+    """
+    return (await self.evaluate_many([expression], x_value))[0]
+
+  async def evaluate_many(self, expressions, x_value=None):
+    """
+    Evaluates expressions as part of the next batches. They are queued all
+    at once or not at all, so a rejected request adds no load.
+
+    Args:
+        expressions (list[str]): The arithmetic expressions.
+        x_value (float, optional): The value of the variable x.
+
+    Returns:
+        list[tuple[float, int]]: The values (NaN on error) and the STATUS_*
+            codes in the order of the expressions.
+
+    Raises:
+        Overloaded: If the queue has no room for all of the expressions.
+    """
+    if self.queue.maxsize - self.queue.qsize() < len(expressions):
+      self.counters['rejected'] += len(expressions)
+      raise Overloaded('too many pending requests')
+    loop = asyncio.get_running_loop()
+    futures = []
+    for expression in expressions:
+      futures.append(loop.create_future())
+      self.queue.put_nowait((expression, x_value, futures[-1],
+                             time.perf_counter()))
+    return await asyncio.gather(*futures)
+
+  async def collect(self):
+    """ Waits for a request and returns it together with the requests that
+        arrive within the batch window. """
+    batch = [await self.queue.get()]
+    if self.queue.qsize() < self.max_batch - 1:
+      await asyncio.sleep(self.window)
+    while len(batch) < self.max_batch and not self.queue.empty():
+      batch.append(self.queue.get_nowait())
+    return batch
+
+  async def run(self):
+    """ Evaluates batches until the task is cancelled. """
+    loop = asyncio.get_running_loop()
+    while True:
+      batch = await self.collect()
+      # One library call binds one value of x
+      groups = {}
+      for request in batch:
+        groups.setdefault(request[1], []).append(request)
+      for x_value, requests in groups.items():
+        results, statuses = await loop.run_in_executor(
+          self.executor, self.calculator.calculate_many,
+          [request[0] for request in requests], x_value)
+        self.counters['library_calls'] += 1
+        now = time.perf_counter()
+        for (_, _, future, start), value, status in zip(
+            requests, results.tolist(), statuses.tolist()):
+          # The client may have disconnected in the meantime
+          if not future.done():
+            future.set_result((value, status))
+          self.latencies.append(now - start)
+      self.counters['completed'] += len(batch)
+      self.counters['batches'] += 1
+
+  def stats(self):
+    """
+    Reports the latency and throughput of the requests so far.
+
+    Returns:
+        dict[str, float]: The counters, the pending requests, the mean
+            batch size, the completed requests per second and the p50 and
+            p99 latencies in milliseconds of the recent requests.
+    """
+    stats = dict(self.counters)
+    stats['pending'] = self.queue.qsize()
+    stats['mean_batch'] = stats['completed'] / max(stats['batches'], 1)
+    stats['throughput'] = stats['completed'] / (
+      time.perf_counter() - self.started)
+    if self.latencies:
+      p50, p99 = np.percentile(np.fromiter(self.latencies, dtype=float),
+                               [50, 99])
+      stats['p50_ms'], stats['p99_ms'] = p50 * 1e3, p99 * 1e3
+    return stats
+
+
+def result_row(value, status):
+  """ Returns the JSON object describing the result of an evaluation. """
+  return {'result': value if math.isfinite(value) else None,
+          'status': status_message(status)}
+
+
+async def read_request(reader):
+  """
+  Reads an HTTP/1.1 request.
+
+  Args:
+      reader (asyncio.StreamReader): The connection.
+
+  Returns:
+      tuple[str, str, bytes, bool] | None: The method, the path, the body
+          and whether the connection is kept alive, or None when the client
+          has closed the connection.
+
+  Raises:
+      BadRequest: If the request is malformed or too large.
+  """
+  line = await reader.readline()
+  if not line:
+    return None
+  try:
+    method, path, version = line.decode('latin-1').split()
+  except ValueError:
+    raise BadRequest('malformed request line') from None
+  headers = {}
+  while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+    name, _, value = line.decode('latin-1').partition(':')
+    headers[name.strip().lower()] = value.strip().lower()
+  try:
+    length = int(headers.get('content-length', 0))
+  except ValueError:
+    raise BadRequest('malformed Content-Length') from None
+  if length > MAX_BODY:
+    raise BadRequest('request body too large', 413)
+  body = await reader.readexactly(length) if length > 0 else b''
+  keep_alive = headers.get('connection', '') != 'close' and \
+    version == 'HTTP/1.1'
+  return method, path, body, keep_alive
+
+
+def write_response(writer, status, payload, keep_alive):
+  """ Writes a JSON response to the connection. """
+  body = json.dumps(payload).encode()
+  writer.write(
+    f'HTTP/1.1 {status} {REASONS[status]}\r\n'
+    f'Content-Type: application/json\r\n'
+    f'Content-Length: {len(body)}\r\n'
+    f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'
+    .encode() + body)
+
+
+async def route(batcher, method, path, body):
+  """
+  Handles a parsed request.
+
+  Args:
+      batcher (MicroBatcher): The batcher evaluating the expressions.
+      method (str): The HTTP method.
+      path (str): The requested path.
+      body (bytes): The request body.
+
+  Returns:
+      tuple[int, object]: The HTTP status and the JSON payload.
+
+  Raises:
+      BadRequest: If the body is not a valid evaluation request.
+  """
+  if method == 'GET' and path == '/stats':
+    return 200, batcher.stats()
+  if method != 'POST' or path != '/evaluate':
+    return 404, {'error': 'not found'}
+  try:
+    request = json.loads(body)
+    x_value = None if request.get('x') is None else float(request['x'])
+    if 'expressions' in request:
+      expressions = [str(expression) for expression in request['expressions']]
+    else:
+      expressions = [str(request['expression'])]
+  except (ValueError, TypeError, KeyError, AttributeError):
+    raise BadRequest('expected {"expression": ...} or '
+                     '{"expressions": [...]}') from None
+  try:
+    results = await batcher.evaluate_many(expressions, x_value)
+  except Overloaded as error:
+    return 503, {'error': str(error)}
+  if 'expressions' in request:
+    return 200, {'results': [result_row(*result) for result in results]}
+  return 200, result_row(*results[0])
+
+
+async def handle_connection(batcher, reader, writer):
+  """ Serves the requests of one connection until it is closed. """
+  try:
+    while (request := await read_request(reader)) is not None:
+      method, path, body, keep_alive = request
+      try:
+        status, payload = await route(batcher, method, path, body)
+      except BadRequest as error:
+        status, payload = error.status, {'error': str(error)}
+      write_response(writer, status, payload, keep_alive)
+      await writer.drain()
+      if not keep_alive:
+        break
+  except BadRequest as error:
+    write_response(writer, error.status, {'error': str(error)}, False)
+  except (ConnectionError, asyncio.IncompleteReadError):
+    pass
+  finally:
+    writer.close()
+
+
+async def report(batcher, interval):
+  """ Prints the statistics of the batcher to stderr periodically. """
+  while True:
+    await asyncio.sleep(interval)
+    print(json.dumps(batcher.stats()), file=sys.stderr, flush=True)
+
+
+async def serve(args):
+  """ Runs the server until it is cancelled. """
+  batcher = MicroBatcher(window=args.window / 1e3, max_batch=args.max_batch,
+                         max_queue=args.max_queue)
+  batcher.start()
+  handler = partial(handle_connection, batcher)
+  if args.unix:
+    server = await asyncio.start_unix_server(handler, args.unix)
+  else:
+    server = await asyncio.start_server(handler, args.host, args.port)
+  reporter = asyncio.create_task(report(batcher, args.report)) \
+    if args.report > 0 else None
+  print(f'Serving on {args.unix or f"http://{args.host}:{args.port}"}',
+        file=sys.stderr, flush=True)
+  try:
+    async with server:
+      await server.serve_forever()
+  finally:
+    if reporter is not None:
+      reporter.cancel()
+    await batcher.stop()
+    print(json.dumps(batcher.stats()), file=sys.stderr, flush=True)
+
+
+def main(argv=None):
+  """
+  Starts the server with the options given on the command line.
+
+  Args:
+      argv (list[str], optional): The command line arguments.
+
+  Returns:
+      int: The exit code.
+  """
+  parser = argparse.ArgumentParser(
+    description=__doc__.split('\n\n', maxsplit=1)[0])
+  parser.add_argument('--host', default='127.0.0.1',
+                      help='address to listen on')
+  parser.add_argument('--port', type=int, default=8080,
+                      help='TCP port to listen on')
+  parser.add_argument('--unix', help='Unix socket to listen on instead')
+  parser.add_argument('--window', type=float, default=BATCH_WINDOW * 1e3,
+                      help='milliseconds a batch waits for more requests')
+  parser.add_argument('--max-batch', type=int, default=MAX_BATCH,
+                      help='largest number of requests per library call')
+  parser.add_argument('--max-queue', type=int, default=MAX_QUEUE,
+                      help='pending requests at which new ones get 503')
+  parser.add_argument('--report', type=float, default=0,
+                      help='seconds between statistics on stderr, 0 for off')
+  args = parser.parse_args(argv)
+  try:
+    asyncio.run(serve(args))
+  except KeyboardInterrupt:
+    pass
+  return 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -10,8 +10,35 @@ by zero, invalid expressions, missing operands, invalid characters, invalid
 logarithmic functions, and unbalanced parentheses.
 """
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import importlib.util
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
 import unittest
-from model.calculator import Calculator  # pylint: disable=import-error
+
+import numpy as np
+# pylint: disable=import-error
+from model.calculator import Calculator, CalculationError, format_result, \
+  SHARD_MIN_POINTS, STATUS_OK, STATUS_SYNTAX_ERROR, STATUS_DIVISION_BY_ZERO, \
+  STATUS_DOMAIN_ERROR, STATUS_OVERFLOW_ERROR, BACKENDS, NUMPY_MIN_POINTS, \
+  Backend, NativeBackend, register_backend, INTERVAL_MAYBE_UNDEFINED, \
+  INTERVAL_UNDEFINED, INTERVAL_MAYBE_DISCONTINUOUS
+from model.numpy_backend import NumpyBackend
+from model.cache import LRUCache, SampleCache
+from model.history import HistoryStore
+from model.sampler import adaptive_sample, decimate, value_range, \
+  interval_range, INITIAL_POINTS
+from presenter.presenter import Presenter
+from benchmarks import compare
+from cli import evaluate_stream
+from render import PlotRenderer, read_jobs, render_plots
+from server import MicroBatcher, Overloaded, handle_connection, route
 
 
 class TestSmartCalculator(unittest.TestCase):  # pylint: disable=R0904
@@ -277,5 +304,1120 @@ class TestSmartCalculator(unittest.TestCase):  # pylint: disable=R0904
     self.assertEqual(result, "Error")
 
 
+class TestCompiledExpression(unittest.TestCase):
+  """ A test case for `Calculator.compile` and `CompiledExpression`. """
+
+  def test_evaluate_with_x(self):
+    """ Test that a compiled expression can be evaluated for several x. """
+    compiled = Calculator().compile("x^2+1")
+    self.assertTrue(compiled.is_valid)
+    self.assertEqual(compiled.evaluate(2), "5")
+    self.assertEqual(compiled.evaluate(-3), "10")
+
+  def test_matches_calculate(self):
+    """ Test that evaluation gives the same result as substituting x into
+        the string and calling `calculate`. """
+    calculator = Calculator()
+    expression = "sin(x)*ln(x+4)-xmod2+2^x/(x-5)"
+    compiled = calculator.compile(expression)
+    for x_value in (-3.5, -1, 0, 0.25, 1, 2.75, 5, 7):
+      self.assertEqual(compiled.evaluate(x_value), calculator.calculate(
+        expression.replace("x", "(" + str(x_value) + ")")))
+
+  def test_runtime_error(self):
+    """ Test that errors depending on the value of x are reported per call.
+    """
+    compiled = Calculator().compile("1/x")
+    self.assertEqual(compiled.evaluate(0), "Error")
+    self.assertEqual(compiled.evaluate(4), "0.25")
+
+  def test_invalid_expression(self):
+    """ Test that an invalid expression always evaluates to "Error". """
+    compiled = Calculator().compile("2x+3")
+    self.assertFalse(compiled.is_valid)
+    self.assertEqual(compiled.evaluate(1), "Error")
+
+  def test_evaluate_array(self):
+    """ Test that array evaluation matches scalar evaluation and marks
+        errors with NaN. """
+    compiled = Calculator().compile("ln(x)+1/(x-2)")
+    x_values = np.linspace(-3, 5, 81)
+    result = compiled.evaluate_array(x_values)
+    self.assertEqual(result.shape, x_values.shape)
+    for x_value, y_value in zip(x_values, result):
+      expected = compiled.evaluate(x_value)
+      if expected == "Error":
+        self.assertTrue(np.isnan(y_value))
+      else:
+        self.assertAlmostEqual(y_value, float(expected), places=6)
+
+  def test_evaluate_array_invalid(self):
+    """ Test that an invalid expression gives an array of NaN. """
+    result = Calculator().evaluate_array("sin(", np.arange(4.0))
+    self.assertTrue(np.isnan(result).all())
+
+  def test_calculate_rejects_x(self):
+    """ Test that `calculate` still reports "Error" for the variable x. """
+    self.assertEqual(Calculator().calculate("x+1"), "Error")
+
+
+class TestCalculateMany(unittest.TestCase):
+  """ A test case for `Calculator.calculate_many`. """
+
+  def test_matches_calculate(self):
+    """ Test that batch results agree with `calculate` for each expression.
+    """
+    calculator = Calculator()
+    expressions = ["1+2", "10/0", "sin(0.5)^2", "2x+3", "", "(1E5/10-1E(-3))",
+                   "ln(-1)", "7mod3", "-2*3+5", "1#2"]
+    results, statuses = calculator.calculate_many(expressions)
+    self.assertEqual(len(results), len(expressions))
+    for expression, value, status in zip(expressions, results, statuses):
+      expected = calculator.calculate(expression)
+      if expected == "Error":
+        self.assertNotEqual(status, STATUS_OK)
+        self.assertTrue(np.isnan(value))
+      else:
+        self.assertEqual(status, STATUS_OK)
+        self.assertAlmostEqual(value, float(expected), places=6)
+
+  def test_empty_batch(self):
+    """ Test that an empty batch returns empty arrays. """
+    results, statuses = Calculator().calculate_many([])
+    self.assertEqual(len(results), 0)
+    self.assertEqual(len(statuses), 0)
+
+  def test_non_ascii_expression(self):
+    """ Test that a non-ASCII expression fails only its own entry. """
+    _, statuses = Calculator().calculate_many(["2+2", "2\u00d72", "3"])
+    self.assertEqual(list(statuses == STATUS_OK), [True, False, True])
+
+
+class TestCalculateValue(unittest.TestCase):
+  """ A test case for the numeric result path. """
+
+  def test_full_precision(self):
+    """ Test that the value is not rounded to 7 decimal places. """
+    self.assertEqual(Calculator().calculate_value("1/3"), 1 / 3)
+
+  def test_error_codes(self):
+    """ Test that each kind of failure reports its own status. """
+    calculator = Calculator()
+    cases = {"2x+3": STATUS_SYNTAX_ERROR, "10/0": STATUS_DIVISION_BY_ZERO,
+             "5mod0": STATUS_DIVISION_BY_ZERO, "sqrt(-1)": STATUS_DOMAIN_ERROR,
+             "10^400": STATUS_OVERFLOW_ERROR}
+    for expression, status in cases.items():
+      with self.assertRaises(CalculationError) as context:
+        calculator.calculate_value(expression)
+      self.assertEqual(context.exception.status, status)
+
+  def test_format_matches_calculate(self):
+    """ Test that formatting the value gives the string `calculate` returns.
+    """
+    calculator = Calculator()
+    for expression in ("1+2", "-2*3+5", "1/3", "-1/3", "(1E5/10-1E(-3))",
+                       "sin(0.5)+cos(0.5)+tan(0.5)", "-0.00000001",
+                       "123456789.987654321", "2^0.5", "ln(10)*1E8"):
+      self.assertEqual(format_result(calculator.calculate_value(expression)),
+                       calculator.calculate(expression))
+
+  def test_compiled_value(self):
+    """ Test that a compiled expression reports errors per value of x. """
+    compiled = Calculator().compile("ln(x)")
+    self.assertAlmostEqual(compiled.evaluate_value(1), 0)
+    with self.assertRaises(CalculationError) as context:
+      compiled.evaluate_value(-1)
+    self.assertEqual(context.exception.status, STATUS_DOMAIN_ERROR)
+
+
+class TestCalculatorContext(unittest.TestCase):
+  """ Tests for calculator contexts owned by threads. """
+
+  def setUp(self):
+    self.calc = Calculator()
+
+  def test_context_results(self):
+    """ Test that a context gives the results of the calculator. """
+    context = self.calc.create_context()
+    for expression in ("2+3*4", "sin(1)", "1/0", "2+"):
+      self.assertEqual(context.calculate(expression),
+                       self.calc.calculate(expression))
+    self.assertEqual(context.calculate_value("2^10"), 1024)
+    with self.assertRaises(CalculationError):
+      context.calculate_value("ln(0-1)")
+
+  def test_contexts_in_threads(self):
+    """ Test that threads with their own contexts do not interfere. """
+    expressions = [f"{i}*2+sqrt({i})" for i in range(200)]
+    expected = [self.calc.calculate(expression) for expression in expressions]
+
+    def work(_):
+      context = self.calc.create_context()
+      return [context.calculate(expression) for expression in expressions]
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+      for result in pool.map(work, range(8)):
+        self.assertEqual(result, expected)
+
+  def test_evaluate_concurrent_matches_sequential(self):
+    """ Test that chunks evaluated by many threads come back in order and
+        equal to the sequential results. """
+    expressions = [("sqrt(", "1/", "ln(", "")[i % 4] + f"{i % 50}-{i % 7}"
+                   for i in range(5000)]
+    expected, expected_statuses = self.calc.calculate_many(expressions)
+    for _ in range(5):
+      results, statuses = self.calc.evaluate_concurrent(
+        expressions, workers=8, chunk_size=97)
+      np.testing.assert_array_equal(results, expected)
+      np.testing.assert_array_equal(statuses, expected_statuses)
+
+  def test_evaluate_concurrent_small_input(self):
+    """ Test that a single chunk is evaluated in the calling thread. """
+    results, statuses = self.calc.evaluate_concurrent(["1+1", "1/0"])
+    np.testing.assert_array_equal(results[:1], [2])
+    np.testing.assert_array_equal(statuses,
+                                  [STATUS_OK, STATUS_DIVISION_BY_ZERO])
+
+  def test_optimized_arrays_match_batches(self):
+    """ Test that compiled expressions, which are optimized, agree with
+        expressions evaluated one by one. """
+    x_values = np.linspace(-3, 3, 13)
+    for expression in ["sin(Pi/4)*x", "sin(x)^2+sin(x)", "x^3-2*x^2+x-1",
+                       "(x+1)^4-(x+1)^2", "1/(x-1)+ln(x)/(x-1)"]:
+      expected = np.array([self.calc.calculate_many([expression], x)[0][0]
+                           for x in x_values])
+      np.testing.assert_array_equal(
+        self.calc.evaluate_array(expression, x_values), expected)
+
+  def test_calculate_many_with_x(self):
+    """ Test that batches bind x only when a value is given. """
+    expressions = ["x^2+1", "2*3", "ln(x-3)"]
+    _, statuses = self.calc.calculate_many(expressions)
+    np.testing.assert_array_equal(
+      statuses, [STATUS_SYNTAX_ERROR, STATUS_OK, STATUS_SYNTAX_ERROR])
+    results, statuses = self.calc.evaluate_concurrent(expressions, x_value=2)
+    np.testing.assert_array_equal(results[:2], [5, 6])
+    np.testing.assert_array_equal(
+      statuses, [STATUS_OK, STATUS_OK, STATUS_DOMAIN_ERROR])
+
+
+class TestProfiling(unittest.TestCase):
+  """ Tests for the timing instrumentation of the calculator. """
+
+  def setUp(self):
+    self.calc = Calculator()
+    self.calc.reset_stats()
+
+  def tearDown(self):
+    self.calc.set_profiling(False)
+    self.calc.reset_stats()
+
+  def test_stages_are_counted(self):
+    """ Test that every stage of calculate is counted while profiling. """
+    self.calc.set_profiling()
+    self.assertEqual(self.calc.calculate("2+2"), "4")
+    self.assertEqual(self.calc.calculate("1/0"), "Error")
+    self.calc.compile("x*2").evaluate_array(np.zeros(10))
+    stats = self.calc.stats()
+    self.assertEqual(stats["compile"]["calls"], 3)
+    self.assertEqual(stats["evaluate"]["calls"], 12)
+    self.assertEqual(stats["format"]["calls"], 1)
+    self.assertEqual(stats["python_call"]["calls"], 2)
+    self.assertGreater(stats["python_call"]["ns"], stats["format"]["ns"])
+
+  def test_disabled_and_reset(self):
+    """ Test that nothing is recorded while profiling is off and that the
+        snapshot can be reset. """
+    self.calc.calculate("2+2")
+    self.assertEqual(self.calc.stats()["compile"]["calls"], 0)
+    self.calc.set_profiling()
+    self.calc.calculate("2+2")
+    self.calc.reset_stats()
+    self.assertTrue(all(stage["calls"] == 0
+                        for stage in self.calc.stats().values()))
+
+
+class TestEvaluateParallel(unittest.TestCase):
+  """ Tests for evaluating an expression with a process pool. """
+
+  def setUp(self):
+    self.calc = Calculator()
+
+  def test_matches_evaluate_array(self):
+    """ Test that the shards are put back in order. """
+    x_values = np.linspace(-10, 10, 3 * SHARD_MIN_POINTS + 7)
+    result = self.calc.evaluate_parallel("sqrt(x)+1/x", x_values,
+                                         processes=2)
+    np.testing.assert_array_equal(
+      result, self.calc.evaluate_array("sqrt(x)+1/x", x_values))
+
+  def test_small_input_keeps_shape(self):
+    """ Test that a small array is evaluated in the calling process. """
+    x_values = np.arange(6.0).reshape(2, 3)
+    result = self.calc.evaluate_parallel("x*2", x_values, processes=4)
+    np.testing.assert_array_equal(result, x_values * 2)
+
+  def test_invalid_expression(self):
+    """ Test that an invalid expression gives NaN everywhere. """
+    x_values = np.zeros(2 * SHARD_MIN_POINTS)
+    result = self.calc.evaluate_parallel("x+", x_values, processes=2)
+    self.assertTrue(np.isnan(result).all())
+
+
+class TestBackends(unittest.TestCase):
+  """ Tests for the evaluation backends and their automatic choice. """
+
+  EXPRESSIONS = ["sin(x)*x", "2E2*xmod7", "-x^2+3*x-1", "(+x)/(x-1)",
+                 "sqrt(x)*ln(x)+cos(x)^2", "tan(x)", "log(x)-acos(x/9)",
+                 "asin(1/x)+atan(x)", "1--x", "((x", "x+", "sinx", "2x",
+                 "x)", "xmod0", "Pi*E3", "1.2.3*x", "x" * 256, "ln(0)^0.5",
+                 "(0-10^400)^0.5", "(x-10^400)^(0-0.5)"]
+
+  def setUp(self):
+    self.native = NativeBackend()
+    self.numpy = NumpyBackend()
+
+  def test_numpy_matches_native(self):
+    """ Test that both backends accept the same expressions and give the
+        same values and errors. """
+    x_values = np.concatenate([np.linspace(-10, 10, 401),
+                               [np.pi / 2, 0, 1, np.nan, np.inf]])
+    for expression in self.EXPRESSIONS:
+      native = self.native.compile(expression)
+      vectorized = self.numpy.compile(expression)
+      self.assertEqual(vectorized.is_valid, native.is_valid, expression)
+      np.testing.assert_allclose(vectorized.evaluate_array(x_values),
+                                 native.evaluate_array(x_values),
+                                 rtol=1e-12, err_msg=expression)
+      for x_value in (None, 0.0, 2.5):
+        results, statuses = self.numpy.calculate_many([expression], x_value)
+        expected, expected_statuses = self.native.calculate_many(
+          [expression], x_value)
+        np.testing.assert_allclose(results, expected, rtol=1e-12)
+        np.testing.assert_array_equal(statuses, expected_statuses)
+
+  def test_numpy_calculator(self):
+    """ Test that a calculator works without the shared library. """
+    calc = Calculator("numpy")
+    self.assertIsNone(calc.lib)
+    self.assertEqual(calc.calculate("2+2*2"), "6")
+    self.assertEqual(calc.calculate("x+1"), "Error")
+    self.assertEqual(calc.calculate_value("1/3"), 1 / 3)
+    with self.assertRaises(CalculationError) as context:
+      calc.create_context().calculate_value("5mod0")
+    self.assertEqual(context.exception.status, STATUS_DIVISION_BY_ZERO)
+    compiled = calc.compile("ln(x)")
+    self.assertEqual(compiled.evaluate(1), "0")
+    with self.assertRaises(CalculationError) as context:
+      compiled.evaluate_value(-1)
+    self.assertEqual(context.exception.status, STATUS_DOMAIN_ERROR)
+    self.assertEqual(calc.stats()["compile"]["calls"], 0)
+
+  def test_automatic_choice(self):
+    """ Test that large arrays are evaluated with NumPy and small ones and
+        single values with the library. """
+    calc = Calculator()
+    self.assertIs(calc.array_backend(NUMPY_MIN_POINTS - 1), calc.backend)
+    self.assertEqual(calc.array_backend(NUMPY_MIN_POINTS).name, "numpy")
+    self.assertEqual(Calculator("native").array_backend(10 ** 6).name,
+                     "native")
+    compiled = calc.compile("1/x")
+    x_values = np.linspace(-1, 1, NUMPY_MIN_POINTS + 1)
+    np.testing.assert_allclose(compiled.evaluate_array(x_values),
+                               1 / np.where(x_values == 0, np.nan, x_values))
+    self.assertEqual(compiled.evaluate(4), "0.25")
+
+  def test_ill_conditioned_values(self):
+    """ Test that the backends differ for functions of huge arguments and
+        that the curves of the presenter use one backend for all sizes. """
+    x_values = np.linspace(-7, 7, 2001)
+    expression = "sin(102210Ex"
+    native = self.native.compile(expression).evaluate_array(x_values)
+    vectorized = self.numpy.compile(expression).evaluate_array(x_values)
+    np.testing.assert_array_equal(np.isnan(vectorized), np.isnan(native))
+    self.assertFalse(np.array_equal(vectorized, native))
+    function = Presenter(None).compile_expression(expression)
+    np.testing.assert_array_equal(function.evaluate_array(x_values), native)
+    for x_value in x_values[::250]:
+      np.testing.assert_array_equal(
+        function.evaluate_array(np.array([x_value])),
+        native[x_values == x_value])
+
+  def test_backend_interface(self):
+    """ Test that a backend must implement the evaluation methods and gets
+        the default context. """
+
+    class Partial(Backend):  # pylint: disable=abstract-method
+      """ A backend without compile and calculate_many. """
+
+      def calculate(self, expression):
+        return expression
+
+      def calculate_value(self, expression):
+        return 0.0
+
+    with self.assertRaises(TypeError):
+      Backend()  # pylint: disable=abstract-class-instantiated
+    with self.assertRaises(TypeError):
+      Partial()  # pylint: disable=abstract-class-instantiated
+    self.assertIs(self.numpy.create_context(), self.numpy)
+
+  def test_registry(self):
+    """ Test that backends are chosen by name, also from the environment,
+        and that new ones can be registered. """
+    with self.assertRaises(ValueError):
+      Calculator("gpu")
+    register_backend("test", NumpyBackend)
+    try:
+      os.environ["SMARTCALC_BACKEND"] = "test"
+      self.assertIsInstance(Calculator().backend, NumpyBackend)
+    finally:
+      del os.environ["SMARTCALC_BACKEND"]
+      del BACKENDS["test"]
+
+
+class TestSurface(unittest.TestCase):
+  """ Tests for the evaluation of expressions of x and y on grids. """
+
+  def test_grid_matches_points(self):
+    """ Test that every grid value, in any chunking, is the value at its
+        point, with errors as NaN. """
+    surface = Calculator("native").compile_surface("sqrt(x)/y+x*y^2")
+    x_values = np.linspace(-2, 2, 9)
+    y_values = np.linspace(-1, 3, 7)
+    grid = surface.evaluate_grid(x_values, y_values)
+    self.assertEqual(grid.shape, (7, 9))
+    for i, y_value in enumerate(y_values):
+      for j, x_value in enumerate(x_values):
+        try:
+          expected = surface.evaluate_value(x_value, y_value)
+        except CalculationError:
+          expected = np.nan
+        np.testing.assert_equal(grid[i, j], expected)
+    np.testing.assert_array_equal(
+      surface.evaluate_grid(x_values, y_values, chunk_points=10), grid)
+
+  def test_variables(self):
+    """ Test that y is a variable of surfaces only. """
+    calc = Calculator()
+    self.assertFalse(calc.compile("y").is_valid)
+    self.assertEqual(calc.calculate("y+1"), "Error")
+    self.assertTrue(calc.compile_surface("x*y+sin(y)").is_valid)
+    for expression in ("xy", "y(", "z"):
+      surface = calc.compile_surface(expression)
+      self.assertFalse(surface.is_valid, expression)
+      self.assertTrue(np.isnan(surface.evaluate_grid([1], [1])).all())
+    self.assertEqual(calc.compile_surface("2^y").evaluate_value(5, 3), 8)
+
+  def test_sample_surface(self):
+    """ Test that the rows of a sampled grid go with y. """
+    presenter = Presenter(None)
+    x_values, y_values, grid = presenter.sample_surface(
+      presenter.compile_surface("x-10*y"), (0, 1), (0, 2), (2, 3))
+    np.testing.assert_array_equal(x_values, [0, 1])
+    np.testing.assert_array_equal(y_values, [0, 1, 2])
+    np.testing.assert_array_equal(grid, [[0, 1], [-10, -9], [-20, -19]])
+
+  def test_value_range_ignores_poles(self):
+    """ Test that the values next to a pole do not stretch the range. """
+    values = np.concatenate([np.linspace(-1, 1, 1000), [1e9, np.nan]])
+    low, high = value_range(values)
+    self.assertEqual(low, -1)
+    self.assertLess(high, 10)
+    self.assertEqual(value_range(np.array([np.nan])), (-1.0, 1.0))
+
+
+class TestAdaptiveSample(unittest.TestCase):
+  """ A test case for `adaptive_sample`. """
+
+  @staticmethod
+  def counted(expression):
+    """ Returns a vectorized function of the expression and a list holding
+        the number of evaluations made through it. """
+    compiled = Calculator().compile(expression)
+    count = [0]
+
+    def function(x_values):
+      count[0] += x_values.size
+      return compiled.evaluate_array(x_values)
+
+    return function, count
+
+  def test_straight_line(self):
+    """ Test that a straight line is not refined at all. """
+    function, count = self.counted("2*x+1")
+    x_coord, y_coord = adaptive_sample(function, -10, 10)
+    self.assertEqual(count[0], INITIAL_POINTS)
+    np.testing.assert_allclose(y_coord, 2 * x_coord + 1)
+
+  def test_smooth_curve_accuracy(self):
+    """ Test that the polyline stays close to a smooth curve with far fewer
+        evaluations than a fixed 1000-point grid. """
+    function, count = self.counted("sin(x)")
+    x_coord, y_coord = adaptive_sample(function, -10, 10, (-1, 1))
+    self.assertLess(count[0], 500)
+    x_fine = np.linspace(-10, 10, 10001)
+    error = np.abs(np.interp(x_fine, x_coord, y_coord) - np.sin(x_fine))
+    self.assertLess(error.max(), 0.01)
+
+  def test_breaks_at_poles(self):
+    """ Test that the line is broken at every pole of tan(x) and that no
+        segment joins the two sides of a pole. """
+    function, count = self.counted("tan(x)")
+    x_coord, y_coord = adaptive_sample(function, -5, 5, (-10, 10),
+                                       budget=1500)
+    self.assertLessEqual(count[0], 1500)
+    for pole in (-np.pi * 1.5, -np.pi / 2, np.pi / 2, np.pi * 1.5):
+      index = np.searchsorted(x_coord, pole)
+      self.assertTrue(np.isnan(y_coord[index - 1:index + 1]).any())
+
+  def test_domain_edge(self):
+    """ Test that samples are concentrated at the edge of the domain. """
+    function, _ = self.counted("sqrt(x)")
+    x_coord, y_coord = adaptive_sample(function, -5, 5)
+    first_defined = x_coord[np.isfinite(y_coord)].min()
+    self.assertLess(first_defined, 1e-3)
+    self.assertTrue(np.all(np.diff(x_coord) > 0))
+
+  def test_decimate_keeps_column_extremes(self):
+    """ Test that decimation leaves at most four points per pixel column
+        with the extremes of every column. """
+    x_coord = np.linspace(0, 10, 100001)
+    y_coord = np.sin(x_coord * 300) * x_coord
+    x_kept, y_kept = decimate(x_coord, y_coord, 0.1)
+    self.assertLessEqual(x_kept.size, 4 * 101)
+    self.assertTrue(np.all(np.diff(x_kept) > 0))
+    self.assertEqual((x_kept[0], x_kept[-1]), (0, 10))
+    columns = np.floor(x_coord / 0.1)
+    kept_columns = np.floor(x_kept / 0.1)
+    for column in (0, 37, 99):
+      self.assertEqual(y_kept[kept_columns == column].min(),
+                       y_coord[columns == column].min())
+      self.assertEqual(y_kept[kept_columns == column].max(),
+                       y_coord[columns == column].max())
+
+  def test_decimate_keeps_breaks(self):
+    """ Test that every break survives decimation as a single NaN and that
+        sparse samples are left alone. """
+    x_coord = np.linspace(-10, 10, 20001)
+    y_coord = x_coord ** 2
+    y_coord[(x_coord > -1) & (x_coord < 1)] = np.nan
+    y_coord[15000] = np.nan
+    x_kept, y_kept = decimate(x_coord, y_coord, 0.05)
+    self.assertEqual(np.isnan(y_kept).sum(), 2)
+    self.assertTrue(np.all(np.isnan(np.interp([0, 5], x_kept, y_kept))))
+    x_sparse = np.linspace(-10, 10, 50)
+    self.assertIs(decimate(x_sparse, x_sparse, 0.05)[0], x_sparse)
+
+
+class TestInterval(unittest.TestCase):
+  """ Tests for the interval evaluation of expressions. """
+
+  def bounds(self, expression, x_low, x_high):
+    """ Returns the bounds and flags of an expression on one interval
+        after checking them against the values at many of its points. """
+    compiled = Calculator("native").compile(expression)
+    low, high, flags = (value[0] for value in compiled.evaluate_interval(
+      np.array([x_low]), np.array([x_high])))
+    values = compiled.evaluate_array(np.linspace(x_low, x_high, 1001))
+    defined = values[np.isfinite(values)]
+    if defined.size:
+      self.assertFalse(flags & INTERVAL_UNDEFINED, expression)
+      self.assertGreaterEqual(defined.min(), low, expression)
+      self.assertLessEqual(defined.max(), high, expression)
+    if defined.size < values.size:
+      self.assertTrue(flags & INTERVAL_MAYBE_UNDEFINED, expression)
+    return low, high, flags
+
+  def test_bounds_hold(self):
+    """ Test that the bounds hold every value and that every error is
+        flagged. """
+    for expression in ("sin(x)*x^2", "cos(3*x)-x", "tan(x)", "1/(x-1)",
+                       "sqrt(x)+ln(x)", "log(x^2)", "asin(x/3)", "acos(x)",
+                       "atan(x)^3", "xmod1.5", "x^x", "(-8)^x", "2^(1/x)",
+                       "sqrt(-x)^0", "(x-x)/x", "tan(x)^2", "10^x"):
+      for x_low, x_high in ((-3, 3), (0.2, 0.7), (-1, 0), (1, 1), (1.5, 1.6),
+                            (-0.5, 2.5)):
+        self.bounds(expression, x_low, x_high)
+
+  def test_flags(self):
+    """ Test the bounds and flags at poles and the edges of domains. """
+    low, high, flags = self.bounds("tan(x)", 1, 2)
+    self.assertEqual((low, high), (-np.inf, np.inf))
+    self.assertTrue(flags & INTERVAL_MAYBE_DISCONTINUOUS)
+    self.assertEqual(self.bounds("tan(x)", -1, 1)[2], 0)
+    self.assertTrue(self.bounds("1/x", -1, 1)[2] &
+                    INTERVAL_MAYBE_DISCONTINUOUS)
+    self.assertTrue(self.bounds("xmod3", 2, 4)[2] &
+                    INTERVAL_MAYBE_DISCONTINUOUS)
+    self.assertEqual(self.bounds("xmod3", 0.5, 2)[2], 0)
+    low, high, flags = self.bounds("sqrt(x)", -1, 4)
+    self.assertEqual(flags, INTERVAL_MAYBE_UNDEFINED)
+    np.testing.assert_allclose((low, high), (0, 2))
+    low, high, flags = self.bounds("sqrt(x)", -2, -1)
+    self.assertTrue(flags & INTERVAL_UNDEFINED)
+    self.assertTrue(np.isnan(low) and np.isnan(high))
+    self.assertTrue(self.bounds("1/0", 0, 1)[2] & INTERVAL_UNDEFINED)
+    self.assertTrue(self.bounds("10^400", 0, 1)[2] & INTERVAL_UNDEFINED)
+    self.assertTrue(self.bounds("1/ln(0)", 0, 1)[2] == 0)
+    invalid = Calculator().compile("x+").evaluate_interval([0], [1])
+    self.assertTrue(invalid[2][0] & INTERVAL_UNDEFINED)
+
+  def test_backends_agree(self):
+    """ Test that every kind of compiled expression gives the bounds of the
+        NumPy backend. """
+    x_low, x_high = np.linspace(-5, 4, 10), np.linspace(-4, 5, 10)
+    expected = NumpyBackend().compile("sqrt(x)/tan(x)").evaluate_interval(
+      x_low, x_high)
+    for backend in ("native", "numpy", "auto"):
+      compiled = Calculator(backend).compile("sqrt(x)/tan(x)")
+      compiled.evaluate_array(np.zeros(NUMPY_MIN_POINTS))
+      for actual, wanted in zip(compiled.evaluate_interval(x_low, x_high),
+                                expected):
+        np.testing.assert_array_equal(actual, wanted)
+
+  def test_interval_range(self):
+    """ Test that the range of a continuous function holds its values and
+        that functions with poles or errors have none. """
+    compiled = Calculator().compile("x^3-x")
+    low, high = interval_range(compiled.evaluate_interval, -2, 2)
+    values = compiled.evaluate_array(np.linspace(-2, 2, 1001))
+    self.assertLessEqual(low, values.min())
+    self.assertGreaterEqual(high, values.max())
+    self.assertLess(high - low, 1.1 * (values.max() - values.min()))
+    for expression in ("tan(x)", "sqrt(x)", "1/x"):
+      self.assertIsNone(interval_range(
+        Calculator().compile(expression).evaluate_interval, -2, 2))
+
+  def test_sampler_breaks_every_pole(self):
+    """ Test that poles between close samples are broken, that steep
+        continuous curves are not, and that fewer values are evaluated. """
+    compiled = Calculator().compile("1/sin(x)")
+    function, _ = TestAdaptiveSample.counted("1/sin(x)")
+    x_coord, y_coord = adaptive_sample(function, -10, 10, (-1e5, 1e5),
+                                       interval=compiled.evaluate_interval)
+    for pole in np.pi * np.arange(-3, 4):
+      index = np.searchsorted(x_coord, pole)
+      self.assertTrue(np.isnan(y_coord[index - 1:index + 1]).any(), pole)
+    compiled = Calculator().compile("atan(10^9*x)")
+    y_coord = adaptive_sample(compiled.evaluate_array, -10, 10,
+                              interval=compiled.evaluate_interval)[1]
+    self.assertFalse(np.isnan(y_coord).any())
+    for expression in ("sqrt(x)", "tan(x)", "xmod3"):
+      plain, plain_count = TestAdaptiveSample.counted(expression)
+      adaptive_sample(plain, -10, 10)
+      function, count = TestAdaptiveSample.counted(expression)
+      adaptive_sample(function, -10, 10, interval=Calculator().compile(
+        expression).evaluate_interval)
+      self.assertLess(count[0], plain_count[0], expression)
+
+
+class TestSampleCache(unittest.TestCase):
+  """ A test case for `LRUCache` and `SampleCache`. """
+
+  def test_lru_eviction(self):
+    """ Test that the least recently used entries are evicted first once
+        the memory limit is exceeded. """
+    cache = LRUCache(max_bytes=30)
+    cache.put("a", 1, 10)
+    cache.put("b", 2, 10)
+    cache.put("c", 3, 10)
+    self.assertEqual(cache.get("a"), 1)
+    cache.put("d", 4, 10)
+    self.assertNotIn("b", cache)
+    self.assertEqual([cache.get(key) for key in "acd"], [1, 3, 4])
+    self.assertEqual(cache.nbytes, 30)
+    cache.put("e", 5, 100)
+    self.assertNotIn("e", cache)
+
+  def test_lru_peek(self):
+    """ Test that peeking neither counts nor marks the entry as used. """
+    cache = LRUCache(max_bytes=20)
+    cache.put("a", 1, 10)
+    cache.put("b", 2, 10)
+    self.assertEqual((cache.peek("a"), cache.peek("c", 0)), (1, 0))
+    self.assertEqual((cache.hits, cache.misses), (0, 0))
+    cache.put("c", 3, 10)
+    self.assertNotIn("a", cache)
+
+  def test_lru_entry_limit_and_stats(self):
+    """ Test the limit for the number of entries and the statistics. """
+    cache = LRUCache(max_bytes=1000, max_entries=2)
+    cache.put("a", 1, 10)
+    cache.put("b", 2, 10)
+    cache.put("c", 3, 10)
+    self.assertEqual(cache.get("a"), None)
+    self.assertEqual(cache.get("c"), 3)
+    cache.discard("c")
+    self.assertEqual(cache.stats(), {
+      "hits": 1, "misses": 1, "evictions": 1, "hit_rate": 0.5,
+      "entries": 1, "nbytes": 10})
+
+  def test_pan_evaluates_only_new_tiles(self):
+    """ Test that an overlapping range reuses cached tiles and that the
+        samples are the values of the function. """
+    compiled = Calculator().compile("sin(x)*x")
+    evaluated = []
+
+    def function(x_values):
+      evaluated.append(x_values.size)
+      return compiled.evaluate_array(x_values)
+
+    cache = SampleCache(tile_points=16)
+    level = cache.grid_level(-10, 10, 64)
+    x_coord, y_coord = cache.samples(function, "sin(x)*x", level, -10, 10)
+    first = sum(evaluated)
+    self.assertLessEqual(x_coord[0], -10)
+    self.assertGreaterEqual(x_coord[-1], 10)
+    np.testing.assert_array_equal(y_coord, compiled.evaluate_array(x_coord))
+
+    x_coord, y_coord = cache.samples(function, "sin(x)*x", level, -8, 12)
+    self.assertLess(sum(evaluated) - first, first / 4)
+    np.testing.assert_array_equal(y_coord, compiled.evaluate_array(x_coord))
+
+  def test_update_keeps_refined_samples(self):
+    """ Test that samples added to a tile are returned for later ranges. """
+    cache = SampleCache(tile_points=16)
+    level = cache.grid_level(0, 1, 16)
+    cache.samples(np.square, "x^2", level, 0, 1)
+    lookups = (cache.tiles.hits, cache.tiles.misses)
+    cache.update("x^2", level, np.array([0.03125]), np.array([0.0009765625]))
+    self.assertEqual((cache.tiles.hits, cache.tiles.misses), lookups)
+    x_coord, _ = cache.samples(np.square, "x^2", level, 0.01, 1.01)
+    self.assertIn(0.03125, x_coord)
+
+
+class TestResultCache(unittest.TestCase):
+  """ Tests for the cache of formatted results in the presenter. """
+
+  def test_repeated_results_hit_cache(self):
+    """ Test that the result is cached per expression and value of x. """
+    presenter = Presenter(None, cache_results=True)
+    self.assertEqual(presenter.format_value("2+3"), "5")
+    self.assertEqual(presenter.format_value("2+3", 7.0), "5")
+    self.assertEqual(presenter.format_value("x*2", 1.5), "3")
+    self.assertEqual(presenter.format_value("x*2", 2.0), "4")
+    self.assertEqual(presenter.format_value("1/0"), "Error")
+    self.assertEqual(presenter.format_value("1/0"), "Error")
+    stats = presenter.result_cache.stats()
+    self.assertEqual((stats["hits"], stats["misses"]), (2, 4))
+    presenter.invalidate_results()
+    self.assertEqual(len(presenter.result_cache), 0)
+
+  def test_disabled_by_default(self):
+    """ Test that results are not cached unless requested. """
+    presenter = Presenter(None)
+    self.assertEqual(presenter.format_value("2+3"), "5")
+    self.assertIsNone(presenter.result_cache)
+
+
+class TestBenchmarks(unittest.TestCase):
+  """ Tests for the comparison of benchmark results with the baseline. """
+
+  def test_compare_reports_only_regressions(self):
+    """ Test that only metrics slower than the threshold are reported. """
+    baseline = {"fast": 1.0, "slow": 1.0, "removed": 1.0}
+    results = {"fast": 0.5, "slow": 1.3, "new": 9.0}
+    self.assertEqual(compare(results, baseline, 0.25), [("slow", 1.0, 1.3)])
+    self.assertEqual(compare(results, baseline, 0.5), [])
+
+
+class TestCli(unittest.TestCase):
+  """ Tests for the headless evaluation of expression streams. """
+
+  LINES = ["1+2\n", "sin(x)\n", "\n", "1/0\n", "2^10"]
+
+  def test_formats_keep_input_order(self):
+    """ Test that every line gives one row in order, across chunks. """
+    output = io.StringIO()
+    failed = evaluate_stream(iter(self.LINES), output, "text", workers=2,
+                             chunk_size=2)
+    self.assertEqual(output.getvalue().split(),
+                     ["3", "Error", "Error", "Error", "1024"])
+    self.assertEqual(failed, 3)
+
+    output = io.StringIO()
+    evaluate_stream(self.LINES, output, "csv", x_value=0, chunk_size=1)
+    self.assertEqual(output.getvalue().splitlines(), [
+      "expression,result,status", "1+2,3,ok", "sin(x),0,ok",
+      ",Error,syntax error", "1/0,Error,division by zero", "2^10,1024,ok"])
+
+    output = io.StringIO()
+    evaluate_stream(self.LINES, output, "ndjson", x_value=0)
+    rows = [json.loads(line) for line in output.getvalue().splitlines()]
+    self.assertEqual(rows[3], {"expression": "1/0", "result": None,
+                               "status": "division by zero"})
+    self.assertEqual([row["result"] for row in rows],
+                     [3, 0, None, None, 1024])
+
+  def test_does_not_import_gui(self):
+    """ Test that the command line runs without PyQt6 and matplotlib. """
+    code = ("import sys, cli; cli.main(['-x', '3']); "
+            "print(sorted({'PyQt6', 'matplotlib'} & set(sys.modules)))")
+    process = subprocess.run([sys.executable, "-c", code], input="x*x\n",
+                             capture_output=True, text=True, check=True)
+    self.assertEqual(process.stdout.split(), ["9", "[]"])
+
+
+class TestRender(unittest.TestCase):
+  """ Tests for the headless rendering of graphs. """
+
+  def test_renders_png_and_svg(self):
+    """ Test that graphs are rendered to both formats on one figure, with
+        the limits of the graph window. """
+    renderer = PlotRenderer((2, 1.5), 50)
+    self.assertTrue(renderer.render("sin(x)").startswith(b"\x89PNG"))
+    self.assertIn(b"<svg", renderer.render("x^2", (-5, 5), "svg"))
+    self.assertEqual(len(renderer.axis.lines), 3)
+    renderer.render("x", (-1e7, 1e7))
+    self.assertEqual(renderer.axis.get_xlim(), (-1e6, 1e6))
+    self.assertEqual(renderer.axis.get_ylim(), (-1e6, 1e6))
+
+  def test_pool_keeps_job_order(self):
+    """ Test that the images of a process pool are written in job order
+        and match those rendered in one process. """
+    jobs = read_jobs(["sin(x)\n", "\n", "x^2 -5 5\n"] * 9)
+    self.assertEqual(len(jobs), 18)
+    self.assertEqual(jobs[1], ("x^2", (-5.0, 5.0)))
+    with tempfile.TemporaryDirectory() as directory:
+      paths = render_plots(jobs, "png", directory, 2, size=(2, 1.5),
+                           dpi=50)
+      self.assertEqual([os.path.basename(path) for path in paths[:2]],
+                       ["plot_00000.png", "plot_00001.png"])
+      with open(paths[-1], "rb") as file:
+        self.assertEqual(file.read(), render_plots(
+          jobs[-1:], "png", processes=1, size=(2, 1.5), dpi=50)[0])
+    with self.assertRaises(ValueError):
+      render_plots(jobs, "jpg")
+    with self.assertRaises(ValueError):
+      read_jobs(["sin(x) 1"])
+
+  def test_does_not_import_qt(self):
+    """ Test that rendering runs without PyQt6. """
+    code = ("import sys, render; render.PlotRenderer().render('x'); "
+            "print('PyQt6' in sys.modules)")
+    process = subprocess.run([sys.executable, "-c", code],
+                             capture_output=True, text=True, check=True)
+    self.assertEqual(process.stdout.strip(), "False")
+
+
+class TestServer(unittest.TestCase):
+  """ Tests for the micro-batching evaluation service. """
+
+  def test_concurrent_requests_share_batches(self):
+    """ Test that concurrent requests are evaluated together and each gets
+        its own result. """
+    async def run():
+      batcher = MicroBatcher(window=0.01)
+      batcher.start()
+      results = await asyncio.gather(
+        *(batcher.evaluate(f"{i}*x", i % 2) for i in range(100)),
+        batcher.evaluate("1/0"))
+      stats = batcher.stats()
+      await batcher.stop()
+      return results, stats
+
+    results, stats = asyncio.run(run())
+    self.assertEqual([value for value, _ in results[:100]],
+                     [i * (i % 2) for i in range(100)])
+    self.assertEqual(results[100][1], STATUS_DIVISION_BY_ZERO)
+    self.assertEqual(stats["completed"], 101)
+    self.assertLessEqual(stats["library_calls"], 3)
+    self.assertLessEqual(stats["p50_ms"], stats["p99_ms"])
+
+  def test_full_queue_rejects_requests(self):
+    """ Test that requests beyond the queue limit are rejected. """
+    async def run():
+      batcher = MicroBatcher(max_queue=2)
+      pending = [asyncio.ensure_future(batcher.evaluate("1")) for _ in range(3)]
+      with self.assertRaises(Overloaded):
+        await pending[2]
+      batcher.start()
+      values = await asyncio.gather(*pending[:2])
+      await batcher.stop()
+      return values, batcher.stats()["rejected"]
+
+    self.assertEqual(asyncio.run(run()),
+                     ([(1.0, STATUS_OK), (1.0, STATUS_OK)], 1))
+
+  def test_rejected_list_is_not_queued(self):
+    """ Test that a list larger than the room left in the queue is rejected
+        without queueing any of it. """
+    async def run():
+      batcher = MicroBatcher(max_queue=3)
+      pending = asyncio.ensure_future(batcher.evaluate("1"))
+      await asyncio.sleep(0)
+      status, payload = await route(
+        batcher, "POST", "/evaluate", b'{"expressions": ["2", "3", "4"]}')
+      queued = batcher.queue.qsize()
+      accepted = asyncio.ensure_future(batcher.evaluate_many(["2", "3"]))
+      batcher.start()
+      await asyncio.gather(pending, accepted)
+      stats = batcher.stats()
+      await batcher.stop()
+      return status, payload, queued, stats
+
+    status, payload, queued, stats = asyncio.run(run())
+    self.assertEqual((status, queued), (503, 1))
+    self.assertIn("error", payload)
+    self.assertEqual((stats["rejected"], stats["completed"]), (3, 3))
+
+  def test_http_round_trip(self):
+    """ Test that expressions are evaluated over a keep-alive connection. """
+    async def request(reader, writer, body):
+      writer.write(b"POST /evaluate HTTP/1.1\r\nContent-Length: %d\r\n\r\n"
+                   % len(body) + body)
+      status = await reader.readline()
+      headers = {}
+      while (line := await reader.readline()) != b"\r\n":
+        name, _, value = line.decode().partition(":")
+        headers[name.lower()] = value.strip()
+      return status.split()[1], json.loads(
+        await reader.readexactly(int(headers["content-length"])))
+
+    async def run():
+      batcher = MicroBatcher()
+      batcher.start()
+      server = await asyncio.start_server(
+        lambda reader, writer: handle_connection(batcher, reader, writer),
+        "127.0.0.1", 0)
+      reader, writer = await asyncio.open_connection(
+        *server.sockets[0].getsockname())
+      responses = [
+        await request(reader, writer, b'{"expression": "x^2", "x": 3}'),
+        await request(reader, writer, b'{"expressions": ["2+2", "ln(-1)"]}'),
+        await request(reader, writer, b"[1]")]
+      writer.close()
+      server.close()
+      await batcher.stop()
+      return responses
+
+    responses = asyncio.run(run())
+    self.assertEqual(responses[0], (b"200", {"result": 9, "status": "ok"}))
+    self.assertEqual(responses[1][1]["results"], [
+      {"result": 4, "status": "ok"},
+      {"result": None, "status": "domain error"}])
+    self.assertEqual(responses[2][0], b"400")
+
+
+class TestHistoryStore(unittest.TestCase):
+  """ Tests for the on-disk history. """
+
+  def setUp(self):
+    self.store = HistoryStore()
+    self.store.extend(["1+2 = 3", "sin(1) = 0.841471", "1+20 = 21",
+                       "2*sin(x) = 0; x = 0", "1/0 = Error"])
+
+  def test_rows(self):
+    """ Test that entries are read by position. """
+    self.assertEqual(len(self.store), 5)
+    self.assertEqual(self.store.rows(1, 2), ["sin(1) = 0.841471", "1+20 = 21"])
+    self.assertEqual(self.store.rows(4, 10), ["1/0 = Error"])
+    self.assertEqual(self.store.append("Pi = 3.1415927"), 5)
+    self.assertEqual(self.store.rows(5, 1), ["Pi = 3.1415927"])
+
+  def test_search(self):
+    """ Test prefix and substring search, including text shorter than a
+        trigram and entries appended after the last search. """
+    self.assertEqual(self.store.search("1+2", prefix=True),
+                     [(0, "1+2 = 3"), (2, "1+20 = 21")])
+    self.assertEqual([row for row, _ in self.store.search("sin(")], [1, 3])
+    self.assertEqual([row for row, _ in self.store.search("x")], [3])
+    self.store.append('"sin" = Error')
+    self.assertEqual([row for row, _ in self.store.search('"sin')], [5])
+    self.assertEqual(len(self.store.search("", limit=2)), 2)
+
+  def test_saved_across_sessions(self):
+    """ Test that the entries survive reopening the database and that
+        clearing it starts again at position 0. """
+    with tempfile.TemporaryDirectory() as directory:
+      path = os.path.join(directory, "history.sqlite3")
+      store = HistoryStore(path)
+      store.extend(["1 = 1", "2 = 2"])
+      store.close()
+      store = HistoryStore(path)
+      self.assertEqual(store.search("2 ="), [(1, "2 = 2")])
+      store.clear()
+      store.append("3 = 3")
+      store.close()
+      store = HistoryStore(path)
+      self.assertEqual((len(store), store.search("3 =")), (1, [(0, "3 = 3")]))
+      store.close()
+
+  def test_two_stores_on_one_file(self):
+    """ Test that two stores on one file append after each other's entries
+        and both see every entry. """
+    with tempfile.TemporaryDirectory() as directory:
+      path = os.path.join(directory, "history.sqlite3")
+      first, second = HistoryStore(path), HistoryStore(path)
+      self.assertEqual(first.append("1 = 1"), 0)
+      self.assertEqual(second.search("1 ="), [(0, "1 = 1")])
+      self.assertEqual(second.extend(["2 = 2", "3 = 3"]), 2)
+      self.assertEqual(first.append("4 = 4"), 3)
+      self.assertEqual(first.search(" = "), second.search(" = "))
+      self.assertEqual((len(first), len(second)), (4, 4))
+      self.assertEqual(second.rows(0, 4), ["1 = 1", "2 = 2", "3 = 3", "4 = 4"])
+      first.close()
+      second.close()
+
+  @unittest.skipUnless(importlib.util.find_spec("PyQt6"), "PyQt6 is missing")
+  def test_model_reads_pages(self):
+    """ Test that the view model reads the rows it shows and sees new
+        entries. """
+    # pylint: disable=import-outside-toplevel
+    from view.history_model import HistoryModel, PAGE_ROWS
+    self.store.extend(f"{i} = {i}" for i in range(PAGE_ROWS * 3))
+    model = HistoryModel(self.store)
+    self.assertEqual(model.rowCount(), PAGE_ROWS * 3 + 5)
+    self.assertEqual(model.index(PAGE_ROWS + 5).data(),
+                     f"{PAGE_ROWS} = {PAGE_ROWS}")
+    self.assertEqual(len(model.pages), 1)
+    model.data(model.index(model.rowCount() - 1))
+    model.append("new = 1")
+    self.assertEqual(model.index(model.rowCount() - 1).data(), "new = 1")
+    model.extend(["a = 1", "b = 2"])
+    self.assertEqual(model.index(model.rowCount() - 1).data(), "b = 2")
+    model.clear()
+    self.assertEqual(model.rowCount(), 0)
+    self.store.append("other = 1")
+    self.assertEqual(model.rowCount(), 0)
+    model.append("new = 1")
+    self.assertEqual(model.rowCount(), 2)
+    self.assertEqual(model.index(1).data(), "new = 1")
+
+
+@unittest.skipUnless(importlib.util.find_spec("PyQt6"), "PyQt6 is missing")
+class TestGraphWindow(unittest.TestCase):
+  """ Tests for the plot window on the offscreen platform. """
+
+  @classmethod
+  def setUpClass(cls):
+    # pylint: disable=import-outside-toplevel
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+    cls.app = QApplication.instance() or QApplication([])
+
+  def setUp(self):
+    # pylint: disable=import-outside-toplevel
+    from view.graph_window import GraphWindow
+    self.window = GraphWindow("x")
+    self.addCleanup(self.window.close)
+
+  def test_samples_of_the_last_view(self):
+    """ Test that the samples are applied on the GUI thread and that those
+        of an older view are dropped, also when they arrive late. """
+    threads = []
+    show_samples = self.window.show_samples
+
+    def record_thread(*args):
+      threads.append(threading.get_ident())
+      show_samples(*args)
+
+    self.window.show_samples = record_thread
+    axis = self.window.data["axis"]
+    axis.set_xlim(0, 5)
+    self.window.update_plot()
+    first = self.window.generation
+    axis.set_xlim(0, 2)
+    self.window.update_plot()
+    self.window.pending.result(timeout=10)
+    # A result of the first view that is delivered after the second one
+    self.window.worker.submit(self.window.signals.samples_ready.emit, first,
+                              (np.array([0.0, 5.0]), np.array([0.0, 5.0])))
+    self.window.worker.submit(lambda: None).result(timeout=10)
+    self.assertEqual(threads, [])
+    self.app.processEvents()
+    self.assertEqual(threads, [threading.get_ident()])
+    self.assertEqual((self.window.samples[0][0], self.window.samples[0][-1]),
+                     (0.0, 2.0))
+
+  def test_frames_are_coalesced(self):
+    """ Test that many requests to redraw render one frame. """
+    # pylint: disable=import-outside-toplevel
+    from PyQt6.QtTest import QTest
+    from matplotlib.figure import Figure
+    from view.graph_window import GraphCanvas, FRAME_INTERVAL
+    frames = []
+    canvas = GraphCanvas(Figure(), lambda: frames.append(1))
+    for _ in range(10):
+      canvas.draw_idle()
+    QTest.qWait(FRAME_INTERVAL * 4)
+    self.assertEqual(len(frames), 1)
+    canvas.draw_idle()
+    canvas.draw_idle()
+    QTest.qWait(FRAME_INTERVAL * 4)
+    self.assertEqual(len(frames), 2)
+
+  def test_blit_fallback(self):
+    """ Test that a small shift of the view is composed from the cached
+        background, while a zoom, a resize and a shift larger than
+        MAX_SHIFT draw the figure in full. """
+    # pylint: disable=import-outside-toplevel
+    from PyQt6.QtTest import QTest
+    from view.graph_window import MAX_SHIFT
+    self.window.show()
+    QTest.qWait(100)
+    canvas, axis = self.window.canvas, self.window.data["axis"]
+    self.assertIsNotNone(self.window.background)
+    counts = {"draw": 0, "blit": 0}
+    canvas.mpl_connect("draw_event", lambda _: counts.update(
+      draw=counts["draw"] + 1))
+    blit = canvas.blit
+
+    def counted_blit(*args):
+      counts["blit"] += 1
+      blit(*args)
+
+    canvas.blit = counted_blit
+
+    def frame(x_min, x_max):
+      # Without the event loop no sampled curve asks for another frame
+      axis.set_xlim(x_min, x_max)
+      self.window.render_frame()
+      return dict(counts)
+
+    self.assertEqual(frame(-9, 11), {"draw": 0, "blit": 1})
+    self.assertTrue(self.window.settle_timer.isActive())
+    self.assertEqual(frame(-5, 5), {"draw": 1, "blit": 1})
+    self.assertFalse(self.window.settle_timer.isActive())
+    shift = 10 * MAX_SHIFT * 1.5
+    self.assertEqual(frame(-5 + shift, 5 + shift), {"draw": 2, "blit": 1})
+    self.assertEqual(frame(-4 + shift, 6 + shift), {"draw": 2, "blit": 2})
+    canvas.resize(canvas.width() + 100, canvas.height())
+    self.assertEqual(frame(-4 + shift, 6 + shift), {"draw": 3, "blit": 2})
+
+
+@unittest.skipUnless(importlib.util.find_spec("PyQt6"), "PyQt6 is missing")
+class TestStartup(unittest.TestCase):
+  """ Tests for the startup path of the graphical interface. """
+
+  def test_main_window_does_not_import_matplotlib(self):
+    """ Test that the graph stack is left for the first graph. """
+    code = ("import sys, view.main_window; "
+            "print('matplotlib' in sys.modules)")
+    process = subprocess.run(
+      [sys.executable, "-c", code], capture_output=True, text=True,
+      check=True, env=dict(os.environ, QT_QPA_PLATFORM="offscreen"))
+    self.assertEqual(process.stdout.strip(), "False")
+
+  def test_compiled_ui_is_up_to_date(self):
+    """ Test that the generated form matches main_window.ui; run 'make ui'
+        after editing the form. """
+    from PyQt6 import uic  # pylint: disable=import-outside-toplevel
+    ui_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          "view", "ui_interface")
+    compiled = io.StringIO()
+    with open(os.path.join(ui_dir, "main_window.ui"), encoding="utf-8") as form:
+      uic.compileUi(form, compiled)
+    with open(os.path.join(ui_dir, "main_window_ui.py"),
+              encoding="utf-8") as file:
+      stored = file.read()
+
+    def code(text):
+      return [line for line in text.splitlines() if not line.startswith("#")]
+
+    self.assertEqual(code(stored), code(compiled.getvalue()))
+
+
 if __name__ == "__main__":
   unittest.main()
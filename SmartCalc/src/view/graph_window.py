@@ -2,18 +2,66 @@
     a given mathematical expression using matplotlib library.
 """
 
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 # pylint: disable=no-name-in-module
+from PyQt6.QtCore import QTimer
 from PyQt6.QtWidgets import QMainWindow, QApplication, QStatusBar, QLabel
 from matplotlib.backends.backend_qtagg import NavigationToolbar2QT, \
   FigureCanvasQTAgg
 from matplotlib.figure import Figure
-from matplotlib.ticker import AutoMinorLocator, AutoLocator
 
-from presenter.presenter import Presenter  # pylint: disable=import-error
+# pylint: disable=import-error
+from presenter.presenter import Presenter
+from model.sampler import decimate
+from view import plot_style
+from view.signals import PlotSignals
+
+# Shortest time between two frames in milliseconds
+FRAME_INTERVAL = 16
+# Time without view changes after which a moved view is drawn in full, in
+# milliseconds
+SETTLE_INTERVAL = 150
+# Largest shift of the cached background, relative to the size of the axes,
+# before the view is drawn in full
+MAX_SHIFT = 0.25
+# Pixels at the border of the axes that are not moved with the background,
+# so that the old frame does not move inwards
+SPINE_INSET = 2
+
 
-# The range of definition and the range of value of the functions are limited
-MAX_VALUE_AREA = 1e6
+class GraphCanvas(FigureCanvasQTAgg):
+  """ A canvas that renders at most one frame per FRAME_INTERVAL. Requests
+      to redraw, e.g. one for every mouse move of a drag, only schedule the
+      next frame, which is rendered by a callback."""
+
+  def __init__(self, figure, render_frame):
+    """Initializes the GraphCanvas object.
+
+    Args:
+        figure (Figure): The figure to show.
+        render_frame (Callable[[], None]): Renders a frame of the figure.
+    """
+    super().__init__(figure)
+    self.last_frame = 0.0
+    self.frame_timer = QTimer(self)
+    self.frame_timer.setSingleShot(True)
+    self.frame_timer.timeout.connect(render_frame)
+    self.frame_timer.timeout.connect(self.count_frame)
+
+  def draw_idle(self):
+    """ Schedules the next frame unless it is already scheduled. """
+    # The base class may request a draw before the timer exists
+    timer = getattr(self, 'frame_timer', None)
+    if timer is not None and not timer.isActive():
+      elapsed = (time.perf_counter() - self.last_frame) * 1e3
+      timer.start(max(0, round(FRAME_INTERVAL - elapsed)))
+
+  def count_frame(self):
+    """ Remembers the time of the frame that has been rendered. """
+    self.last_frame = time.perf_counter()
 
 
 class GraphWindow(QMainWindow):
@@ -30,6 +78,22 @@ class GraphWindow(QMainWindow):
     super().__init__(parent=parent)
     self.presenter = Presenter(self)
     self.expression = expression
+    self.function = self.presenter.compile_expression(expression)
+    # Curves are sampled by a single worker so that the GUI stays responsive;
+    # every request gets a new generation and results of older ones are
+    # dropped
+    self.worker = ThreadPoolExecutor(max_workers=1)
+    self.pending = None
+    self.generation = 0
+    self.signals = PlotSignals()
+    self.signals.samples_ready.connect(self.apply_samples)
+    # The figure without the curve and the arrows as of the last full draw,
+    # and the view it was drawn for
+    self.background = None
+    self.background_view = None
+    self.settle_timer = QTimer(self)
+    self.settle_timer.setSingleShot(True)
+    self.settle_timer.setInterval(SETTLE_INTERVAL)
     self.create_window()
     self.setup_graph_window()
     self.add_arrows()
@@ -37,14 +101,16 @@ class GraphWindow(QMainWindow):
     self.update_scale_label()
     self.data['x_lim'] = self.data['axis'].get_xlim()
     self.data['y_lim'] = self.data['axis'].get_ylim()
-    self.canvas.mpl_connect('draw_event', self.update_plot)
+    self.settle_timer.timeout.connect(self.canvas.draw)
+    self.canvas.mpl_connect('draw_event', self.capture_background)
+    self.canvas.mpl_connect('resize_event', self.show_samples)
 
   def create_window(self):
     """Creates the main window and sets up the graph canvas."""
     self.setWindowTitle(f'Graph of {self.expression}')
     self.setGeometry(200, 200, 800, 600)
     fig = Figure(figsize=(5, 4), dpi=100)
-    self.canvas = FigureCanvasQTAgg(fig)
+    self.canvas = GraphCanvas(fig, self.render_frame)
     self.setCentralWidget(self.canvas)
 
     self.data = {
@@ -56,11 +122,12 @@ class GraphWindow(QMainWindow):
       'scale_label': QLabel(),
     }
     self.data['axis'].set_xlim(-10, 10)
-    x_coord = np.linspace(-10, 10, 1000)
-    y_raw = np.array([self.calculate_function(i) for i in x_coord])
-    y_coord = np.array(
-      [float(val) if val != 'Error' else np.nan for val in y_raw], dtype=float)
-    self.line, = self.data['axis'].plot(x_coord, y_coord)
+    # All samples of the curve; the line gets only those that can be seen
+    self.samples = self.presenter.sample_function(self.function, -10, 10)
+    # The curve and the arrows change with every frame and are drawn on top
+    # of the cached background
+    self.line, = self.data['axis'].plot(*self.visible_samples(),
+                                        animated=True)
 
   def setup_graph_window(self):
     """Sets up the graph window with status bar, toolbar and axes."""
@@ -68,32 +135,20 @@ class GraphWindow(QMainWindow):
     self.setStatusBar(self.data['status_bar'])
     self.data['status_bar'].addWidget(self.data['scale_label'])
 
-    toolbar = NavigationToolbar2QT(self.canvas, self)
-    self.addToolBar(toolbar)
+    self.toolbar = NavigationToolbar2QT(self.canvas, self)
+    self.addToolBar(self.toolbar)
 
-    self.data['axis'].axhline(y=0, color='black', linewidth=1.5)
-    self.data['axis'].axvline(x=0, color='black', linewidth=1.5)
+    plot_style.add_axis_lines(self.data['axis'])
 
   def add_arrows(self):
-    """Adds arrows to the end of the x and y axes."""
-    self.data['arrows'] = []
-    self.data['arrows'].append(
-      self.data['axis'].annotate('', xy=(self.data['axis'].get_xlim()[1], 0),
-                                 xytext=(self.data['axis'].get_xlim()[0], 0),
-                                 arrowprops={'arrowstyle': '->'}))
-    self.data['arrows'].append(
-      self.data['axis'].annotate('', xy=(0, self.data['axis'].get_ylim()[1]),
-                                 xytext=(0, self.data['axis'].get_ylim()[0]),
-                                 arrowprops={'arrowstyle': '->'}))
+    """Adds arrows to the end of the x and y axes. They are drawn with the
+       curve on top of the cached background."""
+    self.data['arrows'] = plot_style.add_arrows(self.data['axis'],
+                                                animated=True)
 
   def add_grid(self):
     """Adds major and minor gridlines to the graph."""
-    self.data['axis'].xaxis.set_major_locator(AutoLocator())
-    self.data['axis'].yaxis.set_major_locator(AutoLocator())
-    self.data['axis'].xaxis.set_minor_locator(AutoMinorLocator())
-    self.data['axis'].yaxis.set_minor_locator(AutoMinorLocator())
-    self.data['axis'].grid(True, which='major', linestyle='-', linewidth=0.5)
-    self.data['axis'].grid(True, which='minor', linestyle='--', linewidth=0.25)
+    plot_style.add_grid(self.data['axis'])
 
   def update_scale_label(self):
     """Updates the scale label with the current limits of the x and y axes."""
@@ -104,62 +159,201 @@ class GraphWindow(QMainWindow):
     self.data['scale_label'].setText(scale_str)
     self.data['status_bar'].setStyleSheet('color: blue')
 
-  def update_plot(self, _=None):
-    """ Updates the graph whenever there is a change in the limits
-        of the x and y axes."""
+  def update_plot(self):
+    """ Requests new samples of the graph whenever there is a change in the
+        limits of the x and y axes. It runs once per frame, so the view
+        changes of a drag are handled together."""
     x_min, x_max = self.data['axis'].get_xlim()
     y_min, y_max = self.data['axis'].get_ylim()
-    if x_min != self.data['x_lim'][0] or x_max != self.data['x_lim'][
-      1] or y_min != \
-        self.data['y_lim'][0] or y_max != self.data['y_lim'][1]:
+    # Autoscaling may move the limits by rounding noise on every draw, which
+    # must not count as a change
+    if not np.allclose((x_min, x_max, y_min, y_max),
+                       self.data['x_lim'] + self.data['y_lim'], rtol=1e-9):
       self.check_limits()
+      x_min, x_max = self.data['axis'].get_xlim()
+      y_min, y_max = self.data['axis'].get_ylim()
       self.data['x_lim'] = (x_min, x_max)
       self.data['y_lim'] = (y_min, y_max)
-      self.line.set_xdata(np.linspace(x_min, x_max, 1000))
-      x_coord = np.linspace(x_min, x_max, 1000)
-      y_raw = np.array([self.calculate_function(i) for i in x_coord])
-      y_coord = np.array(
-        [float(val) if val != 'Error' else np.nan for val in y_raw],
-        dtype=float)
-      self.line.set_ydata(y_coord)
-      self.data['axis'].relim()
-      self.data['axis'].autoscale_view()
-      self.data['axis'].figure.canvas.draw()
       self.update_scale_label()
-      for arrow in self.data['arrows']:
-        arrow.remove()
-      self.add_arrows()
+      # While y is autoscaled the view follows the samples, so the samples
+      # must not depend on the view
+      y_range = None if self.data['axis'].get_autoscaley_on() else (
+        y_min, y_max)
+      self.generation += 1
+      if self.pending is not None:
+        self.pending.cancel()
+      self.pending = self.worker.submit(self.sample_in_worker,
+                                        self.generation, x_min, x_max, y_range)
 
-  def calculate_function(self, x_value):
-    """ Calculates the value of the function for a given x value.
+  def render_frame(self):
+    """ Renders a frame after changes of the view or of the curve. A view
+        that has only been moved is composed from the cached background;
+        it is drawn in full once it stops moving."""
+    self.update_plot()
+    if not self.blit_frame():
+      self.canvas.draw()
+
+  def capture_background(self, _=None):
+    """ Caches the figure without the curve and the arrows after a full draw
+        and draws them on top. """
+    self.settle_timer.stop()
+    if self.canvas.is_saving():
+      # The image of a saved figure has other sizes and all artists
+      self.background = None
+      return
+    self.background = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+    self.background_view = self.view_geometry()
+    self.draw_animated()
+    self.update_plot()
+
+  def view_geometry(self):
+    """ Returns the limits of the axes and the sizes of the figure and of
+        the axes in pixels, which place the cached background. """
+    axis = self.data['axis']
+    return {'x_lim': axis.get_xlim(), 'y_lim': axis.get_ylim(),
+            'figure': tuple(axis.figure.bbox.size),
+            'axes': tuple(axis.bbox.extents)}
+
+  def blit_frame(self):
+    """ Shows the cached background moved with the view, with the curve and
+        the arrows drawn anew.
+
+    Returns:
+        bool: False if the background cannot be used and the figure must be
+            drawn in full.
+    """
+    if self.background is None:
+      return False
+    old, new = self.background_view, self.view_geometry()
+    if old['figure'] != new['figure'] or old['axes'] != new['axes']:
+      return False
+    x_span = old['x_lim'][1] - old['x_lim'][0]
+    y_span = old['y_lim'][1] - old['y_lim'][0]
+    # A zoom changes the scale and cannot be composed from the background
+    if not np.allclose((new['x_lim'][1] - new['x_lim'][0],
+                        new['y_lim'][1] - new['y_lim'][0]),
+                       (x_span, y_span), rtol=1e-9):
+      return False
+    left, bottom, right, top = (round(edge) for edge in new['axes'])
+    shift_x = round((old['x_lim'][0] - new['x_lim'][0]) / x_span *
+                    (right - left))
+    shift_y = round((old['y_lim'][0] - new['y_lim'][0]) / y_span *
+                    (top - bottom))
+    if abs(shift_x) > MAX_SHIFT * (right - left) or \
+        abs(shift_y) > MAX_SHIFT * (top - bottom):
+      return False
+    figure = self.canvas.figure
+    axis = self.data['axis']
+    figure.draw_artist(figure.patch)
+    axis.draw_artist(axis.patch)
+    width, height = (round(size) for size in new['figure'])
+    # The inside of the axes moves both ways, the tick labels below it
+    # horizontally and those to the left of it vertically
+    self.restore_shifted((left + SPINE_INSET, bottom + SPINE_INSET,
+                          right - SPINE_INSET, top - SPINE_INSET),
+                         shift_x, shift_y)
+    self.restore_shifted((0, 0, width, bottom), shift_x, 0)
+    self.restore_shifted((0, bottom, left, height), 0, shift_y)
+    for spine in axis.spines.values():
+      axis.draw_artist(spine)
+    self.draw_animated()
+    self.canvas.blit(figure.bbox)
+    if shift_x or shift_y:
+      self.settle_timer.start()
+    return True
+
+  def restore_shifted(self, box, shift_x, shift_y):
+    """ Copies a box of the cached background moved by a number of pixels,
+        clipped to the box.
 
     Args:
-        x_value (float): the x value for which to calculate the function.
+        box (tuple[int, int, int, int]): The left, bottom, right and top
+            edges of the box in pixels.
+        shift_x (int): The shift to the right.
+        shift_y (int): The shift upwards.
+    """
+    left, bottom, right, top = box
+    left, right = max(left, left - shift_x), min(right, right - shift_x)
+    bottom, top = max(bottom, bottom - shift_y), min(top, top - shift_y)
+    if left < right and bottom < top:
+      # The rows of the renderer are counted from the top
+      height = round(self.canvas.figure.bbox.height)
+      self.canvas.restore_region(self.background,
+                                 bbox=(left, height - top, right,
+                                       height - bottom),
+                                 xy=(shift_x, -shift_y))
+
+  def draw_animated(self):
+    """ Draws the curve and the arrows on top of the background. """
+    axis = self.data['axis']
+    axis.draw_artist(self.line)
+    for arrow in self.data['arrows']:
+      axis.draw_artist(arrow)
+
+  def sample_in_worker(self, generation, x_min, x_max, y_range):
+    """ Samples the function in the worker thread and emits the result.
+
+    Args:
+        generation (int): The number of the request.
+        x_min (float): The left end of the visible range.
+        x_max (float): The right end of the visible range.
+        y_range (tuple[float, float] | None): The visible y limits, or None
+            while y is autoscaled.
+    """
+    if generation != self.generation:
+      return
+    samples = self.presenter.sample_function(self.function, x_min, x_max,
+                                             y_range)
+    self.signals.samples_ready.emit(generation, samples)
+
+  def apply_samples(self, generation, samples):
+    """ Shows the samples computed by the worker unless the view has
+        changed since they were requested.
+
+    Args:
+        generation (int): The number of the request.
+        samples (tuple[numpy.ndarray, numpy.ndarray]): The x and y
+            coordinates of the curve.
+    """
+    if generation != self.generation:
+      return
+    self.samples = samples
+    self.show_samples()
+    if self.data['axis'].get_autoscaley_on():
+      self.data['axis'].relim()
+      self.data['axis'].autoscale_view()
+    self.canvas.draw_idle()
+
+  def visible_samples(self):
+    """ Reduces the samples to at most four per pixel column of the axes,
+        so that drawing does not take longer with more samples.
+
     Returns:
-        The value of the function for the given x value, or np.nan
-        if an error occurs.
+        tuple[numpy.ndarray, numpy.ndarray]: The x and y coordinates of the
+            points of the line.
+    """
+    x_min, x_max = self.data['axis'].get_xlim()
+    columns = max(self.data['axis'].bbox.width, 1)
+    return decimate(*self.samples, (x_max - x_min) / columns)
+
+  def show_samples(self, _=None):
+    """ Sets the samples of the line again, e.g. for a new canvas width. """
+    self.line.set_data(*self.visible_samples())
+
+  def closeEvent(self, event):  # pylint: disable=invalid-name
+    """ Stops the worker when the window is closed.
+
+    Args:
+        event (QCloseEvent): The close event.
     """
-    try:
-      result = self.presenter.calculate_result(
-        self.expression.replace('x', '(' + str(x_value) + ')'))
-    except (ValueError, TypeError, IndexError):
-      result = np.nan
-    return result
+    self.generation += 1
+    self.worker.shutdown(wait=False, cancel_futures=True)
+    super().closeEvent(event)
 
   def check_limits(self):
     """ Checks if the limits of the x and y axes are within the maximum
         value area, and adjusts them if necessary."""
-    x_min, x_max = self.data['axis'].get_xlim()
-    y_min, y_max = self.data['axis'].get_ylim()
-    if x_min < -MAX_VALUE_AREA:
-      self.data['axis'].set_xlim(left=-MAX_VALUE_AREA)
-    if x_max > MAX_VALUE_AREA:
-      self.data['axis'].set_xlim(right=MAX_VALUE_AREA)
-    if y_min < -MAX_VALUE_AREA:
-      self.data['axis'].set_ylim(bottom=-MAX_VALUE_AREA)
-    if y_max > MAX_VALUE_AREA:
-      self.data['axis'].set_ylim(top=MAX_VALUE_AREA)
-
+    plot_style.check_limits(self.data['axis'])
 
 if __name__ == '__main__':
   app = QApplication([])
@@ -0,0 +1,95 @@
+""" This module defines the HistoryModel class that shows a HistoryStore
+    in an item view, reading only the entries that are displayed.
+"""
+
+# pylint: disable=no-name-in-module
+from PyQt6.QtCore import QAbstractListModel, QModelIndex, Qt
+
+# pylint: disable=import-error
+from model.cache import LRUCache
+
+# Number of entries read from the store at once
+PAGE_ROWS = 256
+# Memory limit of the pages kept for scrolling back and forth
+PAGE_CACHE_BYTES = 1024 * 1024
+
+
+class HistoryModel(QAbstractListModel):
+  """ A list model over the calculation history. Entries are read from the
+      store in pages when the view needs them, so opening a long history
+      neither reads nor keeps all of it."""
+
+  def __init__(self, store, parent=None):
+    """Initializes the HistoryModel object.
+
+    Args:
+        store (HistoryStore): The store of the entries.
+        parent (QObject, optional): The parent object. Defaults to None.
+    """
+    super().__init__(parent)
+    self.store = store
+    self.pages = LRUCache(PAGE_CACHE_BYTES)
+    # Views must be told of every change, so the number of rows changes
+    # only here even when another store appends to the same file
+    self.rows = len(store)
+
+  def rowCount(self, parent=QModelIndex()):  # pylint: disable=invalid-name
+    """ Returns the number of entries.
+
+    Args:
+        parent (QModelIndex): The parent item; only the root has rows.
+    """
+    return 0 if parent.isValid() else self.rows
+
+  def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+    """ Returns the entry at the index for display.
+
+    Args:
+        index (QModelIndex): The position of the entry.
+        role (Qt.ItemDataRole): The requested role.
+    """
+    if role != Qt.ItemDataRole.DisplayRole or not index.isValid():
+      return None
+    page, row = divmod(index.row(), PAGE_ROWS)
+    entries = self.pages.get(page)
+    if entries is None:
+      entries = self.store.rows(page * PAGE_ROWS, PAGE_ROWS)
+      self.pages.put(page, entries, sum(map(len, entries)))
+    return entries[row] if row < len(entries) else None
+
+  def append(self, entry):
+    """ Adds an entry to the end of the history.
+
+    Args:
+        entry (str): The entry to add.
+    """
+    row = len(self.store)
+    if row != self.rows:
+      # Another store has added entries since
+      self.extend((entry,))
+      return
+    self.beginInsertRows(QModelIndex(), row, row)
+    self.rows = self.store.append(entry) + 1
+    # The last page may have been read before it was full
+    self.pages.discard(row // PAGE_ROWS)
+    self.endInsertRows()
+
+  def extend(self, entries):
+    """ Adds many entries to the end of the history at once.
+
+    Args:
+        entries (Iterable[str]): The entries to add.
+    """
+    self.beginResetModel()
+    self.store.extend(entries)
+    self.rows = len(self.store)
+    self.pages.clear()
+    self.endResetModel()
+
+  def clear(self):
+    """ Removes all entries. """
+    self.beginResetModel()
+    self.store.clear()
+    self.rows = len(self.store)
+    self.pages.clear()
+    self.endResetModel()
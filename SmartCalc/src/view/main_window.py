@@ -5,20 +5,27 @@
 
 # pylint: disable=no-name-in-module
 import os
-from PyQt6.QtWidgets import QMainWindow, QMessageBox, QInputDialog
+from PyQt6.QtWidgets import QMainWindow, QMessageBox, QInputDialog, \
+  QHeaderView
 from PyQt6 import uic
-from PyQt6.QtCore import QSettings
-from PyQt6.QtGui import QAction
+from PyQt6.QtCore import QSettings, QStandardPaths
+from PyQt6.QtGui import QAction, QIcon
 
 # pylint: disable=import-error
-from view.graph_window import GraphWindow
 from presenter.presenter import Presenter
+from model.history import HistoryStore
+from view.history_model import HistoryModel
 
 MAX_VALUE_X = 1e7
 
 path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 ui_file = path + '/view/ui_interface/main_window.ui'
-Ui_MainWindow, QtBaseClass = uic.loadUiType(ui_file)
+# The form is compiled ahead of time by 'make ui'; parsing the XML at
+# runtime is the fallback when the generated module is missing
+try:
+  from view.ui_interface.main_window_ui import Ui_MainWindow
+except ImportError:
+  Ui_MainWindow, _ = uic.loadUiType(ui_file)
 
 
 class MainWindow(QMainWindow, Ui_MainWindow):
@@ -30,11 +37,25 @@ class MainWindow(QMainWindow, Ui_MainWindow):
       presenter (Presenter): The presenter object that handles user input.
   """
 
-  def __init__(self):
-    """ Initializes the main window."""
+  def __init__(self, history_path=None):
+    """ Initializes the main window.
+
+    Args:
+        history_path (str, optional): The database of the history. Defaults
+            to history.sqlite3 in the application data directory.
+    """
     super().__init__()
     self.setupUi(self)
-    self.presenter = Presenter(self)
+    # The compiled form resolves icons from the working directory
+    self.pushButton_graph.setIcon(
+      QIcon(os.path.join(path, 'view', 'images', 'graph.svg')))
+    self.presenter = Presenter(self, cache_results=True)
+    self.history = HistoryModel(HistoryStore(
+      history_path or self.default_history_path()), self)
+    self.list_history.setModel(self.history)
+    # Rows of a fixed height are laid out without asking for every entry
+    self.list_history.verticalHeader().setSectionResizeMode(
+      QHeaderView.ResizeMode.Fixed)
     self.add_functions()
     self.load_history()
     self.add_help_menu()
@@ -122,39 +143,44 @@ class MainWindow(QMainWindow, Ui_MainWindow):
     self.text_edit.setPlainText(text)
 
   def add_to_history(self, expression):
-    """ Adds an expression to the history list.
+    """ Adds an expression to the history list and saves it.
 
     Args:
         expression (str): The expression to add to the history list.
     """
-    self.list_history.addItem(expression)
+    self.history.append(expression)
 
   def clear_history(self):
     """ Clears the history list."""
-    self.list_history.clear()
+    self.history.clear()
 
   def load_string_from_history(self):
     """ Loads the selected expression from the history list into
         the input field."""
-    selected_item = self.list_history.currentItem()
-    if selected_item is not None:
-      self.text_edit.setPlainText(selected_item.text().split(' = ')[0])
-
-  def save_history(self):
-    """ Saves the history list to the application settings."""
-    settings = QSettings('MySoft', 'MyCalculator')
-    history = []
-    for i in range(self.list_history.count()):
-      history.append(self.list_history.item(i).text())
-    settings.setValue('history', history)
+    selected = self.list_history.currentIndex()
+    if selected.isValid():
+      self.text_edit.setPlainText(selected.data().split(' = ')[0])
+
+  @staticmethod
+  def default_history_path():
+    """ Returns the path of the history database, creating its directory."""
+    directory = os.path.join(QStandardPaths.writableLocation(
+      QStandardPaths.StandardLocation.GenericDataLocation), 'MySoft',
+      'MyCalculator')
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, 'history.sqlite3')
 
   def load_history(self):
-    """ Loads the history list from the application settings."""
+    """ Moves the history saved in the application settings by earlier
+        versions into the history database."""
     settings = QSettings('MySoft', 'MyCalculator')
     history = settings.value('history')
-    if history is not None:
-      for item in history:
-        self.add_to_history(item)
+    if history:
+      # QSettings returns a list of one entry as a string
+      if isinstance(history, str):
+        history = [history]
+      self.history.extend(history)
+    settings.remove('history')
 
   def clear_entry(self):
     """ Clears the last character in the input field."""
@@ -188,11 +214,21 @@ class MainWindow(QMainWindow, Ui_MainWindow):
     return None
 
   def open_graphic(self):
-    """ Opens a new window to display a graph of the input expression."""
-    window = GraphWindow(self.text_edit.toPlainText(), parent=self)
+    """ Opens a new window to display a graph of the input expression, or
+        a heatmap if it contains the variable y."""
+    # matplotlib takes most of the startup time, so it is imported only when
+    # the first graph is opened
+    # pylint: disable=import-outside-toplevel
+    expression = self.text_edit.toPlainText()
+    if 'y' in expression:
+      from view.surface_window import SurfaceWindow
+      window = SurfaceWindow(expression, parent=self)
+    else:
+      from view.graph_window import GraphWindow
+      window = GraphWindow(expression, parent=self)
     window.show()
 
   def closeEvent(self, event):  # pylint: disable=invalid-name
     """ Handles the window close event."""
-    self.save_history()
+    self.history.store.close()
     event.accept()
@@ -0,0 +1,75 @@
+""" This module defines the look of the graphs, shared by GraphWindow and
+    the headless renderer. It uses matplotlib only, never PyQt6.
+"""
+
+from matplotlib.ticker import AutoMinorLocator, AutoLocator
+
+# The range of definition and the range of value of the functions are limited
+MAX_VALUE_AREA = 1e6
+
+
+def add_axis_lines(axis):
+  """ Draws the lines x = 0 and y = 0.
+
+  Args:
+      axis (matplotlib.axes.Axes): The axes of the graph.
+  """
+  axis.axhline(y=0, color='black', linewidth=1.5)
+  axis.axvline(x=0, color='black', linewidth=1.5)
+
+
+def add_arrows(axis, animated=False):
+  """ Adds arrows to the end of the x and y axes. They are placed relative
+      to the axes box, so they follow the view without being re-created,
+      and are hidden while the axis they belong to is out of view.
+
+  Args:
+      axis (matplotlib.axes.Axes): The axes of the graph.
+      animated (bool): Whether the arrows are left out of full draws.
+
+  Returns:
+      list[matplotlib.text.Annotation]: The arrows of the x and y axes.
+  """
+  # x in axes coordinates and y in data coordinates, and the other way
+  x_arrow = axis.get_yaxis_transform()
+  y_arrow = axis.get_xaxis_transform()
+  return [
+    axis.annotate('', xy=(1, 0), xytext=(0, 0), xycoords=x_arrow,
+                  textcoords=x_arrow, annotation_clip=True,
+                  arrowprops={'arrowstyle': '->'}, animated=animated),
+    axis.annotate('', xy=(0, 1), xytext=(0, 0), xycoords=y_arrow,
+                  textcoords=y_arrow, annotation_clip=True,
+                  arrowprops={'arrowstyle': '->'}, animated=animated)]
+
+
+def add_grid(axis):
+  """ Adds major and minor gridlines to the graph.
+
+  Args:
+      axis (matplotlib.axes.Axes): The axes of the graph.
+  """
+  axis.xaxis.set_major_locator(AutoLocator())
+  axis.yaxis.set_major_locator(AutoLocator())
+  axis.xaxis.set_minor_locator(AutoMinorLocator())
+  axis.yaxis.set_minor_locator(AutoMinorLocator())
+  axis.grid(True, which='major', linestyle='-', linewidth=0.5)
+  axis.grid(True, which='minor', linestyle='--', linewidth=0.25)
+
+
+def check_limits(axis):
+  """ Checks if the limits of the x and y axes are within the maximum value
+      area, and adjusts them if necessary.
+
+  Args:
+      axis (matplotlib.axes.Axes): The axes of the graph.
+  """
+  x_min, x_max = axis.get_xlim()
+  y_min, y_max = axis.get_ylim()
+  if x_min < -MAX_VALUE_AREA:
+    axis.set_xlim(left=-MAX_VALUE_AREA)
+  if x_max > MAX_VALUE_AREA:
+    axis.set_xlim(right=MAX_VALUE_AREA)
+  if y_min < -MAX_VALUE_AREA:
+    axis.set_ylim(bottom=-MAX_VALUE_AREA)
+  if y_max > MAX_VALUE_AREA:
+    axis.set_ylim(top=MAX_VALUE_AREA)
@@ -0,0 +1,12 @@
+""" This module defines the Qt signals shared by the plot windows. """
+
+# pylint: disable=no-name-in-module
+from PyQt6.QtCore import QObject, pyqtSignal
+
+
+class PlotSignals(QObject):
+  """ Signals that deliver the samples computed by the worker thread to the
+      GUI thread."""
+  # The generation of the request and its samples: the (x, y) samples
+  # of a curve or the grid of a surface
+  samples_ready = pyqtSignal(int, object)
@@ -0,0 +1,206 @@
+""" This module defines the SurfaceWindow class that shows an expression of
+    x and y as a heatmap or as contour lines.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+# pylint: disable=no-name-in-module
+from PyQt6.QtCore import QTimer
+from PyQt6.QtGui import QAction
+from PyQt6.QtWidgets import QMainWindow, QApplication, QStatusBar, QLabel
+from matplotlib.backends.backend_qtagg import NavigationToolbar2QT, \
+  FigureCanvasQTAgg
+from matplotlib.figure import Figure
+
+# pylint: disable=import-error
+from presenter.presenter import Presenter
+from model.sampler import value_range
+from view import plot_style
+from view.signals import PlotSignals
+
+# Largest number of grid points along an axis
+MAX_GRID_SIZE = 2000
+# Number of contour lines
+CONTOUR_LEVELS = 15
+# Time in milliseconds during which view changes are collected into one
+# request for a new grid
+UPDATE_INTERVAL = 50
+
+
+class SurfaceWindow(QMainWindow):
+  """The window that displays a function of x and y."""
+
+  def __init__(self, expression, parent=None):
+    """Initializes the SurfaceWindow object.
+
+    Args:
+        expression (str): The expression of x and y to be plotted.
+        parent (QWidget, optional): The parent widget of the window.
+                                    Defaults to None.
+    """
+    super().__init__(parent=parent)
+    self.presenter = Presenter(self)
+    self.expression = expression
+    self.function = self.presenter.compile_surface(expression)
+    # Grids are evaluated by a single worker, and results of older requests
+    # are dropped, as in GraphWindow
+    self.worker = ThreadPoolExecutor(max_workers=1)
+    self.pending = None
+    self.generation = 0
+    self.requested = None
+    self.signals = PlotSignals()
+    self.signals.samples_ready.connect(self.apply_grid)
+    self.update_timer = QTimer(self)
+    self.update_timer.setSingleShot(True)
+    self.update_timer.setInterval(UPDATE_INTERVAL)
+    self.update_timer.timeout.connect(self.request_grid)
+    self.contours = None
+    self.create_window()
+    self.axis.callbacks.connect('xlim_changed', self.schedule_update)
+    self.axis.callbacks.connect('ylim_changed', self.schedule_update)
+    self.canvas.mpl_connect('resize_event', self.schedule_update)
+
+  def create_window(self):
+    """Creates the canvas, the toolbar and the status bar."""
+    self.setWindowTitle(f'Surface of {self.expression}')
+    self.setGeometry(200, 200, 800, 600)
+    fig = Figure(figsize=(5, 4), dpi=100)
+    self.canvas = FigureCanvasQTAgg(fig)
+    self.setCentralWidget(self.canvas)
+    self.axis = fig.add_subplot(111)
+    self.axis.set_xlim(-10, 10)
+    self.axis.set_ylim(-10, 10)
+    # The view is changed by the user only, not by new grids
+    self.axis.set_autoscale_on(False)
+    plot_style.add_axis_lines(self.axis)
+    self.arrows = plot_style.add_arrows(self.axis)
+    self.grid = self.presenter.sample_surface(
+      self.function, (-10, 10), (-10, 10), self.grid_shape())
+    self.image = self.axis.imshow(self.grid[2], origin='lower',
+                                  aspect='auto', interpolation='nearest')
+    fig.colorbar(self.image, ax=self.axis)
+    self.show_grid()
+
+    self.toolbar = NavigationToolbar2QT(self.canvas, self)
+    self.addToolBar(self.toolbar)
+    self.contour_action = QAction('Contours', self)
+    self.contour_action.setCheckable(True)
+    self.contour_action.toggled.connect(self.show_contours)
+    self.toolbar.addAction(self.contour_action)
+    self.scale_label = QLabel()
+    self.setStatusBar(QStatusBar())
+    self.statusBar().addWidget(self.scale_label)
+    self.update_scale_label()
+
+  def grid_shape(self):
+    """ Returns the number of columns and rows of a grid with a point per
+        pixel of the axes, at most MAX_GRID_SIZE along an axis. """
+    width, height = self.axis.bbox.size
+    return (int(np.clip(width, 2, MAX_GRID_SIZE)),
+            int(np.clip(height, 2, MAX_GRID_SIZE)))
+
+  def update_scale_label(self):
+    """Updates the scale label with the current limits of the x and y axes."""
+    x_min, x_max = self.axis.get_xlim()
+    y_min, y_max = self.axis.get_ylim()
+    self.scale_label.setText(f'Scale: x[{x_min:.2f}, {x_max:.2f}],'
+                             f' y[{y_min:.2f}, {y_max:.2f}]')
+
+  def schedule_update(self, _=None):
+    """ Requests a new grid once the view has stopped changing for
+        UPDATE_INTERVAL, so that a drag does not request one per move. """
+    self.update_timer.start()
+
+  def request_grid(self):
+    """ Evaluates a grid for the current view in the worker thread. """
+    plot_style.check_limits(self.axis)
+    request = (self.axis.get_xlim(), self.axis.get_ylim(), self.grid_shape())
+    if request == self.requested:
+      return
+    self.requested = request
+    self.update_scale_label()
+    self.generation += 1
+    if self.pending is not None:
+      self.pending.cancel()
+    self.pending = self.worker.submit(self.sample_in_worker, self.generation,
+                                      *request)
+
+  def sample_in_worker(self, generation, x_range, y_range, shape):
+    """ Evaluates the grid in the worker thread and emits the result.
+
+    Args:
+        generation (int): The number of the request.
+        x_range (tuple[float, float]): The visible x limits.
+        y_range (tuple[float, float]): The visible y limits.
+        shape (tuple[int, int]): The number of columns and rows.
+    """
+    if generation != self.generation:
+      return
+    grid = self.presenter.sample_surface(self.function, x_range, y_range,
+                                         shape)
+    self.signals.samples_ready.emit(generation, grid)
+
+  def apply_grid(self, generation, grid):
+    """ Shows the grid computed by the worker unless the view has changed
+        since it was requested.
+
+    Args:
+        generation (int): The number of the request.
+        grid (tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]): The x
+            values, the y values and the values of the grid.
+    """
+    if generation != self.generation:
+      return
+    self.grid = grid
+    self.show_grid()
+    self.canvas.draw_idle()
+
+  def show_grid(self):
+    """ Puts the grid into the heatmap and the contour lines. """
+    x_values, y_values, values = self.grid
+    # Every value fills the cell around its point
+    x_half = (x_values[-1] - x_values[0]) / (2 * (x_values.size - 1))
+    y_half = (y_values[-1] - y_values[0]) / (2 * (y_values.size - 1))
+    self.image.set_data(values)
+    self.image.set_extent((x_values[0] - x_half, x_values[-1] + x_half,
+                           y_values[0] - y_half, y_values[-1] + y_half))
+    low, high = value_range(values)
+    if low == high:
+      low, high = low - 1, high + 1
+    self.image.set_clim(low, high)
+    if self.contours is not None:
+      self.contours.remove()
+      self.contours = None
+    if not self.image.get_visible():
+      self.contours = self.axis.contour(
+        x_values, y_values, np.ma.masked_invalid(values),
+        levels=np.linspace(low, high, CONTOUR_LEVELS),
+        cmap=self.image.get_cmap(), norm=self.image.norm)
+
+  def show_contours(self, checked):
+    """ Switches between the heatmap and the contour lines.
+
+    Args:
+        checked (bool): Whether the contour lines are shown.
+    """
+    self.image.set_visible(not checked)
+    self.show_grid()
+    self.canvas.draw_idle()
+
+  def closeEvent(self, event):  # pylint: disable=invalid-name
+    """ Stops the worker when the window is closed.
+
+    Args:
+        event (QCloseEvent): The close event.
+    """
+    self.generation += 1
+    self.worker.shutdown(wait=False, cancel_futures=True)
+    super().closeEvent(event)
+
+
+if __name__ == '__main__':
+  app = QApplication([])
+  window = SurfaceWindow('sin(x)*cos(y)')
+  window.show()
+  app.exec()
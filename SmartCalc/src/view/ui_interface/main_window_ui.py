@@ -0,0 +1,530 @@
+# Form implementation generated from reading ui file 'main_window.ui'
+#
+# Created by: PyQt6 UI code generator 6.11.0
+#
+# WARNING: Any manual changes made to this file will be lost when pyuic6 is
+# run again.  Do not edit this file unless you know what you are doing.
+
+
+from PyQt6 import QtCore, QtGui, QtWidgets
+
+
+class Ui_MainWindow(object):
+    def setupUi(self, MainWindow):
+        MainWindow.setObjectName("MainWindow")
+        MainWindow.resize(700, 329)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Fixed, QtWidgets.QSizePolicy.Policy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(MainWindow.sizePolicy().hasHeightForWidth())
+        MainWindow.setSizePolicy(sizePolicy)
+        MainWindow.setMinimumSize(QtCore.QSize(700, 329))
+        MainWindow.setMaximumSize(QtCore.QSize(700, 329))
+        font = QtGui.QFont()
+        font.setPointSize(15)
+        MainWindow.setFont(font)
+        MainWindow.setStyleSheet("gridline-color: rgb(46, 46, 46);")
+        MainWindow.setTabShape(QtWidgets.QTabWidget.TabShape.Rounded)
+        self.centralwidget = QtWidgets.QWidget(parent=MainWindow)
+        self.centralwidget.setObjectName("centralwidget")
+        self.pushButton_graph = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_graph.setGeometry(QtCore.QRect(0, 38, 100, 37))
+        font = QtGui.QFont()
+        font.setPointSize(13)
+        font.setItalic(False)
+        self.pushButton_graph.setFont(font)
+        self.pushButton_graph.setStyleSheet("color: rgb(255, 255, 255);\n"
+"background-color: rgb(78, 81, 86);")
+        icon = QtGui.QIcon()
+        icon.addPixmap(QtGui.QPixmap("../images/graph.svg"), QtGui.QIcon.Mode.Normal, QtGui.QIcon.State.On)
+        self.pushButton_graph.setIcon(icon)
+        self.pushButton_graph.setIconSize(QtCore.QSize(57, 26))
+        self.pushButton_graph.setObjectName("pushButton_graph")
+        self.pushButton_x = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_x.setGeometry(QtCore.QRect(100, 38, 100, 37))
+        font = QtGui.QFont()
+        font.setPointSize(15)
+        font.setItalic(False)
+        self.pushButton_x.setFont(font)
+        self.pushButton_x.setStyleSheet("color: rgb(255, 255, 255);\n"
+"background-color: rgb(78, 81, 86);")
+        self.pushButton_x.setObjectName("pushButton_x")
+        self.pushButton_open_br = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_open_br.setGeometry(QtCore.QRect(200, 38, 100, 37))
+        font = QtGui.QFont()
+        font.setPointSize(15)
+        font.setItalic(False)
+        self.pushButton_open_br.setFont(font)
+        self.pushButton_open_br.setStyleSheet("color: rgb(255, 255, 255);\n"
+"background-color: rgb(78, 81, 86);")
+        self.pushButton_open_br.setObjectName("pushButton_open_br")
+        self.pushButton_close_br = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_close_br.setGeometry(QtCore.QRect(300, 38, 100, 37))
+        font = QtGui.QFont()
+        font.setPointSize(15)
+        font.setItalic(False)
+        self.pushButton_close_br.setFont(font)
+        self.pushButton_close_br.setStyleSheet("color: rgb(255, 255, 255);\n"
+"background-color: rgb(78, 81, 86);")
+        self.pushButton_close_br.setObjectName("pushButton_close_br")
+        self.pushButton_div = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_div.setGeometry(QtCore.QRect(600, 38, 100, 37))
+        font = QtGui.QFont()
+        font.setPointSize(17)
+        font.setItalic(False)
+        self.pushButton_div.setFont(font)
+        self.pushButton_div.setAccessibleDescription("")
+        self.pushButton_div.setAutoFillBackground(False)
+        self.pushButton_div.setStyleSheet("background-color: rgb(241, 163, 60);\n"
+"color: rgb(255, 255, 255);\n"
+"")
+        self.pushButton_div.setObjectName("pushButton_div")
+        self.pushButton_ac = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_ac.setGeometry(QtCore.QRect(400, 38, 100, 37))
+        font = QtGui.QFont()
+        font.setPointSize(15)
+        font.setItalic(False)
+        self.pushButton_ac.setFont(font)
+        self.pushButton_ac.setStyleSheet("color: rgb(255, 255, 255);\n"
+"background-color: rgb(78, 81, 86);")
+        self.pushButton_ac.setObjectName("pushButton_ac")
+        self.pushButton_c = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_c.setGeometry(QtCore.QRect(500, 38, 100, 37))
+        font = QtGui.QFont()
+        font.setPointSize(15)
+        font.setItalic(False)
+        self.pushButton_c.setFont(font)
+        self.pushButton_c.setStyleSheet("color: rgb(255, 255, 255);\n"
+"background-color: rgb(78, 81, 86);")
+        self.pushButton_c.setObjectName("pushButton_c")
+        self.pushButton_mod = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_mod.setGeometry(QtCore.QRect(0, 75, 100, 36))
+        font = QtGui.QFont()
+        font.setPointSize(15)
+        font.setItalic(False)
+        self.pushButton_mod.setFont(font)
+        self.pushButton_mod.setStyleSheet("color: rgb(255, 255, 255);\n"
+"background-color: rgb(78, 81, 86);")
+        self.pushButton_mod.setObjectName("pushButton_mod")
+        self.pushButton_7 = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_7.setGeometry(QtCore.QRect(300, 75, 100, 36))
+        font = QtGui.QFont()
+        font.setPointSize(15)
+        font.setBold(False)
+        font.setItalic(False)
+        self.pushButton_7.setFont(font)
+        self.pushButton_7.setStyleSheet("color: rgb(255, 255, 255);\n"
+"background-color: rgb(177, 177, 177);")
+        self.pushButton_7.setObjectName("pushButton_7")
+        self.pushButton_9 = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_9.setGeometry(QtCore.QRect(500, 75, 100, 36))
+        font = QtGui.QFont()
+        font.setPointSize(15)
+        font.setItalic(False)
+        self.pushButton_9.setFont(font)
+        self.pushButton_9.setStyleSheet("color: rgb(255, 255, 255);\n"
+"background-color: rgb(177, 177, 177);")
+        self.pushButton_9.setObjectName("pushButton_9")
+        self.pushButton_8 = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_8.setGeometry(QtCore.QRect(400, 75, 100, 36))
+        font = QtGui.QFont()
+        font.setPointSize(15)
+        font.setItalic(False)
+        self.pushButton_8.setFont(font)
+        self.pushButton_8.setStyleSheet("color: rgb(255, 255, 255);\n"
+"background-color: rgb(177, 177, 177);")
+        self.pushButton_8.setObjectName("pushButton_8")
+        self.pushButton_exponentiation = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_exponentiation.setGeometry(QtCore.QRect(100, 75, 100, 36))
+        font = QtGui.QFont()
+        font.setFamily(".AppleSystemUIFont")
+        font.setPointSize(15)
+        font.setItalic(False)
+        self.pushButton_exponentiation.setFont(font)
+        self.pushButton_exponentiation.setStyleSheet("color: rgb(255, 255, 255);\n"
+"background-color: rgb(78, 81, 86);")
+        self.pushButton_exponentiation.setObjectName("pushButton_exponentiation")
+        self.pushButton_mul = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_mul.setGeometry(QtCore.QRect(600, 75, 100, 36))
+        font = QtGui.QFont()
+        font.setPointSize(20)
+        font.setItalic(False)
+        self.pushButton_mul.setFont(font)
+        self.pushButton_mul.setStyleSheet("color: rgb(255, 255, 255);\n"
+"background-color: rgb(241, 163, 60);")
+        self.pushButton_mul.setObjectName("pushButton_mul")
+        self.pushButton_pi = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_pi.setGeometry(QtCore.QRect(200, 75, 100, 36))
+        font = QtGui.QFont()
+        font.setPointSize(17)
+        font.setItalic(False)
+        self.pushButton_pi.setFont(font)
+        self.pushButton_pi.setStyleSheet("color: rgb(255, 255, 255);\n"
+"background-color: rgb(78, 81, 86);")
+        self.pushButton_pi.setObjectName("pushButton_pi")
+        self.pushButton_sin = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_sin.setGeometry(QtCore.QRect(0, 111, 100, 36))
+        font = QtGui.QFont()
+        font.setPointSize(15)
+        font.setItalic(False)
+        self.pushButton_sin.setFont(font)
+        self.pushButton_sin.setStyleSheet("color: rgb(255, 255, 255);\n"
+"background-color: rgb(78, 81, 86);")
+        self.pushButton_sin.setObjectName("pushButton_sin")
+        self.pushButton_cos = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_cos.setGeometry(QtCore.QRect(100, 111, 100, 36))
+        font = QtGui.QFont()
+        font.setPointSize(15)
+        font.setItalic(False)
+        self.pushButton_cos.setFont(font)
+        self.pushButton_cos.setStyleSheet("color: rgb(255, 255, 255);\n"
+"background-color: rgb(78, 81, 86);")
+        self.pushButton_cos.setObjectName("pushButton_cos")
+        self.pushButton_6 = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_6.setGeometry(QtCore.QRect(500, 111, 100, 36))
+        font = QtGui.QFont()
+        font.setPointSize(15)
+        font.setItalic(False)
+        self.pushButton_6.setFont(font)
+        self.pushButton_6.setStyleSheet("color: rgb(255, 255, 255);\n"
+"background-color: rgb(177, 177, 177);")
+        self.pushButton_6.setObjectName("pushButton_6")
+        self.pushButton_4 = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_4.setGeometry(QtCore.QRect(300, 111, 100, 36))
+        font = QtGui.QFont()
+        font.setPointSize(15)
+        font.setItalic(False)
+        self.pushButton_4.setFont(font)
+        self.pushButton_4.setStyleSheet("color: rgb(255, 255, 255);\n"
+"background-color: rgb(177, 177, 177);")
+        self.pushButton_4.setObjectName("pushButton_4")
+        self.pushButton_sub = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_sub.setGeometry(QtCore.QRect(600, 111, 100, 36))
+        font = QtGui.QFont()
+        font.setPointSize(20)
+        font.setItalic(False)
+        self.pushButton_sub.setFont(font)
+        self.pushButton_sub.setLayoutDirection(QtCore.Qt.LayoutDirection.LeftToRight)
+        self.pushButton_sub.setAutoFillBackground(False)
+        self.pushButton_sub.setStyleSheet("background-color: rgb(241, 163, 60);\n"
+"color: rgb(255, 255, 255);")
+        self.pushButton_sub.setObjectName("pushButton_sub")
+        self.pushButton_tan = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_tan.setGeometry(QtCore.QRect(200, 111, 100, 36))
+        font = QtGui.QFont()
+        font.setPointSize(15)
+        font.setItalic(False)
+        self.pushButton_tan.setFont(font)
+        self.pushButton_tan.setStyleSheet("color: rgb(255, 255, 255);\n"
+"background-color: rgb(78, 81, 86);")
+        self.pushButton_tan.setObjectName("pushButton_tan")
+        self.pushButton_5 = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_5.setGeometry(QtCore.QRect(400, 111, 100, 36))
+        font = QtGui.QFont()
+        font.setPointSize(15)
+        font.setItalic(False)
+        self.pushButton_5.setFont(font)
+        self.pushButton_5.setStyleSheet("color: rgb(255, 255, 255);\n"
+"background-color: rgb(177, 177, 177);")
+        self.pushButton_5.setObjectName("pushButton_5")
+        self.pushButton_acos = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_acos.setGeometry(QtCore.QRect(100, 147, 100, 36))
+        font = QtGui.QFont()
+        font.setPointSize(15)
+        font.setItalic(False)
+        self.pushButton_acos.setFont(font)
+        self.pushButton_acos.setStyleSheet("color: rgb(255, 255, 255);\n"
+"background-color: rgb(78, 81, 86);")
+        self.pushButton_acos.setObjectName("pushButton_acos")
+        self.pushButton_atan = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_atan.setGeometry(QtCore.QRect(200, 147, 100, 36))
+        font = QtGui.QFont()
+        font.setPointSize(15)
+        font.setItalic(False)
+        self.pushButton_atan.setFont(font)
+        self.pushButton_atan.setStyleSheet("color: rgb(255, 255, 255);\n"
+"background-color: rgb(78, 81, 86);")
+        self.pushButton_atan.setObjectName("pushButton_atan")
+        self.pushButton_add = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_add.setGeometry(QtCore.QRect(600, 147, 100, 36))
+        font = QtGui.QFont()
+        font.setPointSize(20)
+        font.setItalic(False)
+        self.pushButton_add.setFont(font)
+        self.pushButton_add.setStyleSheet("color: rgb(255, 255, 255);\n"
+"background-color: rgb(241, 163, 60);")
+        self.pushButton_add.setObjectName("pushButton_add")
+        self.pushButton_asin = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_asin.setGeometry(QtCore.QRect(0, 147, 100, 36))
+        font = QtGui.QFont()
+        font.setPointSize(15)
+        font.setItalic(False)
+        self.pushButton_asin.setFont(font)
+        self.pushButton_asin.setStyleSheet("color: rgb(255, 255, 255);\n"
+"background-color: rgb(78, 81, 86);")
+        self.pushButton_asin.setObjectName("pushButton_asin")
+        self.pushButton_3 = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_3.setGeometry(QtCore.QRect(500, 147, 100, 36))
+        font = QtGui.QFont()
+        font.setPointSize(15)
+        font.setItalic(False)
+        self.pushButton_3.setFont(font)
+        self.pushButton_3.setStyleSheet("color: rgb(255, 255, 255);\n"
+"background-color: rgb(177, 177, 177);")
+        self.pushButton_3.setObjectName("pushButton_3")
+        self.pushButton_2 = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_2.setGeometry(QtCore.QRect(400, 147, 100, 36))
+        font = QtGui.QFont()
+        font.setPointSize(15)
+        font.setItalic(False)
+        self.pushButton_2.setFont(font)
+        self.pushButton_2.setStyleSheet("color: rgb(255, 255, 255);\n"
+"background-color: rgb(177, 177, 177);")
+        self.pushButton_2.setObjectName("pushButton_2")
+        self.pushButton_1 = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_1.setGeometry(QtCore.QRect(300, 147, 100, 36))
+        font = QtGui.QFont()
+        font.setPointSize(15)
+        font.setItalic(False)
+        self.pushButton_1.setFont(font)
+        self.pushButton_1.setStyleSheet("color: rgb(255, 255, 255);\n"
+"background-color: rgb(177, 177, 177);")
+        self.pushButton_1.setObjectName("pushButton_1")
+        self.pushButton_equal = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_equal.setGeometry(QtCore.QRect(600, 183, 100, 36))
+        self.pushButton_equal.setMaximumSize(QtCore.QSize(100, 16777215))
+        font = QtGui.QFont()
+        font.setPointSize(20)
+        font.setItalic(False)
+        font.setKerning(True)
+        self.pushButton_equal.setFont(font)
+        self.pushButton_equal.setStyleSheet("color: rgb(255, 255, 255);\n"
+"background-color: rgb(241, 163, 60);")
+        self.pushButton_equal.setObjectName("pushButton_equal")
+        self.pushButton_dot = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_dot.setGeometry(QtCore.QRect(400, 183, 100, 36))
+        font = QtGui.QFont()
+        font.setPointSize(15)
+        font.setItalic(False)
+        self.pushButton_dot.setFont(font)
+        self.pushButton_dot.setStyleSheet("color: rgb(255, 255, 255);\n"
+"background-color: rgb(177, 177, 177);")
+        self.pushButton_dot.setObjectName("pushButton_dot")
+        self.pushButton_sqrt = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_sqrt.setGeometry(QtCore.QRect(0, 183, 100, 36))
+        font = QtGui.QFont()
+        font.setPointSize(15)
+        font.setItalic(False)
+        self.pushButton_sqrt.setFont(font)
+        self.pushButton_sqrt.setStyleSheet("color: rgb(255, 255, 255);\n"
+"background-color: rgb(78, 81, 86);")
+        self.pushButton_sqrt.setObjectName("pushButton_sqrt")
+        self.pushButton_0 = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_0.setGeometry(QtCore.QRect(300, 183, 100, 36))
+        font = QtGui.QFont()
+        font.setPointSize(15)
+        font.setItalic(False)
+        self.pushButton_0.setFont(font)
+        self.pushButton_0.setStyleSheet("color: rgb(255, 255, 255);\n"
+"background-color: rgb(177, 177, 177);")
+        self.pushButton_0.setObjectName("pushButton_0")
+        self.pushButton_log = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_log.setGeometry(QtCore.QRect(200, 183, 100, 36))
+        font = QtGui.QFont()
+        font.setPointSize(15)
+        font.setItalic(False)
+        self.pushButton_log.setFont(font)
+        self.pushButton_log.setStyleSheet("color: rgb(255, 255, 255);\n"
+"background-color: rgb(78, 81, 86);")
+        self.pushButton_log.setObjectName("pushButton_log")
+        self.pushButton_exp = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_exp.setGeometry(QtCore.QRect(500, 183, 100, 36))
+        font = QtGui.QFont()
+        font.setPointSize(15)
+        font.setItalic(False)
+        self.pushButton_exp.setFont(font)
+        self.pushButton_exp.setStyleSheet("color: rgb(255, 255, 255);\n"
+"background-color: rgb(177, 177, 177);")
+        self.pushButton_exp.setObjectName("pushButton_exp")
+        self.pushButton_ln = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_ln.setGeometry(QtCore.QRect(100, 183, 100, 36))
+        font = QtGui.QFont()
+        font.setPointSize(15)
+        font.setItalic(False)
+        self.pushButton_ln.setFont(font)
+        self.pushButton_ln.setStyleSheet("color: rgb(255, 255, 255);\n"
+"background-color: rgb(78, 81, 86);")
+        self.pushButton_ln.setObjectName("pushButton_ln")
+        self.pushButton_clean_histoty = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_clean_histoty.setGeometry(QtCore.QRect(600, 219, 100, 55))
+        font = QtGui.QFont()
+        font.setPointSize(14)
+        font.setItalic(False)
+        self.pushButton_clean_histoty.setFont(font)
+        self.pushButton_clean_histoty.setStyleSheet("color: rgb(255, 255, 255);\n"
+"background-color: rgb(78, 81, 86);\n"
+"")
+        self.pushButton_clean_histoty.setObjectName("pushButton_clean_histoty")
+        self.pushButton_load_expres = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.pushButton_load_expres.setGeometry(QtCore.QRect(600, 274, 100, 55))
+        font = QtGui.QFont()
+        font.setPointSize(14)
+        font.setItalic(False)
+        self.pushButton_load_expres.setFont(font)
+        self.pushButton_load_expres.setStyleSheet("color: rgb(255, 255, 255);\n"
+"background-color: rgb(78, 81, 86);")
+        self.pushButton_load_expres.setObjectName("pushButton_load_expres")
+        self.list_history = QtWidgets.QTableView(parent=self.centralwidget)
+        self.list_history.setGeometry(QtCore.QRect(0, 239, 601, 89))
+        font = QtGui.QFont()
+        font.setPointSize(14)
+        self.list_history.setFont(font)
+        self.list_history.setLayoutDirection(QtCore.Qt.LayoutDirection.LeftToRight)
+        self.list_history.setAutoFillBackground(False)
+        self.list_history.setFrameShape(QtWidgets.QFrame.Shape.NoFrame)
+        self.list_history.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.list_history.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.SingleSelection)
+        self.list_history.setShowGrid(False)
+        self.list_history.setObjectName("list_history")
+        self.list_history.horizontalHeader().setVisible(False)
+        self.list_history.horizontalHeader().setStretchLastSection(True)
+        self.list_history.verticalHeader().setVisible(False)
+        self.list_history.verticalHeader().setDefaultSectionSize(24)
+        self.label_text_3 = QtWidgets.QLabel(parent=self.centralwidget)
+        self.label_text_3.setGeometry(QtCore.QRect(0, 219, 601, 21))
+        font = QtGui.QFont()
+        font.setPointSize(14)
+        font.setItalic(True)
+        font.setKerning(False)
+        self.label_text_3.setFont(font)
+        self.label_text_3.setAutoFillBackground(False)
+        self.label_text_3.setStyleSheet("background-color: rgb(255, 255, 255);")
+        self.label_text_3.setFrameShape(QtWidgets.QFrame.Shape.NoFrame)
+        self.label_text_3.setFrameShadow(QtWidgets.QFrame.Shadow.Sunken)
+        self.label_text_3.setLineWidth(1)
+        self.label_text_3.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
+        self.label_text_3.setIndent(0)
+        self.label_text_3.setObjectName("label_text_3")
+        self.text_edit = QtWidgets.QPlainTextEdit(parent=self.centralwidget)
+        self.text_edit.setGeometry(QtCore.QRect(0, 0, 700, 40))
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Fixed, QtWidgets.QSizePolicy.Policy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.text_edit.sizePolicy().hasHeightForWidth())
+        self.text_edit.setSizePolicy(sizePolicy)
+        self.text_edit.setMinimumSize(QtCore.QSize(700, 40))
+        self.text_edit.setMaximumSize(QtCore.QSize(700, 40))
+        font = QtGui.QFont()
+        font.setFamily("Arial")
+        font.setPointSize(25)
+        font.setKerning(True)
+        self.text_edit.setFont(font)
+        self.text_edit.viewport().setProperty("cursor", QtGui.QCursor(QtCore.Qt.CursorShape.IBeamCursor))
+        self.text_edit.setMouseTracking(True)
+        self.text_edit.setFocusPolicy(QtCore.Qt.FocusPolicy.ClickFocus)
+        self.text_edit.setLayoutDirection(QtCore.Qt.LayoutDirection.LeftToRight)
+        self.text_edit.setStyleSheet("background-color: rgb(56, 58, 62);\n"
+"color: rgb(255, 255, 255);\n"
+"")
+        self.text_edit.setInputMethodHints(QtCore.Qt.InputMethodHint.ImhNone)
+        self.text_edit.setFrameShape(QtWidgets.QFrame.Shape.StyledPanel)
+        self.text_edit.setFrameShadow(QtWidgets.QFrame.Shadow.Sunken)
+        self.text_edit.setVerticalScrollBarPolicy(QtCore.Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.text_edit.setHorizontalScrollBarPolicy(QtCore.Qt.ScrollBarPolicy.ScrollBarAsNeeded)
+        self.text_edit.setSizeAdjustPolicy(QtWidgets.QAbstractScrollArea.SizeAdjustPolicy.AdjustIgnored)
+        self.text_edit.setUndoRedoEnabled(False)
+        self.text_edit.setLineWrapMode(QtWidgets.QPlainTextEdit.LineWrapMode.NoWrap)
+        self.text_edit.setReadOnly(True)
+        self.text_edit.setMaximumBlockCount(256)
+        self.text_edit.setCenterOnScroll(True)
+        self.text_edit.setObjectName("text_edit")
+        self.list_history.raise_()
+        self.label_text_3.raise_()
+        self.pushButton_graph.raise_()
+        self.pushButton_x.raise_()
+        self.pushButton_open_br.raise_()
+        self.pushButton_close_br.raise_()
+        self.pushButton_div.raise_()
+        self.pushButton_ac.raise_()
+        self.pushButton_c.raise_()
+        self.pushButton_mod.raise_()
+        self.pushButton_7.raise_()
+        self.pushButton_9.raise_()
+        self.pushButton_8.raise_()
+        self.pushButton_exponentiation.raise_()
+        self.pushButton_mul.raise_()
+        self.pushButton_pi.raise_()
+        self.pushButton_sin.raise_()
+        self.pushButton_cos.raise_()
+        self.pushButton_6.raise_()
+        self.pushButton_4.raise_()
+        self.pushButton_sub.raise_()
+        self.pushButton_tan.raise_()
+        self.pushButton_5.raise_()
+        self.pushButton_acos.raise_()
+        self.pushButton_atan.raise_()
+        self.pushButton_add.raise_()
+        self.pushButton_asin.raise_()
+        self.pushButton_3.raise_()
+        self.pushButton_2.raise_()
+        self.pushButton_1.raise_()
+        self.pushButton_equal.raise_()
+        self.pushButton_dot.raise_()
+        self.pushButton_sqrt.raise_()
+        self.pushButton_0.raise_()
+        self.pushButton_log.raise_()
+        self.pushButton_exp.raise_()
+        self.pushButton_ln.raise_()
+        self.pushButton_clean_histoty.raise_()
+        self.pushButton_load_expres.raise_()
+        self.text_edit.raise_()
+        MainWindow.setCentralWidget(self.centralwidget)
+        self.actionAbout = QtGui.QAction(parent=MainWindow)
+        self.actionAbout.setObjectName("actionAbout")
+
+        self.retranslateUi(MainWindow)
+        QtCore.QMetaObject.connectSlotsByName(MainWindow)
+
+    def retranslateUi(self, MainWindow):
+        _translate = QtCore.QCoreApplication.translate
+        MainWindow.setWindowTitle(_translate("MainWindow", "Calculator"))
+        self.pushButton_graph.setText(_translate("MainWindow", " graph"))
+        self.pushButton_x.setText(_translate("MainWindow", "x"))
+        self.pushButton_open_br.setText(_translate("MainWindow", "("))
+        self.pushButton_close_br.setText(_translate("MainWindow", ")"))
+        self.pushButton_div.setText(_translate("MainWindow", "/"))
+        self.pushButton_ac.setText(_translate("MainWindow", "AC"))
+        self.pushButton_c.setText(_translate("MainWindow", "⌫"))
+        self.pushButton_mod.setText(_translate("MainWindow", "mod"))
+        self.pushButton_7.setText(_translate("MainWindow", "7"))
+        self.pushButton_9.setText(_translate("MainWindow", "9"))
+        self.pushButton_8.setText(_translate("MainWindow", "8"))
+        self.pushButton_exponentiation.setText(_translate("MainWindow", "x^y"))
+        self.pushButton_mul.setText(_translate("MainWindow", "*"))
+        self.pushButton_pi.setText(_translate("MainWindow", "π"))
+        self.pushButton_sin.setText(_translate("MainWindow", "sin"))
+        self.pushButton_cos.setText(_translate("MainWindow", "cos"))
+        self.pushButton_6.setText(_translate("MainWindow", "6"))
+        self.pushButton_4.setText(_translate("MainWindow", "4"))
+        self.pushButton_sub.setText(_translate("MainWindow", "-"))
+        self.pushButton_tan.setText(_translate("MainWindow", "tan"))
+        self.pushButton_5.setText(_translate("MainWindow", "5"))
+        self.pushButton_acos.setText(_translate("MainWindow", "acos"))
+        self.pushButton_atan.setText(_translate("MainWindow", "atan"))
+        self.pushButton_add.setText(_translate("MainWindow", "+"))
+        self.pushButton_asin.setText(_translate("MainWindow", "asin"))
+        self.pushButton_3.setText(_translate("MainWindow", "3"))
+        self.pushButton_2.setText(_translate("MainWindow", "2"))
+        self.pushButton_1.setText(_translate("MainWindow", "1"))
+        self.pushButton_equal.setText(_translate("MainWindow", "="))
+        self.pushButton_dot.setText(_translate("MainWindow", "."))
+        self.pushButton_sqrt.setText(_translate("MainWindow", "sqrt"))
+        self.pushButton_0.setText(_translate("MainWindow", "0"))
+        self.pushButton_log.setText(_translate("MainWindow", "log"))
+        self.pushButton_exp.setText(_translate("MainWindow", "E"))
+        self.pushButton_ln.setText(_translate("MainWindow", "ln"))
+        self.pushButton_clean_histoty.setText(_translate("MainWindow", "Clean history"))
+        self.pushButton_load_expres.setText(_translate("MainWindow", "Load string"))
+        self.label_text_3.setText(_translate("MainWindow", "History"))
+        self.text_edit.setPlainText(_translate("MainWindow", "0"))
+        self.actionAbout.setText(_translate("MainWindow", "About"))